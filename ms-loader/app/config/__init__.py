@@ -1,2 +1,2 @@
 from .logger import logger
-from .config import POSTGRES, KAFKA
\ No newline at end of file
+from .config import POSTGRES, KAFKA, LOADER, METRICS
@@ -17,6 +17,28 @@ POSTGRES = {
     "user": os.getenv("POSTGRES_USER", "postgres"),
     "password": os.getenv("POSTGRES_PASSWORD", "password"),
     "db": os.getenv("POSTGRES_DB", "postgres"),
+    "load_mode": os.getenv("POSTGRES_LOAD_MODE", "insert").lower(),
+    "copy_batch_size": int(os.getenv("POSTGRES_COPY_BATCH_SIZE", "10000")),
+    "pool_min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1")),
+    "pool_max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
+    "pool_timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", "30")),
+    "pool_health_check_interval": float(
+        os.getenv("POSTGRES_POOL_HEALTH_CHECK_INTERVAL", "30")
+    ),
+    # Keep the cdr_daily_*_usage rollup tables up to date in every load transaction
+    "rollups": os.getenv("POSTGRES_ROLLUPS", "false").lower() == "true",
+    # cdrs ids summed per transaction when backfilling newly created rollup tables
+    "rollup_backfill_batch": int(os.getenv("POSTGRES_ROLLUP_BACKFILL_BATCH", "100000")),
+    # off, daily or monthly range partitions of cdrs on starttime
+    "partitioning": os.getenv("POSTGRES_PARTITIONING", "off").lower(),
+    # Partitions created ahead of the current period
+    "partition_premake": int(os.getenv("POSTGRES_PARTITION_PREMAKE", "3")),
+    # Periods kept, counting the current one; older partitions are dropped. 0 keeps all
+    "partition_retention": int(os.getenv("POSTGRES_PARTITION_RETENTION", "0")),
+    # Also DELETE expired rows of cdrs_default on each retention pass (a full scan)
+    "partition_purge_default": (
+        os.getenv("POSTGRES_PARTITION_PURGE_DEFAULT", "false").lower() == "true"
+    ),
 }
 
 KAFKA = {
@@ -24,4 +46,81 @@ KAFKA = {
     "topic": os.getenv("KAFKA_TOPIC", "cdr-records"),
     "group_id": os.getenv("KAFKA_GROUP_ID", "cdr-consumer-group"),
     "ssl": os.getenv("KAFKA_SSL", "false").lower() == "true",
+    "linger_ms": int(os.getenv("KAFKA_LINGER_MS", "20")),
+    "batch_size": int(os.getenv("KAFKA_BATCH_SIZE", "262144")),
+    "compression": os.getenv("KAFKA_COMPRESSION", "lz4"),
+    "idempotence": os.getenv("KAFKA_IDEMPOTENCE", "true").lower() == "true",
+    "queue_max_messages": int(os.getenv("KAFKA_QUEUE_MAX_MESSAGES", "100000")),
+    "flush_timeout": float(os.getenv("KAFKA_FLUSH_TIMEOUT", "60")),
+    "dead_letter_topic": os.getenv("KAFKA_DEAD_LETTER_TOPIC", "cdr-dead-letter"),
+    # direct: published after the load;
+    # outbox: committed to cdr_outbox with the rows and relayed
+    "publish_mode": os.getenv("KAFKA_PUBLISH_MODE", "direct").lower(),
+    "outbox_batch_size": int(os.getenv("OUTBOX_BATCH_SIZE", "10000")),
+    "outbox_poll_interval": float(os.getenv("OUTBOX_POLL_INTERVAL", "1")),
+    "outbox_retention_hours": float(os.getenv("OUTBOX_RETENTION_HOURS", "24")),
+}
+
+LOADER = {
+    "cdr_directory": os.getenv("CDR_DIRECTORY", "./cdr_files"),
+    # batch: parse every file, then load, then publish; streaming: chunk by chunk;
+    # async: chunk by chunk with parsing and loading overlapped.
+    # streaming and async require KAFKA_PUBLISH_MODE=outbox
+    "pipeline_mode": os.getenv("PIPELINE_MODE", "batch").lower(),
+    "chunk_size": int(os.getenv("PIPELINE_CHUNK_SIZE", "5000")),
+    # Chunks (and files) buffered between async pipeline stages
+    "async_queue_size": int(os.getenv("ASYNC_QUEUE_SIZE", "4")),
+    # off: rescan every 30 seconds;
+    # inotify (falls back to poll) or poll: watch the directory
+    "watch_mode": os.getenv("WATCH_MODE", "off").lower(),
+    "watch_debounce": float(os.getenv("WATCH_DEBOUNCE_SECONDS", "2")),
+    "watch_poll_interval": float(os.getenv("WATCH_POLL_INTERVAL", "1")),
+    "watch_rescan_interval": float(os.getenv("WATCH_RESCAN_INTERVAL", "300")),
+    # Files are handled one per work item by this many threads;
+    # 0 runs the whole directory inline
+    "queue_workers": int(os.getenv("QUEUE_WORKERS", "0")),
+    "queue_max_size": int(os.getenv("QUEUE_MAX_SIZE", "1000")),
+    # Seconds after which a file still being loaded is reported as slow;
+    # 0 disables the report
+    "queue_slow_item_seconds": float(os.getenv("QUEUE_SLOW_ITEM_SECONDS", "900")),
+    # Local index of handled files; empty disables it
+    "manifest_path": os.getenv("MANIFEST_PATH", "./.cdr_manifest.json"),
+    # 1 parses files serially, 0 uses one worker process per CPU
+    "parse_workers": int(os.getenv("PARSE_WORKERS", "1")),
+    # Worker processes for one large NDJSON file,
+    # split into ranges of at least NDJSON_RANGE_MB
+    "ndjson_workers": int(os.getenv("NDJSON_WORKERS", "1")),
+    "ndjson_range_bytes": int(float(os.getenv("NDJSON_RANGE_MB", "64")) * 1024 * 1024),
+    # Worker processes for one large CSV file (python engine),
+    # split into ranges of at least CSV_RANGE_MB
+    "csv_workers": int(os.getenv("CSV_WORKERS", "1")),
+    "csv_range_bytes": int(float(os.getenv("CSV_RANGE_MB", "64")) * 1024 * 1024),
+    # Keep the raw content of rejected records; otherwise only row numbers and reasons
+    "capture_invalid_rows": (
+        os.getenv("CAPTURE_INVALID_ROWS", "false").lower() == "true"
+    ),
+    # off: rejected records are only counted; file: <input>.rejected.jsonl per input;
+    # kafka: dead-letter topic
+    "dead_letter_mode": os.getenv("DEAD_LETTER_MODE", "off").lower(),
+    "dead_letter_directory": os.getenv("DEAD_LETTER_DIRECTORY", "./dead_letter"),
+    "dead_letter_buffer_size": int(os.getenv("DEAD_LETTER_BUFFER_SIZE", "1000")),
+    # Skip records already loaded from another file, matched on all their values
+    "dedup_records": os.getenv("DEDUP_RECORDS", "false").lower() == "true",
+    # Bloom filter of loaded record fingerprints;
+    # rebuilt from cdr_fingerprints when missing
+    "dedup_filter_path": os.getenv("DEDUP_FILTER_PATH", "./.cdr_fingerprints.bloom"),
+    "dedup_capacity": int(os.getenv("DEDUP_CAPACITY", "10000000")),
+    "dedup_error_rate": float(os.getenv("DEDUP_ERROR_RATE", "0.001")),
+    # Hold parsed records in array-backed RecordBatches instead of dicts: about
+    # 3x less memory, but about 3x the CPU to build
+    "record_batches": os.getenv("RECORD_BATCHES", "false").lower() == "true",
+    # python: csv.DictReader row by row; columnar: pandas chunks, vectorized checks
+    "csv_engine": os.getenv("CSV_ENGINE", "python").lower(),
+    "parse_preserve_order": os.getenv("PARSE_PRESERVE_ORDER", "true").lower() == "true",
+}
+
+METRICS = {
+    # Prometheus text format on http://<host>:<port>/metrics; 0 disables the endpoint
+    "port": int(os.getenv("METRICS_PORT", "9100")),
+    "host": os.getenv("METRICS_HOST", "0.0.0.0"),
 }
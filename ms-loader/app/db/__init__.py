@@ -1,6 +1,17 @@
 from .database import (
     save_to_postgres,
+    save_file_stream,
     connect,
+    get_pool,
+    close_pool,
+    pooled_connection,
     is_file_processed,
-    mark_file_as_processed
-)
\ No newline at end of file
+    processed_filenames,
+    mark_file_as_processed,
+    write_outbox
+)
+from .pool import ConnectionPool
+from .manifest import FileManifest, get_manifest
+from .outbox import create_outbox_table, purge_sent, pending_count
+from .rollups import create_rollup_tables
+from .partitions import start_partitioning, create_partitions, drop_expired_partitions
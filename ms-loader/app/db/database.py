@@ -1,56 +1,387 @@
+import csv
+import io
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
-from app.config import POSTGRES
+from app.config import KAFKA, POSTGRES
 from app.config.logger import logger
+from app.db.pool import ConnectionPool
+from app.metrics.pipeline import POOL_CONNECTIONS, RECORDS, file_format, observe_stage
+
+LOAD_MODES = ("insert", "copy")
+CDR_COLUMNS = ("source", "destination", "starttime", "service", "usage", "file_name")
+COPY_SQL = (
+    f"COPY cdrs ({', '.join(CDR_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+INSERT_SQL = (
+    f"INSERT INTO cdrs ({', '.join(CDR_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s)"
+)
+OUTBOX_COLUMNS = ("file_name", "message_key", "payload")
+OUTBOX_COPY_SQL = (
+    f"COPY cdr_outbox ({', '.join(OUTBOX_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _open_connection():
+    logger.debug("Connecting to PostgreSQL database")
+    return psycopg2.connect(
+        host=POSTGRES["host"],
+        port=POSTGRES["port"],
+        dbname=POSTGRES["db"],
+        user=POSTGRES["user"],
+        password=POSTGRES["password"],
+    )
 
 
 def connect():
     try:
-        logger.debug("Connecting to PostgreSQL database")
-        return psycopg2.connect(
-            host=POSTGRES["host"],
-            port=POSTGRES["port"],
-            dbname=POSTGRES["db"],
-            user=POSTGRES["user"],
-            password=POSTGRES["password"],
-        )
+        return _open_connection()
     except Exception as e:
         logger.error(f"Error connecting to PostgreSQL database: {e}")
         return None
 
 
-def is_file_processed(filename):
-    conn = connect()
-    cur = conn.cursor()
-    try:
+def get_pool():
+    """Return the loader-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(
+                    _open_connection,
+                    min_size=POSTGRES["pool_min_size"],
+                    max_size=POSTGRES["pool_max_size"],
+                    timeout=POSTGRES["pool_timeout"],
+                    health_check_interval=POSTGRES["pool_health_check_interval"],
+                )
+                pool.fill()
+                for state in ("in_use", "idle", "max_size"):
+                    POOL_CONNECTIONS.labels(state=state).set_function(
+                        lambda state=state: pool.stats()[state]
+                    )
+                _pool = pool
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def pooled_connection(conn=None):
+    """Yield conn if given, otherwise borrow one from the pool."""
+    if conn is not None:
+        yield conn
+        return
+    with get_pool().connection() as pooled:
+        yield pooled
+
+
+def is_file_processed(filename, conn=None):
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "SELECT EXISTS(SELECT 1 FROM processed_files WHERE filename = %s)",
+                (filename,),
+            )
+            return cur.fetchone()[0]
+        finally:
+            cur.close()
+
+
+def processed_filenames(filenames, conn=None):
+    """Return the subset of filenames already in processed_files, in one query."""
+    if not filenames:
+        return set()
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "SELECT filename FROM processed_files WHERE filename = ANY(%s)",
+                (list(filenames),),
+            )
+            return {row[0] for row in cur.fetchall()}
+        finally:
+            cur.close()
+
+
+def mark_file_as_processed(filename, conn=None):
+    """Insert the processed-file marker.
+
+    When conn is given the marker joins the caller's transaction and is
+    committed with it; otherwise it is committed on a pooled connection.
+    """
+    owns_transaction = conn is None
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO processed_files (filename) VALUES (%s)", (filename,)
+            )
+            if owns_transaction:
+                conn.commit()
+        finally:
+            cur.close()
+
+
+def record_rows(records):
+    """Yield records as tuples in CDR_COLUMNS order."""
+    if hasattr(records, "iter_rows"):
+        return records.iter_rows()
+    return (
+        (
+            record["source"],
+            record["destination"],
+            record["starttime"],
+            record["service"],
+            float(record["usage"]),
+            record.get("file_name"),
+        )
+        for record in records
+    )
+
+
+def insert_rows(cur, rows, table="cdrs"):
+    """Insert CDR_COLUMNS rows into table one at a time."""
+    sql = INSERT_SQL.replace("INTO cdrs", f"INTO {table}", 1)
+    for row in rows:
+        cur.execute(sql, row)
+
+
+def insert_records(cur, file_records):
+    """Insert records one row at a time."""
+    insert_rows(cur, record_rows(file_records))
+
+
+def copy_rows(cur, sql, rows, batch_size):
+    """Stream rows with the COPY FROM STDIN statement sql, batch_size rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    def flush():
+        buffer.seek(0)
+        cur.copy_expert(sql, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_size:
+            flush()
+            pending = 0
+
+    if pending:
+        flush()
+
+
+def copy_records(cur, file_records, batch_size):
+    """Stream records into cdrs with COPY FROM STDIN, batch_size rows at a time."""
+    copy_rows(cur, COPY_SQL, record_rows(file_records), batch_size)
+
+
+def copy_frame(cur, frame):
+    """COPY a columnar batch (a pandas DataFrame with CDR_COLUMNS) into cdrs."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, columns=list(CDR_COLUMNS), header=False, index=False)
+    buffer.seek(0)
+    cur.copy_expert(COPY_SQL, buffer)
+
+
+def cdr_rows(records):
+    """Like record_rows, but also accepts a columnar batch."""
+    if hasattr(records, "to_csv"):
+        return records[list(CDR_COLUMNS)].itertuples(index=False, name=None)
+    return record_rows(records)
+
+
+def outbox_rows(records):
+    """Yield (file_name, message_key, payload) outbox rows for records.
+
+    The payload is the Kafka message publish_to_kafka would send.
+    """
+    from app.messaging.kafka_producer import encode_record
+
+    for source, destination, starttime, service, usage, file_name in cdr_rows(records):
+        payload = encode_record({
+            "file_name": file_name,
+            "source": source,
+            "destination": destination,
+            "starttime": starttime,
+            "service": service,
+            "usage": usage,
+        })
+        yield file_name, str(source), payload
+
+
+def write_outbox(cur, records, mode):
+    """Queue the Kafka messages for records in cdr_outbox, in cur's transaction."""
+    if mode == "copy" or hasattr(records, "to_csv"):
+        copy_rows(
+            cur, OUTBOX_COPY_SQL, outbox_rows(records), POSTGRES["copy_batch_size"]
+        )
+        return
+    for row in outbox_rows(records):
         cur.execute(
-            "SELECT EXISTS(SELECT 1 FROM processed_files WHERE filename = %s)",
-            (filename,),
+            "INSERT INTO cdr_outbox (file_name, message_key, payload) "
+            "VALUES (%s, %s, %s)",
+            row,
         )
-        return cur.fetchone()[0]
-    finally:
-        cur.close()
-        conn.close()
 
 
-def mark_file_as_processed(filename):
-    conn = connect()
-    cur = conn.cursor()
-    try:
-        cur.execute("INSERT INTO processed_files (filename) VALUES (%s)", (filename,))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+def uses_rollups(rollups=None):
+    """Whether loads maintain the daily usage rollups (POSTGRES_ROLLUPS)."""
+    return POSTGRES["rollups"] if rollups is None else rollups
 
 
-def save_to_postgres(records):
-    if not records:
-        logger.warning("No records to save to PostgreSQL")
-        return False
-    conn = connect()
-    if conn is None:
-        logger.error("Failed to connect to PostgreSQL database")
-        return False
+def uses_outbox(outbox=None):
+    """Whether loads queue Kafka messages in cdr_outbox (KAFKA_PUBLISH_MODE=outbox)."""
+    return KAFKA["publish_mode"] == "outbox" if outbox is None else outbox
+
+
+def write_partitioned(cur, records, mode, period):
+    """Write records straight into their starttime partitions of cdrs.
+
+    Loading each partition directly spares PostgreSQL routing every row
+    through the parent. Rows without a known partition go through cdrs.
+    """
+    from app.db.partitions import partition_tables
+
+    for table, rows in partition_tables(cdr_rows(records), period).items():
+        if mode == "copy" or hasattr(records, "to_csv"):
+            sql = COPY_SQL.replace("COPY cdrs", f"COPY {table}", 1)
+            copy_rows(cur, sql, rows, POSTGRES["copy_batch_size"])
+        else:
+            insert_rows(cur, rows, table)
+
+
+def write_records(cur, records, mode, outbox=False, rollups=False, deduplicator=None):
+    """Write records on cur using the given load mode; returns the records written.
+
+    With a deduplicator, records already loaded from another file are
+    dropped first (see app.dedup).
+
+    Columnar batches are always loaded with COPY. When cdrs is partitioned
+    (see app.db.partitions), rows go straight to their partitions. With
+    outbox, their Kafka messages are written to cdr_outbox on the same
+    cursor; with rollups, their usage is added to the daily rollup tables.
+    """
+    from app.db.partitions import active_period
+    from app.db.rollups import write_rollups
+
+    if deduplicator is not None:
+        records = deduplicator.filter_new(cur, records)
+        if not len(records):
+            return records
+    period = active_period()
+    if period:
+        write_partitioned(cur, records, mode, period)
+    elif hasattr(records, "to_csv"):
+        copy_frame(cur, records)
+    elif mode == "copy":
+        copy_records(cur, records, POSTGRES["copy_batch_size"])
+    else:
+        insert_records(cur, records)
+    if outbox:
+        write_outbox(cur, records, mode)
+    if rollups:
+        write_rollups(cur, cdr_rows(records))
+    return records
+
+
+def load_deduplicator(dedup=None):
+    """The loader's Deduplicator when DEDUP_RECORDS (or dedup) is on, else None."""
+    from app.dedup import get_deduplicator, uses_dedup
+
+    return get_deduplicator() if uses_dedup(dedup) else None
+
+
+def save_file_stream(
+    file_name, chunks, mode=None, on_chunk=None, outbox=None, rollups=None,
+    dedup=None, counts=None,
+):
+    """Load one file's record chunks in a single transaction.
+
+    on_chunk is called with each chunk once it has been written, without
+    the records dropped as duplicates under dedup (default: DEDUP_RECORDS). With
+    outbox (default: KAFKA_PUBLISH_MODE), the chunks' Kafka messages are
+    committed to cdr_outbox together with the rows and the processed-file
+    marker; with rollups (default: POSTGRES_ROLLUPS), so are the daily
+    usage rollups. Returns the number of rows written, 0 if there were none, or
+    None if the file was already processed. A file whose records were all
+    duplicates commits with 0 rows written; counts, a dict, tells it apart
+    from a file without records by getting the 'received' records and the
+    'duplicates' dropped. Errors roll the file back and are re-raised.
+    """
+    mode = mode or POSTGRES["load_mode"]
+    outbox = uses_outbox(outbox)
+    rollups = uses_rollups(rollups)
+    deduplicator = load_deduplicator(dedup)
+    if mode not in LOAD_MODES:
+        raise ValueError(
+            f"Unknown load mode: {mode}. Must be one of: {', '.join(LOAD_MODES)}"
+        )
+
+    with get_pool().connection() as conn:
+        if is_file_processed(file_name, conn=conn):
+            logger.info(f"File {file_name} has already been processed. Skipping.")
+            return None
+
+        received = 0
+        written = 0
+        write_seconds = 0.0
+        started = time.perf_counter()
+        cur = conn.cursor()
+        try:
+            for chunk in chunks:
+                chunk_started = time.perf_counter()
+                received += len(chunk)
+                chunk = write_records(cur, chunk, mode, outbox, rollups, deduplicator)
+                write_seconds += time.perf_counter() - chunk_started
+                written += len(chunk)
+                if on_chunk and len(chunk):
+                    on_chunk(chunk)
+
+            if counts is not None:
+                counts.update(received=received, duplicates=received - written)
+            if not received:
+                conn.rollback()
+                return 0
+
+            mark_file_as_processed(file_name, conn=conn)
+            commit_started = time.perf_counter()
+            conn.commit()
+            write_seconds += time.perf_counter() - commit_started
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    fmt = file_format(file_name)
+    observe_stage("db_write", fmt, write_seconds)
+    RECORDS.labels(format=fmt, outcome="loaded").inc(written)
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    logger.info(
+        f"Processed {written} records from file {file_name} "
+        f"in {elapsed:.3f}s ({rate:.0f} rows/s, mode={mode}, streaming)"
+    )
+    return written
+
+
+def _group_by_file(records):
     files_records = {}
     for record in records:
         if "file_name" not in record:
@@ -60,38 +391,76 @@ def save_to_postgres(records):
         if file_name not in files_records:
             files_records[file_name] = []
         files_records[file_name].append(record)
+    return files_records
+
+
+def save_to_postgres(
+    records, mode=None, outbox=None, rollups=None, dedup=None, on_written=None
+):
+    """Load records of new files and their processed-file markers in one transaction.
+
+    With outbox (default: KAFKA_PUBLISH_MODE), the records' Kafka messages
+    are written to cdr_outbox in the same transaction; with rollups
+    (default: POSTGRES_ROLLUPS), the daily usage rollups are updated in it.
+    With dedup (default: DEDUP_RECORDS), records already loaded from
+    another file are skipped. After the commit, on_written is called with
+    each file's records as written.
+    """
+    if not records:
+        logger.warning("No records to save to PostgreSQL")
+        return False
+    mode = mode or POSTGRES["load_mode"]
+    if mode not in LOAD_MODES:
+        logger.error(
+            f"Unknown load mode: {mode}. Must be one of: {', '.join(LOAD_MODES)}"
+        )
+        return False
+    outbox = uses_outbox(outbox)
+    rollups = uses_rollups(rollups)
+    deduplicator = load_deduplicator(dedup)
+    if hasattr(records, "split_by_file"):
+        files_records = records.split_by_file()
+    else:
+        files_records = _group_by_file(records)
+
+    try:
+        conn = get_pool().getconn()
+    except Exception as e:
+        logger.error(f"Failed to connect to PostgreSQL database: {e}")
+        return False
 
     success = False
-    conn = connect()
+    loaded = []
     cur = conn.cursor()
     try:
         for file_name, file_records in files_records.items():
-            if is_file_processed(file_name):
+            if is_file_processed(file_name, conn=conn):
                 logger.info(f"File {file_name} has already been processed. Skipping.")
                 continue
 
-            for record in file_records:
-                cur.execute(
-                    """
-                    INSERT INTO cdrs (source, destination, starttime, service, usage, file_name)
-                    VALUES (%s, %s, %s, %s, %s ,%s)
-                """,
-                    (
-                        record["source"],
-                        record["destination"],
-                        record["starttime"],
-                        record["service"],
-                        float(record["usage"]),
-                        record["file_name"]
-                        if "file_name" in record else None,
-                    ),
-                )
+            started = time.perf_counter()
+            file_records = write_records(
+                cur, file_records, mode, outbox, rollups, deduplicator
+            )
+            elapsed = time.perf_counter() - started
+            observe_stage("db_write", file_format(file_name), elapsed)
+            loaded.append((file_name, file_records))
 
-            mark_file_as_processed(file_name)
-            logger.info(f"Processed {len(file_records)} records from file {file_name}")
+            mark_file_as_processed(file_name, conn=conn)
+            rate = len(file_records) / elapsed if elapsed > 0 else float("inf")
+            logger.info(
+                f"Processed {len(file_records)} records from file {file_name} "
+                f"in {elapsed:.3f}s ({rate:.0f} rows/s, mode={mode})"
+            )
             success = True
 
         conn.commit()
+        for file_name, file_records in loaded:
+            RECORDS.labels(format=file_format(file_name), outcome="loaded").inc(
+                len(file_records)
+            )
+            if on_written and len(file_records):
+                on_written(file_records)
         return success
 
     except Exception as e:
@@ -101,4 +470,4 @@ def save_to_postgres(records):
         return False
     finally:
         cur.close()
-        conn.close()
+        get_pool().putconn(conn)
@@ -0,0 +1,92 @@
+import psycopg2
+from psycopg2 import errors
+
+from app.db.database import copy_rows, pooled_connection
+
+FINGERPRINTS_DDL = """
+    CREATE TABLE IF NOT EXISTS cdr_fingerprints (
+        fingerprint BYTEA PRIMARY KEY,
+        file_name TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+COPY_FINGERPRINTS_SQL = (
+    "COPY cdr_fingerprints (fingerprint, file_name) FROM STDIN WITH (FORMAT csv)"
+)
+# Only the fingerprints that were not there yet come back
+INSERT_NEW_FINGERPRINTS_SQL = """
+    INSERT INTO cdr_fingerprints (fingerprint, file_name)
+    SELECT fingerprint, %s FROM unnest(%s::bytea[]) AS fingerprint
+    ON CONFLICT (fingerprint) DO NOTHING
+    RETURNING fingerprint
+"""
+
+
+def create_fingerprint_table(conn=None):
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(FINGERPRINTS_DDL)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def existing_fingerprints(cur, fingerprints):
+    """Return the subset of fingerprints already in cdr_fingerprints, in one query."""
+    if not fingerprints:
+        return set()
+    cur.execute(
+        "SELECT fingerprint FROM cdr_fingerprints WHERE fingerprint = ANY(%s)",
+        ([psycopg2.Binary(fingerprint) for fingerprint in fingerprints],),
+    )
+    return {bytes(row[0]) for row in cur.fetchall()}
+
+
+def insert_fingerprints(cur, fingerprints, file_name, batch_size):
+    """Record fingerprints as loaded; returns those that were new.
+
+    The fast path COPYs them all. If one is already there (a stale Bloom
+    filter, or another loader with the same records), the COPY is undone
+    and the fingerprints are inserted with ON CONFLICT DO NOTHING, so the
+    table's unique key has the final word.
+    """
+    if not fingerprints:
+        return set()
+    cur.execute("SAVEPOINT cdr_fingerprints")
+    try:
+        rows = ((f"\\x{fp.hex()}", file_name) for fp in fingerprints)
+        copy_rows(cur, COPY_FINGERPRINTS_SQL, rows, batch_size)
+    except errors.UniqueViolation:
+        cur.execute("ROLLBACK TO SAVEPOINT cdr_fingerprints")
+        cur.execute(
+            INSERT_NEW_FINGERPRINTS_SQL,
+            (file_name, [psycopg2.Binary(fingerprint) for fingerprint in fingerprints]),
+        )
+        return {bytes(row[0]) for row in cur.fetchall()}
+    cur.execute("RELEASE SAVEPOINT cdr_fingerprints")
+    return set(fingerprints)
+
+
+def fingerprint_count(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT count(*) FROM cdr_fingerprints")
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+
+
+def iter_fingerprints(conn, batch_size=100_000):
+    """Yield every stored fingerprint, read through a server-side cursor."""
+    cur = conn.cursor(name="cdr_fingerprints_scan")
+    cur.itersize = batch_size
+    try:
+        cur.execute("SELECT fingerprint FROM cdr_fingerprints")
+        for (fingerprint,) in cur:
+            yield bytes(fingerprint)
+    finally:
+        cur.close()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+
+from app.config import LOADER
+from app.config.logger import logger
+from app.db.database import processed_filenames
+from app.parsers import iter_supported_files
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def file_digest(filepath):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    """Local index of files the loader has already handled.
+
+    Each entry is keyed by filename and records the size, mtime and content
+    hash seen when the file was handled, plus its status ("processed" or
+    "rejected"). A file whose size and mtime still match costs one stat per
+    cycle. New or changed files are hashed, and the rest are checked against
+    processed_files with a single query.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._pending = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable file manifest {path}: {e}")
+
+    def scan(self, directory, skip=()):
+        """Return (filename, filepath, ext) for files that still need parsing.
+
+        Entries for files no longer in the directory are dropped. Files named
+        in skip (e.g. already queued) are neither checked nor returned.
+        """
+        files = list(iter_supported_files(directory))
+        seen = {filename for filename, _, _ in files}
+        with self._lock:
+            for filename in set(self.entries) - seen:
+                del self.entries[filename]
+                self._dirty = True
+        candidates = self.check([item for item in files if item[0] not in skip])
+        logger.info(f"File manifest: {len(seen)} files, {len(candidates)} pending")
+        return candidates
+
+    def check(self, files):
+        """Return the subset of (filename, filepath, ext) that still needs parsing."""
+        candidates = []
+        for filename, filepath, ext in files:
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            # Worker threads mark and store entries while files are checked
+            with self._lock:
+                entry = self.entries.get(filename)
+                pending = self._pending.get(filename)
+            if entry and entry["size"] == stat.st_size \
+                    and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+
+            # A file returned but not marked yet keeps its digest while unchanged
+            if pending and pending["size"] == stat.st_size \
+                    and pending["mtime_ns"] == stat.st_mtime_ns:
+                digest = pending["sha256"]
+            else:
+                digest = file_digest(filepath)
+            fingerprint = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest,
+            }
+            if entry and entry["sha256"] == fingerprint["sha256"]:
+                self._store(filename, fingerprint, entry["status"])
+                continue
+
+            with self._lock:
+                self._pending[filename] = fingerprint
+            candidates.append((filename, filepath, ext))
+
+        if candidates:
+            try:
+                already_loaded = processed_filenames([c[0] for c in candidates])
+            except Exception as e:
+                logger.error(f"Could not sync file manifest with processed_files: {e}")
+                already_loaded = set()
+            for filename in already_loaded:
+                self.mark(filename, "processed")
+            candidates = [c for c in candidates if c[0] not in already_loaded]
+
+        self.save()
+        return candidates
+
+    def mark(self, filename, status):
+        """Record the outcome for a file returned by the last scan."""
+        with self._lock:
+            fingerprint = self._pending.pop(filename, None)
+        if fingerprint is not None:
+            self._store(filename, fingerprint, status)
+
+    def save(self):
+        """Write the manifest atomically if it changed."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.error(f"Error writing file manifest {self.path}: {e}")
+
+    def _store(self, filename, fingerprint, status):
+        with self._lock:
+            self.entries[filename] = dict(fingerprint, status=status)
+            self._dirty = True
+
+
+def get_manifest():
+    """Return the loader-wide file manifest, or None when it is disabled."""
+    global _manifest
+    if not LOADER["manifest_path"]:
+        return None
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = FileManifest(LOADER["manifest_path"])
+    return _manifest
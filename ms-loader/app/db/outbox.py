@@ -0,0 +1,92 @@
+from app.config.logger import logger
+from app.db.database import pooled_connection
+
+OUTBOX_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS cdr_outbox (
+        id BIGSERIAL PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        message_key TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        sent_at TIMESTAMPTZ
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS cdr_outbox_pending ON cdr_outbox (id)
+    WHERE sent_at IS NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS cdr_outbox_sent_at ON cdr_outbox (sent_at)
+    WHERE sent_at IS NOT NULL
+    """,
+)
+
+# Rows locked by one relay are skipped by any other,
+# so several loaders can relay at once
+CLAIM_PENDING_SQL = """
+    SELECT id, file_name, message_key, payload FROM cdr_outbox
+    WHERE sent_at IS NULL
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+MARK_SENT_SQL = "UPDATE cdr_outbox SET sent_at = now() WHERE id = ANY(%s)"
+PURGE_SENT_SQL = "DELETE FROM cdr_outbox WHERE sent_at < now() - %s * interval '1 hour'"
+
+
+def create_outbox_table(conn=None):
+    """Create cdr_outbox and its indexes if they do not exist."""
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            for statement in OUTBOX_DDL:
+                cur.execute(statement)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def claim_pending(cur, limit):
+    """Lock and return up to limit unsent rows, oldest first.
+
+    Rows are (id, file_name, message_key, payload) tuples.
+    """
+    cur.execute(CLAIM_PENDING_SQL, (limit,))
+    return cur.fetchall()
+
+
+def mark_sent(cur, ids):
+    if ids:
+        cur.execute(MARK_SENT_SQL, (list(ids),))
+
+
+def purge_sent(retention_hours, conn=None):
+    """Delete messages sent more than retention_hours ago; returns how many."""
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(PURGE_SENT_SQL, (retention_hours,))
+            deleted = cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    if deleted:
+        logger.info(f"Purged {deleted} sent messages from cdr_outbox")
+    return deleted
+
+
+def pending_count(conn=None):
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT count(*) FROM cdr_outbox WHERE sent_at IS NULL")
+            return cur.fetchone()[0]
+        finally:
+            cur.close()
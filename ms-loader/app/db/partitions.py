@@ -0,0 +1,279 @@
+import threading
+from datetime import date, timedelta
+
+from app.config.logger import logger
+from app.db.database import pooled_connection
+
+PERIODS = ("daily", "monthly")
+
+PARTITIONED_CDRS_DDL = """
+    CREATE TABLE cdrs (
+        id BIGSERIAL,
+        source TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        starttime TIMESTAMP NOT NULL,
+        service TEXT NOT NULL,
+        usage DOUBLE PRECISION NOT NULL,
+        file_name TEXT,
+        PRIMARY KEY (id, starttime)
+    ) PARTITION BY RANGE (starttime)
+"""
+# Holds the rows of periods with no partition, e.g. back-dated records
+DEFAULT_PARTITION = "cdrs_default"
+DEFAULT_PARTITION_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF cdrs DEFAULT"
+)
+# Rows of a new partition's range that landed in the default partition before it existed
+MOVE_FROM_DEFAULT_SQL = """
+    WITH moved AS (
+        DELETE FROM cdrs_default WHERE starttime >= %s AND starttime < %s RETURNING *
+    )
+    INSERT INTO {table} SELECT * FROM moved
+"""
+# Advisory lock key serialising partition DDL between loaders ("cdrs" in ASCII)
+PARTITION_LOCK_KEY = 0x63647273
+# Names of the partitions of cdrs; their ranges follow from the names
+LIST_PARTITIONS_SQL = """
+    SELECT c.relname FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'cdrs'::regclass
+"""
+
+# Partitions known to exist, which loads write to directly
+_known = set()
+_known_lock = threading.Lock()
+# Period loads are routed by, once cdrs is confirmed to be partitioned
+_active_period = None
+
+
+def period_start(day, period):
+    """First day of the daily or monthly period containing day (a date or datetime)."""
+    if period == "monthly":
+        return date(day.year, day.month, 1)
+    return date(day.year, day.month, day.day)
+
+
+def next_period(start, period):
+    if period == "monthly":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def partition_name(start, period):
+    """cdrs_p20240115 for a daily partition, cdrs_p202401 for a monthly one."""
+    return f"cdrs_p{start:%Y%m}" if period == "monthly" else f"cdrs_p{start:%Y%m%d}"
+
+
+def partition_start(name):
+    """Inverse of partition_name: (start, period), or None for other tables."""
+    digits = name[len("cdrs_p"):]
+    if not name.startswith("cdrs_p") or not digits.isdigit():
+        return None
+    if len(digits) == 6:
+        return date(int(digits[:4]), int(digits[4:]), 1), "monthly"
+    if len(digits) == 8:
+        return date(int(digits[:4]), int(digits[4:6]), int(digits[6:])), "daily"
+    return None
+
+
+def partition_ddl(start, period):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start, period)} PARTITION OF cdrs "
+        f"FOR VALUES FROM ('{start}') TO ('{next_period(start, period)}')"
+    )
+
+
+def route_rows(rows, period):
+    """Group (source, destination, starttime, ...) rows by their period's start."""
+    routed = {}
+    for row in rows:
+        start = period_start(row[2], period)
+        partition_rows = routed.get(start)
+        if partition_rows is None:
+            routed[start] = partition_rows = []
+        partition_rows.append(row)
+    return routed
+
+
+def partition_tables(rows, period):
+    """Group (source, destination, starttime, ...) rows by the table to write them to.
+
+    Rows go straight to their partition when it is known to exist. The rest
+    go through cdrs, which routes them to a partition created by another
+    loader or to the default partition; loads never create partitions.
+    """
+    tables = {}
+    for start, partition_rows in route_rows(rows, period).items():
+        table = partition_name(start, period)
+        if table not in _known:
+            table = "cdrs"
+        tables.setdefault(table, []).extend(partition_rows)
+    return tables
+
+
+def lock_partitions(cur):
+    """Hold the partition DDL lock until cur's transaction ends."""
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (PARTITION_LOCK_KEY,))
+
+
+def create_partition(cur, start, period):
+    """Create the partition for start on cur, moving its rows out of cdrs_default.
+
+    PostgreSQL refuses to add a partition whose range has rows in the
+    default partition, so those are moved into the new table before it is
+    attached.
+    """
+    name = partition_name(start, period)
+    end = next_period(start, period)
+    cur.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+        "WHERE starttime >= %s AND starttime < %s)",
+        (start, end),
+    )
+    if not cur.fetchone()[0]:
+        cur.execute(partition_ddl(start, period))
+        return
+    cur.execute(
+        f"CREATE TABLE {name} (LIKE cdrs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cur.execute(MOVE_FROM_DEFAULT_SQL.format(table=name), (start, end))
+    logger.info(f"Moved {cur.rowcount} rows from {DEFAULT_PARTITION} into {name}")
+    cur.execute(
+        f"ALTER TABLE cdrs ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+
+
+def create_partitioned_table(conn=None):
+    """Create cdrs partitioned by starttime if it does not exist.
+
+    Returns False when cdrs already exists as a plain table: moving its rows
+    into partitions is a migration the loader does not attempt.
+    """
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('cdrs')")
+            row = cur.fetchone()
+            if row is None:
+                cur.execute(PARTITIONED_CDRS_DDL)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    if row is None:
+        logger.info("Created cdrs partitioned by starttime")
+    elif row[0] != "p":
+        logger.warning(
+            "cdrs is not a partitioned table; loads will not be routed to partitions"
+        )
+        return False
+    return True
+
+
+def create_partitions(period, ahead, today=None, conn=None):
+    """Create the default partition and those for the current and the ahead periods.
+
+    Loaders serialise on an advisory lock, so concurrent runs never race
+    on the same DDL. Every existing partition of period is then known to
+    loads, including older ones created before a restart.
+    """
+    start = period_start(today or date.today(), period)
+    starts = [start]
+    for _ in range(ahead):
+        start = next_period(start, period)
+        starts.append(start)
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            lock_partitions(cur)
+            cur.execute(DEFAULT_PARTITION_DDL)
+            cur.execute(LIST_PARTITIONS_SQL)
+            existing = {name for (name,) in cur.fetchall()}
+            for start in starts:
+                if partition_name(start, period) not in existing:
+                    create_partition(cur, start, period)
+                    existing.add(partition_name(start, period))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    with _known_lock:
+        for name in existing:
+            parsed = partition_start(name)
+            if parsed and parsed[1] == period:
+                _known.add(name)
+    return starts
+
+
+def drop_expired_partitions(
+    period, retention, today=None, conn=None, purge_default=False
+):
+    """Drop the partitions that ended before the last retention periods; returns them.
+
+    Dropping a partition removes its rows without the cost of a DELETE.
+    retention counts the current period, so 1 keeps only the current one.
+    With purge_default, rows of the default partition older than that are
+    deleted too; that DELETE scans all of cdrs_default under the lock.
+    """
+    cutoff = period_start(today or date.today(), period)
+    for _ in range(retention - 1):
+        cutoff = period_start(cutoff - timedelta(days=1), period)
+
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            lock_partitions(cur)
+            cur.execute(LIST_PARTITIONS_SQL)
+            expired = []
+            for (name,) in cur.fetchall():
+                parsed = partition_start(name)
+                if parsed and next_period(*parsed) <= cutoff:
+                    expired.append(name)
+            for name in sorted(expired):
+                cur.execute(f"DROP TABLE {name}")
+            if purge_default:
+                cur.execute(
+                    f"DELETE FROM {DEFAULT_PARTITION} WHERE starttime < %s", (cutoff,)
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    with _known_lock:
+        _known.difference_update(expired)
+    if expired:
+        logger.info(
+            f"Dropped {len(expired)} cdrs partitions older than {cutoff}: "
+            f"{', '.join(sorted(expired))}"
+        )
+    return sorted(expired)
+
+
+def start_partitioning(period, ahead, conn=None):
+    """Set up cdrs for period partitions and route later loads to them.
+
+    Returns False, leaving loads unrouted, when cdrs is a plain table.
+    """
+    global _active_period
+    if period not in PERIODS:
+        raise ValueError(
+            f"Unknown partition period: {period}. Must be one of: {', '.join(PERIODS)}"
+        )
+    if not create_partitioned_table(conn):
+        return False
+    create_partitions(period, ahead, conn=conn)
+    _active_period = period
+    return True
+
+
+def active_period():
+    """The period loads are routed by, or None when partitioning is off."""
+    return _active_period
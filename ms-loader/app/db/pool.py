@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.pool import PoolError
+from app.config.logger import logger
+
+
+def check_connection(conn):
+    """Return True if the connection is open and answers a trivial query."""
+    if conn.closed:
+        return False
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT 1")
+        finally:
+            cur.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error as e:
+        logger.warning(f"PostgreSQL connection failed health check: {e}")
+        return False
+
+
+class ConnectionPool:
+    """Thread-safe pool of PostgreSQL connections shared across the loader.
+
+    Callers block for up to ``timeout`` seconds when all ``max_size``
+    connections are checked out. Idle connections that have not been used
+    for ``health_check_interval`` seconds are checked before being handed out.
+    """
+
+    def __init__(self, connection_factory, min_size=1, max_size=10, timeout=30.0,
+                 health_check_interval=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+        self._factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+    def fill(self):
+        """Open connections until the pool holds at least min_size."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                logger.warning(f"Could not pre-open PostgreSQL connection: {e}")
+                return
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self):
+        """Check out a connection, waiting if the pool is exhausted."""
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._size >= self.max_size:
+                        self._stats["timeouts"] += 1
+                        self._stats["waits"] += 1
+                        raise PoolError(
+                            f"timed out after {self.timeout}s waiting for a connection"
+                        )
+            waited_for = time.monotonic() - started
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_seconds"] += waited_for
+                self._stats["max_wait_seconds"] = max(
+                    self._stats["max_wait_seconds"], waited_for
+                )
+
+        if conn is not None and self._needs_check(conn, last_used) \
+                and not check_connection(conn):
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self._close(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, closing it if it is broken."""
+        if not discard and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        if discard or conn.closed or self._closed:
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block."""
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            self.putconn(conn, discard=bool(conn.closed))
+            raise
+        else:
+            self.putconn(conn)
+
+    def health_check(self):
+        """Check every idle connection, dropping the broken ones."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        healthy = 0
+        for conn, _ in idle:
+            if check_connection(conn):
+                healthy += 1
+                with self._cond:
+                    self._idle.append((conn, time.monotonic()))
+                    self._cond.notify()
+            else:
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                self.putconn(conn, discard=True)
+        self.fill()
+        return healthy == len(idle)
+
+    def stats(self):
+        """Return a snapshot of pool usage counters."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["size"] = self._size
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._size - len(self._idle)
+            snapshot["max_size"] = self.max_size
+        return snapshot
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _needs_check(self, conn, last_used):
+        if conn.closed:
+            return True
+        return time.monotonic() - last_used >= self.health_check_interval
+
+    def _open(self):
+        conn = self._factory()
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["connections_closed"] += 1
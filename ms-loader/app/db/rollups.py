@@ -0,0 +1,243 @@
+import threading
+
+from app.config import POSTGRES
+from app.config.logger import logger
+from app.db.database import pooled_connection
+
+# Daily usage totals kept up to date by every load, so reports need not scan cdrs
+ROLLUP_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS cdr_daily_source_usage (
+        day DATE NOT NULL,
+        source TEXT NOT NULL,
+        service TEXT NOT NULL,
+        total_usage DOUBLE PRECISION NOT NULL,
+        record_count BIGINT NOT NULL,
+        PRIMARY KEY (day, source, service)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cdr_daily_destination_usage (
+        day DATE NOT NULL,
+        destination TEXT NOT NULL,
+        service TEXT NOT NULL,
+        total_usage DOUBLE PRECISION NOT NULL,
+        record_count BIGINT NOT NULL,
+        PRIMARY KEY (day, destination, service)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cdr_daily_service_usage (
+        day DATE NOT NULL,
+        service TEXT NOT NULL,
+        total_usage DOUBLE PRECISION NOT NULL,
+        record_count BIGINT NOT NULL,
+        PRIMARY KEY (day, service)
+    )
+    """,
+    # cdrs ids still to be added to the rollups, from next_id to last_id
+    """
+    CREATE TABLE IF NOT EXISTS cdr_rollup_backfill (
+        next_id BIGINT NOT NULL,
+        last_id BIGINT NOT NULL
+    )
+    """,
+)
+
+# One statement per table: the keys and totals go in as parallel arrays
+UPSERT_SOURCE_SQL = """
+    INSERT INTO cdr_daily_source_usage AS t
+        (day, source, service, total_usage, record_count)
+    SELECT * FROM unnest(
+        %s::date[], %s::text[], %s::text[], %s::double precision[], %s::bigint[]
+    )
+    ON CONFLICT (day, source, service) DO UPDATE
+    SET total_usage = t.total_usage + EXCLUDED.total_usage,
+        record_count = t.record_count + EXCLUDED.record_count
+"""
+UPSERT_DESTINATION_SQL = """
+    INSERT INTO cdr_daily_destination_usage AS t
+        (day, destination, service, total_usage, record_count)
+    SELECT * FROM unnest(
+        %s::date[], %s::text[], %s::text[], %s::double precision[], %s::bigint[]
+    )
+    ON CONFLICT (day, destination, service) DO UPDATE
+    SET total_usage = t.total_usage + EXCLUDED.total_usage,
+        record_count = t.record_count + EXCLUDED.record_count
+"""
+UPSERT_SERVICE_SQL = """
+    INSERT INTO cdr_daily_service_usage AS t (day, service, total_usage, record_count)
+    SELECT * FROM unnest(%s::date[], %s::text[], %s::double precision[], %s::bigint[])
+    ON CONFLICT (day, service) DO UPDATE
+    SET total_usage = t.total_usage + EXCLUDED.total_usage,
+        record_count = t.record_count + EXCLUDED.record_count
+"""
+
+
+# Rows loaded before the rollups existed are added one id range at a time
+BACKFILL_SQL = (
+    """
+    INSERT INTO cdr_daily_source_usage AS t
+        (day, source, service, total_usage, record_count)
+    SELECT starttime::date, source, service, sum(usage), count(*) FROM cdrs
+    WHERE id BETWEEN %s AND %s GROUP BY 1, 2, 3
+    ON CONFLICT (day, source, service) DO UPDATE
+    SET total_usage = t.total_usage + EXCLUDED.total_usage,
+        record_count = t.record_count + EXCLUDED.record_count
+    """,
+    """
+    INSERT INTO cdr_daily_destination_usage AS t
+        (day, destination, service, total_usage, record_count)
+    SELECT starttime::date, destination, service, sum(usage), count(*) FROM cdrs
+    WHERE id BETWEEN %s AND %s GROUP BY 1, 2, 3
+    ON CONFLICT (day, destination, service) DO UPDATE
+    SET total_usage = t.total_usage + EXCLUDED.total_usage,
+        record_count = t.record_count + EXCLUDED.record_count
+    """,
+    """
+    INSERT INTO cdr_daily_service_usage AS t (day, service, total_usage, record_count)
+    SELECT starttime::date, service, sum(usage), count(*) FROM cdrs
+    WHERE id BETWEEN %s AND %s GROUP BY 1, 2
+    ON CONFLICT (day, service) DO UPDATE
+    SET total_usage = t.total_usage + EXCLUDED.total_usage,
+        record_count = t.record_count + EXCLUDED.record_count
+    """,
+)
+BACKFILL_RANGE_SQL = """
+    INSERT INTO cdr_rollup_backfill (next_id, last_id)
+    SELECT min(id), max(id) FROM cdrs HAVING count(*) > 0
+"""
+
+
+def create_rollup_tables(conn=None):
+    """Create the daily usage rollup tables if they do not exist.
+
+    When they are new, the ids of the rows already in cdrs are recorded in
+    cdr_rollup_backfill for backfill_rollups; loads from now on add their
+    own rows. Returns whether a backfill is pending.
+    """
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT to_regclass('cdr_daily_service_usage') IS NULL")
+            created = cur.fetchone()[0]
+            for statement in ROLLUP_DDL:
+                cur.execute(statement)
+            if created and _table_exists(cur, "cdrs"):
+                cur.execute(BACKFILL_RANGE_SQL)
+            cur.execute("SELECT count(*) > 0 FROM cdr_rollup_backfill")
+            pending = cur.fetchone()[0]
+            conn.commit()
+            return pending
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def backfill_rollups(batch_size=None, conn=None):
+    """Add the cdrs rows recorded in cdr_rollup_backfill to the rollups.
+
+    Each batch of batch_size ids is summed and committed in a transaction
+    of its own, together with the progress, so the backfill never holds
+    locks for long and resumes where it stopped after a restart. Returns
+    the number of batches run.
+    """
+    batch_size = batch_size or POSTGRES["rollup_backfill_batch"]
+    batches = 0
+    with pooled_connection(conn) as conn:
+        cur = conn.cursor()
+        try:
+            while True:
+                cur.execute(
+                    "SELECT next_id, last_id FROM cdr_rollup_backfill FOR UPDATE"
+                )
+                progress = cur.fetchone()
+                if progress is None:
+                    conn.commit()
+                    break
+                next_id, last_id = progress
+                if next_id > last_id:
+                    cur.execute("DELETE FROM cdr_rollup_backfill")
+                    conn.commit()
+                    logger.info(
+                        f"Backfilled the daily usage rollups in {batches} batches"
+                    )
+                    break
+                upper = min(next_id + batch_size - 1, last_id)
+                for statement in BACKFILL_SQL:
+                    cur.execute(statement, (next_id, upper))
+                cur.execute("UPDATE cdr_rollup_backfill SET next_id = %s", (upper + 1,))
+                conn.commit()
+                batches += 1
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return batches
+
+
+def start_rollup_backfill():
+    """Run backfill_rollups in a background thread; returns the thread."""
+    def backfill():
+        try:
+            backfill_rollups()
+        except Exception as e:
+            logger.error(f"Rollup backfill stopped, it resumes at the next start: {e}")
+
+    logger.info("Backfilling the daily usage rollups from cdrs in the background")
+    thread = threading.Thread(target=backfill, name="rollup-backfill", daemon=True)
+    thread.start()
+    return thread
+
+
+def _table_exists(cur, name):
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    return cur.fetchone()[0]
+
+
+def _add(totals, key, usage):
+    total = totals.get(key)
+    if total is None:
+        totals[key] = [usage, 1]
+    else:
+        total[0] += usage
+        total[1] += 1
+
+
+def aggregate(rows):
+    """Sum (source, destination, starttime, service, usage, ...) rows by day.
+
+    Returns (by_source, by_destination, by_service) dicts mapping
+    (day, source, service), (day, destination, service) and (day, service)
+    to [total_usage, record_count].
+    """
+    by_source, by_destination, by_service = {}, {}, {}
+    for source, destination, starttime, service, usage, *_ in rows:
+        day = starttime.date()
+        usage = float(usage)
+        _add(by_source, (day, source, service), usage)
+        _add(by_destination, (day, destination, service), usage)
+        _add(by_service, (day, service), usage)
+    return by_source, by_destination, by_service
+
+
+def _upsert(cur, sql, totals):
+    if not totals:
+        return
+    # Sorted so concurrent loads lock shared rollup rows in the same order
+    keys = sorted(totals)
+    columns = [list(column) for column in zip(*keys)]
+    columns.append([totals[key][0] for key in keys])
+    columns.append([totals[key][1] for key in keys])
+    cur.execute(sql, columns)
+
+
+def write_rollups(cur, rows):
+    """Add rows' usage to the daily rollups on cur, in the caller's transaction."""
+    by_source, by_destination, by_service = aggregate(rows)
+    _upsert(cur, UPSERT_SOURCE_SQL, by_source)
+    _upsert(cur, UPSERT_DESTINATION_SQL, by_destination)
+    _upsert(cur, UPSERT_SERVICE_SQL, by_service)
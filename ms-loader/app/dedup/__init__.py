@@ -0,0 +1,2 @@
+from .bloom import BloomFilter
+from .deduplicator import Deduplicator, fingerprint, get_deduplicator, uses_dedup
@@ -0,0 +1,76 @@
+import math
+import os
+import struct
+
+# Magic, bit count, hash count, capacity, items added
+_HEADER = struct.Struct("<8sQIQQ")
+_MAGIC = b"CDRBLOOM"
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over 16-byte fingerprints.
+
+    A miss means the fingerprint was never added; a hit means it probably
+    was, with error_rate false positives once capacity items are in. The
+    k bit positions come from the two 64-bit halves of the fingerprint
+    (double hashing), so no further hashing is done here.
+    """
+
+    def __init__(self, capacity, error_rate=0.001, bit_count=None, hash_count=None):
+        self.capacity = capacity
+        if bit_count is None:
+            bit_count = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        if hash_count is None:
+            hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fingerprint):
+        h1 = int.from_bytes(fingerprint[:8], "little")
+        h2 = int.from_bytes(fingerprint[8:16], "little") | 1
+        bit_count = self.bit_count
+        return [(h1 + i * h2) % bit_count for i in range(self.hash_count)]
+
+    def add(self, fingerprint):
+        bits = self.bits
+        for position in self._positions(fingerprint):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, fingerprint):
+        bits = self.bits
+        for position in self._positions(fingerprint):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path):
+        """Write the filter to path, replacing it atomically."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(
+                _MAGIC, self.bit_count, self.hash_count, self.capacity, self.count
+            ))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a filter written by save."""
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+            magic, bit_count, hash_count, capacity, count = header
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a saved Bloom filter")
+            bloom = cls(capacity, bit_count=bit_count, hash_count=hash_count)
+            bits = f.read()
+        if len(bits) != len(bloom.bits):
+            raise ValueError(f"{path} is truncated")
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        return bloom
@@ -0,0 +1,183 @@
+import os
+import threading
+from hashlib import blake2b
+
+from app.config import LOADER, POSTGRES
+from app.config.logger import logger
+from app.db.database import cdr_rows, pooled_connection
+from app.db.fingerprints import (
+    existing_fingerprints,
+    fingerprint_count,
+    insert_fingerprints,
+    iter_fingerprints,
+)
+from app.dedup.bloom import BloomFilter
+from app.metrics.pipeline import RECORDS, file_format
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def fingerprint(source, destination, starttime, service, usage):
+    """16-byte digest identifying a CDR by its values, whatever file it came in.
+
+    Values are normalised first: source, destination and service lose
+    surrounding whitespace and the service is upper-cased, the way
+    validation reads it, so "voice" and " VOICE" give the same fingerprint.
+    """
+    key = "\x1f".join((
+        source.strip(),
+        destination.strip(),
+        f"{starttime:%Y-%m-%dT%H:%M:%S.%f}",
+        service.strip().upper(),
+        repr(float(usage)),
+    ))
+    return blake2b(key.encode(), digest_size=16).digest()
+
+
+def select_records(records, indexes):
+    """Return the records at indexes, in the container type records came in."""
+    if hasattr(records, "to_csv"):
+        return records.iloc[indexes]
+    if hasattr(records, "select"):
+        return records.select(indexes)
+    return [records[index] for index in indexes]
+
+
+class Deduplicator:
+    """Drop records that were already loaded, whatever file they came in.
+
+    Every loaded record's fingerprint is kept in cdr_fingerprints and in a
+    Bloom filter held in memory and saved to filter_path. Records the filter
+    has never seen are new and skip the database check; only filter hits
+    are looked up, in one query per batch. Inserting the new fingerprints
+    under the table's unique key settles the rest: a stale filter or
+    another loader can only cause extra lookups, never a duplicate row.
+    """
+
+    def __init__(self, filter_path=None, capacity=None, error_rate=None):
+        if filter_path is None:
+            filter_path = LOADER["dedup_filter_path"]
+        self.filter_path = filter_path
+        self.capacity = capacity or LOADER["dedup_capacity"]
+        self.error_rate = error_rate or LOADER["dedup_error_rate"]
+        self._bloom = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "filter_hits": 0, "duplicates": 0}
+
+    def load_filter(self, conn=None):
+        """Read the saved filter, or rebuild it from cdr_fingerprints."""
+        if self.filter_path and os.path.exists(self.filter_path):
+            try:
+                bloom = BloomFilter.load(self.filter_path)
+                with self._lock:
+                    self._bloom = bloom
+                logger.info(
+                    f"Loaded dedup filter with {len(bloom)} fingerprints "
+                    f"from {self.filter_path}"
+                )
+                return bloom
+            except (OSError, ValueError) as e:
+                logger.warning(
+                    f"Could not read dedup filter {self.filter_path}, "
+                    f"rebuilding it: {e}"
+                )
+
+        with pooled_connection(conn) as conn:
+            stored = fingerprint_count(conn)
+            bloom = BloomFilter(max(self.capacity, 2 * stored), self.error_rate)
+            for fp in iter_fingerprints(conn):
+                bloom.add(fp)
+            conn.rollback()
+        with self._lock:
+            self._bloom = bloom
+            self._dirty = True
+        logger.info(f"Rebuilt dedup filter from {len(bloom)} stored fingerprints")
+        self.save()
+        return bloom
+
+    def _filter(self):
+        # Without a loaded filter every record looks new;
+        # the unique key still catches duplicates
+        if self._bloom is None:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+        return self._bloom
+
+    def filter_new(self, cur, records):
+        """Record the fingerprints of records on cur; returns those not loaded before.
+
+        Runs in the caller's transaction, so the fingerprints commit or roll
+        back with the rows. Duplicates within records are dropped too.
+        """
+        rows = list(cdr_rows(records))
+        if not rows:
+            return records
+        file_name = rows[0][5]
+        fingerprints = {}
+        for index, row in enumerate(rows):
+            fingerprints.setdefault(fingerprint(*row[:5]), index)
+
+        with self._lock:
+            bloom = self._filter()
+            hits = [fp for fp in fingerprints if fp in bloom]
+        seen = existing_fingerprints(cur, hits)
+        candidates = [fp for fp in fingerprints if fp not in seen]
+        new = insert_fingerprints(
+            cur, candidates, file_name, POSTGRES["copy_batch_size"]
+        )
+
+        with self._lock:
+            for fp in new:
+                bloom.add(fp)
+            self._dirty = self._dirty or bool(new)
+            if len(bloom) > bloom.capacity and len(bloom) - len(new) <= bloom.capacity:
+                logger.warning(
+                    "Dedup filter holds more than its capacity of "
+                    f"{bloom.capacity} fingerprints; "
+                    f"raise DEDUP_CAPACITY and delete {self.filter_path} to rebuild it"
+                )
+            duplicates = len(rows) - len(new)
+            self._stats["checked"] += len(rows)
+            self._stats["filter_hits"] += len(hits)
+            self._stats["duplicates"] += duplicates
+
+        if not duplicates:
+            return records
+        RECORDS.labels(format=file_format(file_name), outcome="duplicate").inc(
+            duplicates
+        )
+        logger.info(
+            f"Skipping {duplicates} of {len(rows)} records from {file_name} "
+            "as already loaded"
+        )
+        return select_records(records, sorted(fingerprints[fp] for fp in new))
+
+    def save(self):
+        """Write the filter to filter_path if it changed since the last save."""
+        with self._lock:
+            if not self.filter_path or self._bloom is None or not self._dirty:
+                return False
+            self._bloom.save(self.filter_path)
+            self._dirty = False
+        return True
+
+    def stats(self):
+        with self._lock:
+            fingerprints = len(self._bloom) if self._bloom else 0
+            return dict(self._stats, fingerprints=fingerprints)
+
+
+def uses_dedup(dedup=None):
+    """Whether loads drop records already loaded from another file (DEDUP_RECORDS)."""
+    return LOADER["dedup_records"] if dedup is None else dedup
+
+
+def get_deduplicator():
+    """Return the loader-wide deduplicator; its filter is loaded by load_filter."""
+    global _deduplicator
+    if _deduplicator is None:
+        with _deduplicator_lock:
+            if _deduplicator is None:
+                _deduplicator = Deduplicator()
+    return _deduplicator
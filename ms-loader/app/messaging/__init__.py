@@ -1 +1,8 @@
-from .kafka_producer import publish_to_kafka
\ No newline at end of file
+from .kafka_producer import (
+    publish_to_kafka,
+    get_producer,
+    flush_producer,
+    close_producer,
+    DeliveryTracker
+)
+from .outbox_relay import OutboxRelay, get_relay
@@ -1,10 +1,16 @@
 import json
+import threading
+import time
 from datetime import datetime
 
 from confluent_kafka import Producer
 
 from app.config import KAFKA
 from app.config.logger import logger
+from app.metrics.pipeline import RECORDS, batch_format, file_format, observe_stage
+
+_producer = None
+_producer_lock = threading.Lock()
 
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -14,21 +20,130 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def publish_to_kafka(records):
-    """Publish records to Kafka with proper datetime handling"""
+def encode_record(record):
+    """Return the JSON message value for a record."""
+    return json.dumps(record, cls=DateTimeEncoder)
+
+
+class DeliveryTracker:
+    """Count Kafka delivery reports (acks and failures) per file."""
+
+    def __init__(self):
+        self.counts = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def callback(self, file_name):
+        """Return the delivery callback for records of file_name."""
+        on_delivery = self._callbacks.get(file_name)
+        if on_delivery is None:
+            counts = self.counts.setdefault(file_name, {"acked": 0, "failed": 0})
+
+            def on_delivery(err, msg):
+                with self._lock:
+                    if err is None:
+                        counts["acked"] += 1
+                    else:
+                        if not counts["failed"]:
+                            logger.error(
+                                f"Kafka delivery failed for {file_name}: {err}"
+                            )
+                        counts["failed"] += 1
+
+            self._callbacks[file_name] = on_delivery
+        return on_delivery
+
+    @property
+    def failed(self):
+        return sum(counts["failed"] for counts in self.counts.values())
+
+
+def producer_config():
+    """Build the confluent_kafka producer configuration from KAFKA settings."""
+    return {
+        "bootstrap.servers": KAFKA["bootstrap_servers"],
+        "linger.ms": KAFKA["linger_ms"],
+        "batch.size": KAFKA["batch_size"],
+        "compression.type": KAFKA["compression"],
+        "enable.idempotence": KAFKA["idempotence"],
+        "queue.buffering.max.messages": KAFKA["queue_max_messages"],
+    }
+
+
+def get_producer():
+    """Return the long-lived producer shared by the loader."""
+    global _producer
+    if _producer is None:
+        with _producer_lock:
+            if _producer is None:
+                logger.info(f"Connecting to Kafka at {KAFKA['bootstrap_servers']}")
+                _producer = Producer(producer_config())
+    return _producer
+
+
+def flush_producer(producer=None):
+    """Wait for outstanding deliveries; returns the number still queued."""
+    producer = producer or get_producer()
+    remaining = producer.flush(KAFKA["flush_timeout"])
+    if remaining:
+        logger.error(f"{remaining} Kafka messages still undelivered after flush")
+    return remaining
+
+
+def close_producer():
+    global _producer
+    with _producer_lock:
+        if _producer is not None:
+            flush_producer(_producer)
+            _producer = None
+
+
+def produce(producer, topic, key, value, on_delivery):
+    """Produce one message, blocking while the local queue is full."""
+    while True:
+        try:
+            producer.produce(topic, key=key, value=value, on_delivery=on_delivery)
+            break
+        except BufferError:
+            producer.poll(0.1)
+    producer.poll(0)
+
+
+def publish_to_kafka(records, flush=True, tracker=None, producer=None):
+    """Publish records to Kafka with proper datetime handling.
+
+    Returns per-file delivery counts. With flush=False the counts fill in as
+    later calls poll or flush the shared producer.
+    """
+    tracker = tracker or DeliveryTracker()
     if not records:
-        return
+        return tracker.counts
 
-    p = Producer({"bootstrap.servers": KAFKA["bootstrap_servers"]})
-    logger.info(f"Connecting to Kafka at {KAFKA['bootstrap_servers']}")
+    producer = producer or get_producer()
+    topic = KAFKA["topic"]
+    started = time.perf_counter()
+    produced = {}
 
     try:
         for record in records:
-            json_data = json.dumps(record, cls=DateTimeEncoder)
-            logger.debug(f"Publishing record to Kafka: {json_data}")
-            p.produce(KAFKA["topic"], key=str(record["source"]), value=json_data)
-            logger.info(f"Record published to Kafka topic {KAFKA['topic']}: {json_data}")
-        p.flush()
-        logger.info("Records published to Kafka successfully")
+            json_data = encode_record(record)
+            file_name = record.get("file_name")
+            produce(
+                producer,
+                topic,
+                str(record["source"]),
+                json_data,
+                tracker.callback(file_name),
+            )
+            produced[file_name] = produced.get(file_name, 0) + 1
+        if flush:
+            flush_producer(producer)
+            logger.info(f"Records published to Kafka topic {topic}: {tracker.counts}")
     except Exception as e:
         logger.error(f"Error publishing to Kafka: {str(e)}")
+
+    elapsed = time.perf_counter() - started
+    observe_stage("kafka_publish", batch_format(produced), elapsed)
+    for file_name, count in produced.items():
+        RECORDS.labels(format=file_format(file_name), outcome="produced").inc(count)
+    return tracker.counts
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from app.config import KAFKA
+from app.config.logger import logger
+from app.db.database import pooled_connection
+from app.db.outbox import claim_pending, mark_sent
+from app.messaging.kafka_producer import flush_producer, get_producer, produce
+from app.metrics.pipeline import RECORDS, batch_format, file_format, observe_stage
+
+_relay = None
+_relay_lock = threading.Lock()
+
+
+class OutboxRelay:
+    """Publish cdr_outbox messages to Kafka in batches and mark them as sent.
+
+    Each pass locks up to batch_size unsent messages, produces them, waits
+    for their delivery reports and marks the acknowledged ones as sent in
+    the same transaction. Messages that were not acknowledged stay pending
+    and are retried on the next pass, so delivery is at least once.
+    """
+
+    def __init__(self, batch_size=None, interval=None, topic=None, producer=None):
+        self.batch_size = batch_size or KAFKA["outbox_batch_size"]
+        self.interval = KAFKA["outbox_poll_interval"] if interval is None else interval
+        self.topic = topic or KAFKA["topic"]
+        self._producer = producer
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"passes": 0, "sent": 0, "failed": 0, "errors": 0}
+
+    def relay_once(self, conn=None):
+        """Relay one batch; returns the number of messages marked as sent."""
+        producer = self._producer or get_producer()
+        with pooled_connection(conn) as conn:
+            cur = conn.cursor()
+            try:
+                rows = claim_pending(cur, self.batch_size)
+                if not rows:
+                    conn.rollback()
+                    return 0
+
+                started = time.perf_counter()
+                delivered = []
+                failed = []
+                produced = {}
+
+                def on_delivery(outbox_id):
+                    def callback(err, msg):
+                        (delivered if err is None else failed).append(outbox_id)
+                    return callback
+
+                for outbox_id, file_name, key, payload in rows:
+                    produce(producer, self.topic, key, payload, on_delivery(outbox_id))
+                    produced[file_name] = produced.get(file_name, 0) + 1
+                flush_producer(producer)
+                elapsed = time.perf_counter() - started
+                observe_stage("kafka_publish", batch_format(produced), elapsed)
+
+                mark_sent(cur, delivered)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+        for file_name, count in produced.items():
+            RECORDS.labels(format=file_format(file_name), outcome="produced").inc(
+                count
+            )
+        with self._stats_lock:
+            self._stats["passes"] += 1
+            self._stats["sent"] += len(delivered)
+            self._stats["failed"] += len(rows) - len(delivered)
+        if failed:
+            logger.error(
+                f"{len(failed)} outbox messages failed delivery to {self.topic}; "
+                "they will be retried"
+            )
+        logger.debug(
+            f"Relayed {len(delivered)} of {len(rows)} outbox messages to {self.topic}"
+        )
+        return len(delivered)
+
+    def wake(self):
+        """Start the next pass now instead of after the poll interval."""
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="outbox-relay", daemon=True
+            )
+            self._thread.start()
+            logger.info(
+                f"Started outbox relay to Kafka topic {self.topic} "
+                f"(batch size {self.batch_size})"
+            )
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                sent = self.relay_once()
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                logger.error(f"Outbox relay pass failed: {str(e)}")
+                sent = 0
+            # A full batch means more are probably waiting
+            if sent < self.batch_size:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+def get_relay():
+    """Return the loader-wide outbox relay (not started)."""
+    global _relay
+    if _relay is None:
+        with _relay_lock:
+            if _relay is None:
+                _relay = OutboxRelay()
+    return _relay
@@ -0,0 +1,14 @@
+from .server import start_metrics_server
+from .pipeline import (
+    STAGE_SECONDS,
+    CYCLE_SECONDS,
+    RECORDS,
+    REJECTS,
+    BYTES_READ,
+    QUEUE_DEPTH,
+    POOL_CONNECTIONS,
+    batch_format,
+    file_format,
+    observe_parsed_file,
+    observe_stage,
+)
@@ -0,0 +1,88 @@
+import os
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Files and cycles can take minutes, past the prometheus_client default buckets
+BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+
+STAGE_SECONDS = Histogram(
+    "cdr_stage_seconds",
+    "Seconds spent in a pipeline stage: per file for parse, validate, transform "
+    "and db_write; per publish call or relay pass for kafka_publish",
+    ["stage", "format"],
+    buckets=BUCKETS,
+)
+CYCLE_SECONDS = Histogram(
+    "cdr_cycle_seconds", "Duration of one scheduler cycle", ["mode"], buckets=BUCKETS
+)
+RECORDS = Counter(
+    "cdr_records_total",
+    "Records by outcome: valid or invalid when parsed, duplicate or loaded "
+    "into PostgreSQL, produced to Kafka",
+    ["format", "outcome"],
+)
+REJECTS = Counter(
+    "cdr_rejects_total",
+    "Validation errors of rejected records by reason",
+    ["format", "reason"],
+)
+BYTES_READ = Counter(
+    "cdr_input_bytes_total", "Bytes of input files read, as stored on disk", ["format"]
+)
+QUEUE_DEPTH = Gauge("cdr_work_queue_depth", "Files waiting in the work queue")
+POOL_CONNECTIONS = Gauge(
+    "cdr_db_pool_connections", "PostgreSQL pool connections by state", ["state"]
+)
+
+# ParseStats timing field -> stage
+PARSE_STAGES = (
+    ("read_seconds", "parse"),
+    ("validate_seconds", "validate"),
+    ("transform_seconds", "transform"),
+)
+
+
+def file_format(file_name):
+    """Return the format label of a file name: its extension without the dot.
+
+    A compression suffix that app.parsers.compression can read is skipped
+    first; that module is imported here because app.parsers imports this
+    one while initialising.
+    """
+    from app.parsers.compression import CODECS
+
+    base, ext = os.path.splitext(file_name or "")
+    if ext.lower() in CODECS:
+        base, ext = os.path.splitext(base)
+    return ext.lower().lstrip('.') or "unknown"
+
+
+def batch_format(file_names):
+    """Return the format label shared by all file_names, or "mixed"."""
+    formats = {file_format(file_name) for file_name in file_names}
+    if len(formats) == 1:
+        return formats.pop()
+    return "mixed" if formats else "unknown"
+
+
+def observe_stage(stage, fmt, seconds):
+    STAGE_SECONDS.labels(stage=stage, format=fmt).observe(seconds)
+
+
+def observe_parsed_file(file_name, stats, filepath=None):
+    """Record a finished file's parse stats (a ParseStats.as_dict()).
+
+    Given the file's path, its size is counted too.
+    """
+    fmt = file_format(file_name)
+    RECORDS.labels(format=fmt, outcome="valid").inc(stats["valid"])
+    RECORDS.labels(format=fmt, outcome="invalid").inc(stats["invalid"])
+    for reason, count in stats["reasons"].items():
+        REJECTS.labels(format=fmt, reason=reason).inc(count)
+    for field, stage in PARSE_STAGES:
+        if stats[field]:
+            observe_stage(stage, fmt, stats[field])
+    if filepath is not None and os.path.isfile(filepath):
+        BYTES_READ.labels(format=fmt).inc(os.path.getsize(filepath))
@@ -0,0 +1,13 @@
+from prometheus_client import start_http_server
+
+from app.config.logger import logger
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve the default prometheus_client registry on http://host:port/metrics.
+
+    The server runs on a daemon thread; returns it.
+    """
+    server, _ = start_http_server(port, addr=host)
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -1,81 +1,163 @@
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.config import LOADER
 from app.config.logger import logger
-from .csv_parser import parse_csv
-from .json_parser import parse_json
-from .xml_parser import parse_xml
-from .yaml_parser import parse_yaml
+from app.metrics.pipeline import observe_parsed_file
+from .registry import (
+    ParserSpec,
+    extension_of,
+    get_parser,
+    iter_file_records,
+    parse_file,
+    register_parser,
+    registered_extensions,
+)
+from .csv_parser import parse_csv, iter_csv
+from .json_parser import parse_json, iter_json, parse_ndjson, iter_ndjson
+from .xml_parser import parse_xml, iter_xml
+from .yaml_parser import parse_yaml, iter_yaml
+from .records import RecordBatch, batched_records, new_records, record_file_names
+from .core import collect_file_stats
+from .compression import add_input_stats, collect_input_stats, new_compression_summary
 
+SUPPORTED_EXTENSIONS = registered_extensions()
 
 
-def parse_all_files(directory):
-    """
-    Parse all supported files in the directory with validation.
-    Returns a tuple of (valid_records, validation_summary)
+def supported_extension(filename):
+    """Return the lower-cased format extension of filename, or None if unsupported.
+
+    Compressed files report the inner format: "calls.csv.gz" gives ".csv".
     """
-    if not os.path.exists(directory):
-        logger.error(f"Directory does not exist: {directory}")
-        return [], {"error": "Directory not found", "files_processed": 0}
-    
-    valid_records = []
-    validation_summary = {
+    ext = extension_of(filename)
+    return ext if get_parser(ext) is not None else None
+
+
+def iter_supported_files(directory):
+    """Yield (filename, filepath, ext) for every supported file in directory."""
+    for filename in os.listdir(directory):
+        filepath = os.path.join(directory, filename)
+        if not os.path.isfile(filepath):
+            continue
+
+        ext = supported_extension(filename)
+        if ext is None:
+            continue
+
+        yield filename, filepath, ext
+
+
+def new_validation_summary():
+    """Return an empty validation summary."""
+    return {
         "files_processed": 0,
         "valid_files": 0,
         "invalid_files": 0,
         "total_valid_records": 0,
         "files_with_errors": [],
-        "processing_errors": []
+        "processing_errors": [],
+        "compression": new_compression_summary(),
     }
-    
-    supported_extensions = ['.csv', '.json', '.xml', '.yaml', '.yml']
-    
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if not os.path.isfile(filepath):
-            continue
-        
-        _, ext = os.path.splitext(filename.lower())
-        if ext not in supported_extensions:
-            continue
-            
-        validation_summary["files_processed"] += 1
-        records = []
-        
+
+
+def _parse_file_result(filename, filepath, ext):
+    """Parse a file without raising.
+
+    Returns (filename, records, error, input_stats, file_stats).
+    input_stats describes the decompression of compressed inputs and
+    file_stats the parse counts and timings, so that both come back from
+    worker processes.
+    """
+    with collect_input_stats() as input_stats, collect_file_stats() as file_stats:
         try:
-            if ext == '.csv':
-                records = parse_csv(filepath)
-            elif ext == '.json':
-                records = parse_json(filepath)
-            elif ext == '.xml':
-                records = parse_xml(filepath)
-            elif ext in ['.yaml', '.yml']:
-                records = parse_yaml(filepath)
-            
-            if records:
-                validation_summary["valid_files"] += 1
-                validation_summary["total_valid_records"] += len(records)
-                valid_records.extend(records)
-                logger.info(f"Successfully processed {filename}: {len(records)} valid records")
-            else:
-                validation_summary["invalid_files"] += 1
-                validation_summary["files_with_errors"].append({
-                    "filename": filename,
-                    "error": "No valid records found"
-                })
-                logger.warning(f"No valid records found in {filename}")
-                
+            records, error = parse_file(filepath, ext), None
         except Exception as e:
+            records, error = [], str(e)
+    input_stats = [stats.as_dict() for stats in input_stats]
+    return filename, records, error, input_stats, file_stats
+
+
+def _parse_files_parallel(files, workers, preserve_order):
+    """Yield parse results for files from a pool of worker processes."""
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        futures = {
+            executor.submit(_parse_file_result, filename, filepath, ext): filename
+            for filename, filepath, ext in files
+        }
+        completed = futures if preserve_order else as_completed(futures)
+        for future in completed:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield futures[future], [], str(e), [], []
+
+
+def parse_all_files(directory, workers=None, preserve_order=None, files=None):
+    """
+    Parse all supported files in the directory with validation.
+    Returns a tuple of (valid_records, validation_summary), with the
+    records held as new_records collects them.
+
+    files restricts parsing to the given (filename, filepath, ext) entries,
+    e.g. those a FileManifest scan reports as pending.
+
+    With more than one worker, files are parsed in parallel processes.
+    preserve_order keeps records in directory-listing order; otherwise
+    results are merged as files finish.
+    """
+    if not os.path.exists(directory):
+        logger.error(f"Directory does not exist: {directory}")
+        return new_records(), {"error": "Directory not found", "files_processed": 0}
+
+    workers = LOADER["parse_workers"] if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    if preserve_order is None:
+        preserve_order = LOADER["parse_preserve_order"]
+
+    valid_records = new_records()
+    validation_summary = new_validation_summary()
+    if files is None:
+        files = list(iter_supported_files(directory))
+
+    if workers > 1 and len(files) > 1:
+        logger.info(f"Parsing {len(files)} files with {workers} worker processes")
+        results = _parse_files_parallel(files, workers, preserve_order)
+    else:
+        results = (_parse_file_result(*file) for file in files)
+
+    paths = {filename: filepath for filename, filepath, _ in files}
+    for filename, records, error, input_stats, file_stats in results:
+        validation_summary["files_processed"] += 1
+        add_input_stats(validation_summary["compression"], input_stats)
+        for file_name, stats in file_stats:
+            observe_parsed_file(file_name, stats, paths.get(filename))
+
+        if error is not None:
             validation_summary["invalid_files"] += 1
-            error_msg = f"Processing error: {str(e)}"
+            error_msg = f"Processing error: {error}"
             validation_summary["processing_errors"].append({
                 "filename": filename,
                 "error": error_msg
             })
-            logger.error(f"Error processing file {filename}: {str(e)}")
-    
+            logger.error(f"Error processing file {filename}: {error}")
+        elif records:
+            validation_summary["valid_files"] += 1
+            validation_summary["total_valid_records"] += len(records)
+            valid_records.extend(records)
+            logger.info(
+                f"Successfully processed {filename}: {len(records)} valid records"
+            )
+        else:
+            validation_summary["invalid_files"] += 1
+            validation_summary["files_with_errors"].append({
+                "filename": filename,
+                "error": "No valid records found"
+            })
+            logger.warning(f"No valid records found in {filename}")
 
     logger.info(f"Parsing complete - Files processed: {validation_summary['files_processed']}, "
                 f"Valid files: {validation_summary['valid_files']}, "
                 f"Invalid files: {validation_summary['invalid_files']}, "
                 f"Total valid records: {validation_summary['total_valid_records']}")
-    
-    return valid_records, validation_summary
\ No newline at end of file
+
+    return valid_records, validation_summary
@@ -0,0 +1,165 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.validation.file_validator import COMPRESSED_EXTENSIONS
+
+try:
+    import zstandard
+except ImportError:  # optional: .zst inputs are then left alone
+    zstandard = None
+
+BUFFER_SIZE = 256 * 1024
+
+
+def _open_zstd(filepath):
+    return zstandard.ZstdDecompressor().stream_reader(
+        open(filepath, 'rb'), closefd=True
+    )
+
+
+# Compressed-file extension -> function opening a decompressed binary stream
+CODECS = {
+    '.gz': lambda filepath: gzip.open(filepath, 'rb'),
+    '.bz2': lambda filepath: bz2.open(filepath, 'rb'),
+    '.xz': lambda filepath: lzma.open(filepath, 'rb'),
+}
+if zstandard is not None:
+    CODECS['.zst'] = _open_zstd
+
+COMPRESSED_EXTENSIONS.update(CODECS)
+
+_tracking = threading.local()
+
+
+def split_compression(filepath):
+    """Return (base, codec_ext) for a path; codec_ext is None when uncompressed.
+
+    "calls.csv.gz" gives ("calls.csv", ".gz").
+    """
+    base, ext = os.path.splitext(filepath)
+    ext = ext.lower()
+    if ext in CODECS:
+        return base, ext
+    return filepath, None
+
+
+def is_compressed(filepath):
+    return split_compression(filepath)[1] is not None
+
+
+class InputStats:
+    """Compressed and decompressed byte counts and decode time for one file."""
+
+    def __init__(self, filename, codec, compressed_bytes):
+        self.filename = filename
+        self.codec = codec
+        self.compressed_bytes = compressed_bytes
+        self.uncompressed_bytes = 0
+        self.decode_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "filename": self.filename,
+            "codec": self.codec.lstrip('.'),
+            "compressed_bytes": self.compressed_bytes,
+            "uncompressed_bytes": self.uncompressed_bytes,
+            "decode_seconds": round(self.decode_seconds, 6),
+            "decode_mb_per_s": _throughput(
+                self.uncompressed_bytes, self.decode_seconds
+            ),
+        }
+
+
+def _throughput(size, seconds):
+    return round(size / seconds / 1e6, 2) if seconds else None
+
+
+class _MeteredReader(io.RawIOBase):
+    """Raw stream over a decompressor that counts output bytes and decode time."""
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self.stats = stats
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        started = time.perf_counter()
+        count = self._stream.readinto(buffer)
+        self.stats.decode_seconds += time.perf_counter() - started
+        self.stats.uncompressed_bytes += count or 0
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+
+def open_input(filepath, mode='rb', encoding='utf-8', newline=None):
+    """Open a CDR file for reading, decompressing it on the fly if needed.
+
+    Plain files are opened as usual. For compressed files the decoded size
+    and time spent decompressing are recorded for collect_input_stats.
+    """
+    _, codec = split_compression(filepath)
+    if codec is None:
+        if 'b' in mode:
+            return open(filepath, mode)
+        return open(filepath, mode, encoding=encoding, newline=newline)
+
+    stats = InputStats(os.path.basename(filepath), codec, os.path.getsize(filepath))
+    collected = getattr(_tracking, "stats", None)
+    if collected is not None:
+        collected.append(stats)
+    stream = io.BufferedReader(
+        _MeteredReader(CODECS[codec](filepath), stats), BUFFER_SIZE
+    )
+    if 'b' in mode:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+
+@contextmanager
+def collect_input_stats():
+    """Collect InputStats for every compressed file opened in this thread."""
+    previous = getattr(_tracking, "stats", None)
+    _tracking.stats = collected = []
+    try:
+        yield collected
+    finally:
+        _tracking.stats = previous
+
+
+def new_compression_summary():
+    return {
+        "compressed_files": 0,
+        "compressed_bytes": 0,
+        "uncompressed_bytes": 0,
+        "decode_seconds": 0.0,
+        "decode_mb_per_s": None,
+        "files": [],
+    }
+
+
+def add_input_stats(summary, input_stats):
+    """Fold per-file input stats (dicts from InputStats.as_dict) into a summary."""
+    for stats in input_stats:
+        summary["compressed_files"] += 1
+        summary["compressed_bytes"] += stats["compressed_bytes"]
+        summary["uncompressed_bytes"] += stats["uncompressed_bytes"]
+        summary["decode_seconds"] = round(
+            summary["decode_seconds"] + stats["decode_seconds"], 6
+        )
+        summary["files"].append(stats)
+    summary["decode_mb_per_s"] = _throughput(
+        summary["uncompressed_bytes"], summary["decode_seconds"]
+    )
+    return summary
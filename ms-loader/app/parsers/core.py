@@ -0,0 +1,214 @@
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+
+from app.config import LOADER
+from app.config.logger import logger
+from app.parsers.dead_letter import dead_letter_enabled
+from app.validation.engine import RecordValidator
+
+FAILED_TRANSFORM = "Failed to transform record"
+
+_REASON_DETAIL = re.compile(r"\s*\([^)]*\)|:.*$")
+
+_tracking = threading.local()
+
+
+class RecordStructureError(ValueError):
+    """The file is not a list of records or an object with a 'records' key."""
+
+
+class Rejected:
+    """Placeholder a record reader yields for an entry it could not decode.
+
+    raw is the undecoded entry (e.g. the line), kept for the dead-letter output.
+    """
+
+    __slots__ = ("errors", "raw")
+
+    def __init__(self, errors, raw=None):
+        self.errors = errors
+        self.raw = raw
+
+
+def reason_of(error):
+    """Return the kind of a validation error, without the offending value.
+
+    "Invalid source format: abc" gives "Invalid source format".
+    """
+    return _REASON_DETAIL.sub("", error)
+
+
+class ParseStats:
+    """Valid and invalid record counts for one file, plus the first few rejects.
+
+    Rejects are counted per reason and sampled with their number and errors;
+    the raw record is only kept in samples when capture_raw
+    (CAPTURE_INVALID_ROWS) is on. Every reject also goes to dead_letter, if
+    given. The *_seconds fields add up the time spent reading, validating
+    and transforming records.
+    """
+
+    def __init__(self, sample_limit=5, capture_raw=None, dead_letter=None):
+        self.valid = 0
+        self.invalid = 0
+        self.reasons = {}
+        self.read_seconds = 0.0
+        self.validate_seconds = 0.0
+        self.transform_seconds = 0.0
+        self.sample_limit = sample_limit
+        if capture_raw is None:
+            capture_raw = LOADER["capture_invalid_rows"]
+        self.capture_raw = capture_raw
+        self.dead_letter = dead_letter
+        self.samples = []
+
+    def reject(self, number, record, errors):
+        self.invalid += 1
+        reasons = self.reasons
+        for error in errors:
+            reason = reason_of(error)
+            reasons[reason] = reasons.get(reason, 0) + 1
+        if self.dead_letter is not None:
+            self.dead_letter.add(number, errors, record)
+        if self.sample_limit is None or len(self.samples) < self.sample_limit:
+            sample = {"index": number, "errors": errors}
+            if self.capture_raw:
+                sample["record"] = record
+            self.samples.append(sample)
+
+    def as_dict(self):
+        """Counts, reasons and timings, without the samples."""
+        return {
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "reasons": dict(self.reasons),
+            "read_seconds": self.read_seconds,
+            "validate_seconds": self.validate_seconds,
+            "transform_seconds": self.transform_seconds,
+        }
+
+
+@contextmanager
+def collect_file_stats():
+    """Collect (file_name, ParseStats.as_dict()) per file finished in this thread."""
+    previous = getattr(_tracking, "stats", None)
+    _tracking.stats = collected = []
+    try:
+        yield collected
+    finally:
+        _tracking.stats = previous
+
+
+def report_file_stats(file_name, stats):
+    """Hand a finished file's stats to collect_file_stats, if collecting."""
+    collected = getattr(_tracking, "stats", None)
+    if collected is not None:
+        collected.append((file_name, stats.as_dict()))
+
+
+def keeps_raw_records():
+    """Whether rejected raw records are needed, for samples or dead-letter output."""
+    return LOADER["capture_invalid_rows"] or dead_letter_enabled()
+
+
+def build_record(record, file_name, normalize_service=False):
+    """Build the loaded shape of a validated raw record.
+
+    Raises if a field does not convert.
+    """
+    service = record.get("service")
+    return {
+        "file_name": file_name,
+        "source": record.get("source"),
+        "destination": record.get("destination"),
+        "starttime": datetime.fromisoformat(record.get("starttime")),
+        "service": service.upper() if normalize_service else service,
+        "usage": float(record.get("usage")),
+    }
+
+
+def transform_record(record, file_name, normalize_service=False):
+    """Transform a validated raw record into the loaded shape, or None if it fails."""
+    try:
+        return build_record(record, file_name, normalize_service)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def iter_valid_records(
+    numbered_records, file_name, normalize_service=False, stats=None
+):
+    """Validate and transform (number, raw_record) pairs, yielding loadable records.
+
+    This is the per-record loop shared by every format. Passing records go
+    through RecordValidator.is_valid; error messages are only built for
+    records that fail. Rejects are not logged one by one: they are counted
+    in stats, which also hands them to its dead-letter writer.
+    """
+    validator = RecordValidator()
+    is_valid = validator.is_valid
+    if stats is None:
+        stats = ParseStats()
+    reject = stats.reject
+    valid_count = 0
+    clock = perf_counter
+    read_seconds = validate_seconds = transform_seconds = 0.0
+
+    try:
+        started = clock()
+        for number, record in numbered_records:
+            checked = clock()
+            read_seconds += checked - started
+            if record.__class__ is Rejected:
+                errors = record.errors
+                record = record.raw
+            else:
+                if is_valid(record):
+                    errors = None
+                else:
+                    errors = validator.errors(record) or None
+                validated = clock()
+                validate_seconds += validated - checked
+                if errors is None:
+                    try:
+                        transformed_record = build_record(
+                            record, file_name, normalize_service
+                        )
+                    except (ValueError, TypeError, AttributeError) as e:
+                        errors = [f"{FAILED_TRANSFORM}: {e}"]
+                    else:
+                        valid_count += 1
+                        transform_seconds += clock() - validated
+                        yield transformed_record
+                        started = clock()
+                        continue
+
+            reject(number, record, errors)
+            started = clock()
+    finally:
+        stats.valid += valid_count
+        stats.read_seconds += read_seconds
+        stats.validate_seconds += validate_seconds
+        stats.transform_seconds += transform_seconds
+
+
+def log_summary(kind, file_name, stats, label="Record"):
+    """Log the end-of-file counts, rejects per reason and the first rejected record."""
+    logger.info(
+        f"Finished parsing {kind} file: {file_name}. "
+        f"Valid: {stats.valid}, Invalid: {stats.invalid}"
+    )
+
+    if stats.invalid:
+        reasons = sorted(stats.reasons.items(), key=lambda item: -item[1])
+        logger.warning(f"Invalid records in {file_name}: "
+                       + ", ".join(f"{reason}: {count}" for reason, count in reasons))
+        if stats.samples:
+            first = stats.samples[0]
+            logger.warning(
+                f"  First invalid: {label} {first['index']}: "
+                f"{', '.join(first['errors'])}"
+            )
@@ -1,81 +1,88 @@
 import csv
+import io
 import os
-from datetime import datetime
+from app.config import LOADER
 from app.config.logger import logger
-from app.validation.file_validator import validate_file, validate_record
+from app.parsers.columnar import parse_csv_columnar
+from app.parsers.compression import is_compressed, open_input
+from app.parsers.records import new_records
+from app.parsers.ranges import (
+    check_range,
+    iter_parallel_records,
+    range_workers,
+    read_mapped,
+    split_line_ranges,
+)
+from app.parsers.registry import ParserSpec, read_valid_records, register_parser
 
 
-def transform_record(record, file_name):
-    """Transform and validate a single record."""
-    try:
-        return {
-            "file_name": file_name,  
-            "source": record.get("source"),
-            "destination": record.get("destination"),
-            "starttime": datetime.fromisoformat(record.get("starttime")),
-            "service": record.get("service"),
-            "usage": float(record.get("usage")),
-        }
-    except (ValueError, TypeError) as e:
-        logger.error(f"Error transforming record {record}: {str(e)}")
-        return None
-
-
-def parse_csv(filepath):
+def read_csv_rows(filepath):
+    """Yield (row_number, row) for every data row of a CSV file."""
+    with open_input(filepath, 'r', newline="") as csvfile:
+        yield from enumerate(csv.DictReader(csvfile), 1)
+
+
+def read_csv_header(filepath):
+    """Return (fieldnames, offset of the first data row) of a plain CSV file."""
+    with open(filepath, 'rb') as f:
+        header = f.readline()
+    fieldnames = next(csv.reader([header.decode('utf-8')]), [])
+    return fieldnames, len(header)
+
+
+def _parse_csv_range(filepath, start, end, fieldnames):
+    """Worker: parse one memory-mapped byte range of data rows.
+
+    Returns (records, row_count, invalid, timings) with rows numbered within the range.
+    Blank lines are skipped without a number, as csv.DictReader does.
+    """
+    text = read_mapped(filepath, start, end).decode('utf-8')
+    row_count = 0
+
+    def numbered_rows():
+        nonlocal row_count
+        for row in csv.reader(io.StringIO(text, newline='')):
+            if row:
+                row_count += 1
+                yield row_count, dict(zip(fieldnames, row))
+
+    records, invalid, timings = check_range(filepath, numbered_rows())
+    return records, row_count, invalid, timings
+
+
+def iter_csv(filepath, workers=None):
+    """Yield validated, transformed records from a CSV file one at a time.
+
+    With more than one worker, a large file is memory-mapped and split into
+    newline-aligned byte ranges that are parsed in parallel processes. This
+    assumes no quoted field contains a line break, which holds for CDR exports.
+    """
+    workers = range_workers(LOADER["csv_workers"] if workers is None else workers)
+    if workers > 1 and os.path.isfile(filepath) and not is_compressed(filepath):
+        fieldnames, data_start = read_csv_header(filepath)
+        ranges = split_line_ranges(
+            filepath, workers, LOADER["csv_range_bytes"], start=data_start
+        )
+        if fieldnames and len(ranges) > 1:
+            return iter_parallel_records(
+                "CSV", filepath, ranges, workers, _parse_csv_range, fieldnames,
+                label="Row",
+            )
+    return read_valid_records(filepath, '.csv')
+
+
+def parse_csv(filepath, workers=None):
     """Parse CSV file with validation."""
-    if not validate_file(filepath):
-        return []
-    
-    file_name = os.path.basename(filepath)
-    logger.info(f"Parsing CSV file: {file_name}")
-    
-    valid_records = []
-    invalid_records = []
-    row_number = 0
-    
     try:
-        with open(filepath, newline="", encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                row_number += 1
-                
-                # Validate the raw record first
-                is_valid, validation_errors = validate_record(row)
-                
-                if is_valid:
-                    # Transform the record if validation passes
-                    transformed_record = transform_record(row, file_name)
-                    if transformed_record:
-                        valid_records.append(transformed_record)
-                    else:
-                        logger.warning(f"Row {row_number} in {file_name}: Failed to transform record")
-                        invalid_records.append({
-                            "row": row_number,
-                            "record": row,
-                            "errors": ["Failed to transform record"]
-                        })
-                else:
-                    # Log validation errors
-                    logger.warning(f"Row {row_number} in {file_name}: Validation failed - {', '.join(validation_errors)}")
-                    invalid_records.append({
-                        "row": row_number,
-                        "record": row,
-                        "errors": validation_errors
-                    })
-    
+        if LOADER["csv_engine"] == "columnar":
+            return parse_csv_columnar(filepath)
+        return new_records(iter_csv(filepath, workers))
     except Exception as e:
-        logger.error(f"Error parsing CSV file {file_name}: {str(e)}")
-        return []
-    
-    logger.info(f"Finished parsing CSV file: {file_name}. Valid: {len(valid_records)}, Invalid: {len(invalid_records)}")
-    
-    # Log summary of invalid records
-    if invalid_records:
-        logger.warning(f"Invalid records in {file_name}:")
-        for invalid in invalid_records[:5]:
-            logger.warning(f"  Row {invalid['row']}: {', '.join(invalid['errors'])}")
-        if len(invalid_records) > 5:
-            logger.warning(f"  ... and {len(invalid_records) - 5} more invalid records")
-    
-    return valid_records
\ No newline at end of file
+        logger.error(f"Error parsing CSV file {os.path.basename(filepath)}: {str(e)}")
+        return new_records()
+
+
+register_parser(
+    ['.csv'],
+    ParserSpec("CSV", read_csv_rows, label="Row", iterate=iter_csv, parse=parse_csv),
+)
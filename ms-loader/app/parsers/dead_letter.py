@@ -0,0 +1,128 @@
+import json
+import os
+from abc import ABC, abstractmethod
+
+from app.config import KAFKA, LOADER
+from app.config.logger import logger
+
+DEAD_LETTER_SUFFIX = ".rejected.jsonl"
+
+
+class DeadLetterWriter(ABC):
+    """Buffer rejected records of one input file and write them out in bulk.
+
+    Each entry holds the row (or record) number, the validation errors and
+    the raw payload as read from the file, so rejects can be fixed and
+    reprocessed. Entries are written every buffer_size rejects and on close.
+    """
+
+    def __init__(self, file_name, buffer_size=None):
+        self.file_name = file_name
+        self.buffer_size = buffer_size or LOADER["dead_letter_buffer_size"]
+        self.written = 0
+        self._buffer = []
+
+    def add(self, number, errors, record=None):
+        self._buffer.append({
+            "file_name": self.file_name,
+            "row": number,
+            "errors": errors,
+            "raw": record,
+        })
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            entries, self._buffer = self._buffer, []
+            self._write(entries)
+            self.written += len(entries)
+
+    def close(self):
+        self.flush()
+
+    @abstractmethod
+    def _write(self, entries):
+        """Write out a list of buffered entries."""
+
+
+def encode_entry(entry):
+    # YAML inputs can carry dates and timestamps as native values
+    return json.dumps(entry, default=str)
+
+
+class FileDeadLetterWriter(DeadLetterWriter):
+    """Append entries as JSON lines to <directory>/<input file name>.rejected.jsonl."""
+
+    def __init__(self, file_name, directory=None, buffer_size=None):
+        super().__init__(file_name, buffer_size)
+        directory = directory or LOADER["dead_letter_directory"]
+        self.path = os.path.join(directory, file_name + DEAD_LETTER_SUFFIX)
+        self.target = self.path
+
+    def _write(self, entries):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(encode_entry(entry) + '\n' for entry in entries))
+
+
+class KafkaDeadLetterWriter(DeadLetterWriter):
+    """Publish entries to the dead-letter topic, keyed by input file name."""
+
+    def __init__(self, file_name, topic=None, buffer_size=None):
+        super().__init__(file_name, buffer_size)
+        self.topic = topic or KAFKA["dead_letter_topic"]
+        self.target = f"Kafka topic {self.topic}"
+
+    def _write(self, entries):
+        from app.messaging.kafka_producer import get_producer, produce
+
+        producer = get_producer()
+        for entry in entries:
+            produce(producer, self.topic, self.file_name, encode_entry(entry), None)
+
+    def close(self):
+        from app.messaging.kafka_producer import flush_producer
+
+        super().close()
+        if self.written:
+            flush_producer()
+
+
+def dead_letter_enabled(mode=None):
+    return (mode or LOADER["dead_letter_mode"]) in ("file", "kafka")
+
+
+def open_dead_letter(file_name, mode=None):
+    """Return the dead-letter writer for one input file.
+
+    None when DEAD_LETTER_MODE is off.
+    """
+    mode = mode or LOADER["dead_letter_mode"]
+    if mode == "file":
+        return FileDeadLetterWriter(file_name)
+    if mode == "kafka":
+        return KafkaDeadLetterWriter(file_name)
+    if mode != "off":
+        logger.warning(
+            f"Unknown DEAD_LETTER_MODE {mode!r}; rejected records are only counted"
+        )
+    return None
+
+
+def close_dead_letter(writer):
+    """Flush and close writer (if any), logging where its entries went."""
+    if writer is None:
+        return
+    try:
+        writer.close()
+    except Exception as e:
+        logger.error(
+            f"Error writing dead-letter records for {writer.file_name}: {str(e)}"
+        )
+        return
+    if writer.written:
+        logger.info(
+            f"Wrote {writer.written} rejected records from {writer.file_name} "
+            f"to {writer.target}"
+        )
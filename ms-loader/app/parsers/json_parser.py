@@ -1,90 +1,224 @@
 import json
 import os
-from datetime import datetime
+import re
+from app.config import LOADER
 from app.config.logger import logger
-from app.validation.file_validator import validate_file, validate_record
+from app.parsers.compression import is_compressed, open_input
+from app.parsers.core import RecordStructureError, Rejected
+from app.parsers.ranges import (
+    check_range,
+    iter_parallel_records,
+    iter_range_lines,
+    range_workers,
+    read_mapped,
+    split_line_ranges,
+)
+from app.parsers.records import new_records
+from app.parsers.registry import (
+    ParserSpec,
+    parse_records,
+    read_valid_records,
+    register_parser,
+)
 
+READ_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'[ \t\n\r]*')
 
-def transform_record(record, file_name):
-    """Transform and validate a single record."""
-    try:
-        return {
-            "file_name": file_name,  
-            "source": record.get("source"),
-            "destination": record.get("destination"),
-            "starttime": datetime.fromisoformat(record.get("starttime")),
-            "service": record.get("service"),
-            "usage": float(record.get("usage")),
-        }
-    except (ValueError, TypeError) as e:
-        logger.error(f"Error transforming record {record}: {str(e)}")
-        return None
+_decoder = json.JSONDecoder()
+
+
+class JsonStructureError(RecordStructureError):
+    """The top-level JSON value is neither a list nor an object with 'records'."""
+
+
+class _JsonReader:
+    """Decode a JSON document one value at a time from a text file."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(READ_SIZE)
+        if not data:
+            self.eof = True
+            return
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non-whitespace character, or '' at end of file."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                f"Expecting one of {chars!r}", self.buf, self.pos
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer may continue in the next read
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array(self):
+        """Yield the items of the array whose '[' was just consumed."""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_json_records(f):
+    """Yield the records of a JSON list or {"records": [...]} document incrementally."""
+    reader = _JsonReader(f)
+    char = reader.peek()
+    if char == '[':
+        reader.pos += 1
+        yield from reader.array()
+    elif char == '{':
+        reader.pos += 1
+        found = False
+        if reader.peek() == '}':
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(':')
+                if key == 'records' and reader.peek() == '[':
+                    reader.pos += 1
+                    yield from reader.array()
+                    found = True
+                elif key == 'records':
+                    yield from reader.value()
+                    found = True
+                else:
+                    reader.value()
+                if reader.expect(',}') == '}':
+                    break
+        if not found:
+            raise JsonStructureError("object has no 'records' key")
+    else:
+        # Raises the usual decode error for empty or malformed input
+        reader.value()
+        raise JsonStructureError("top-level value is not a list or object")
+
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buf, reader.pos)
+
+
+def read_json_records(filepath):
+    """Yield (index, record) for a JSON list or {"records": [...]} document."""
+    with open_input(filepath, 'r') as jsonfile:
+        yield from enumerate(iter_json_records(jsonfile), 1)
+
+
+def iter_json(filepath):
+    """Yield validated, transformed records from a JSON file one at a time.
+
+    The document is decoded incrementally, so only the current record is
+    held in memory.
+    """
+    return read_valid_records(filepath, '.json')
+
+
+def read_ndjson_records(filepath, start=0, end=None):
+    """Yield (line_number, record) for the non-blank lines of an NDJSON file.
+
+    Lines that are not a JSON object come back as Rejected. Line numbers are
+    relative to start.
+    """
+    for line_number, line in enumerate(iter_range_lines(filepath, start, end), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raw = line.decode('utf-8', 'replace').rstrip('\r\n')
+            yield line_number, Rejected([f"Invalid JSON: {e}"], raw)
+            continue
+        if not isinstance(record, dict):
+            yield line_number, Rejected(["Record is not a JSON object"], record)
+            continue
+        yield line_number, record
+
+
+def _parse_ndjson_range(filepath, start, end):
+    """Worker: parse one byte range.
+
+    Returns (records, line_count, invalid, timings).
+    """
+    line_count = read_mapped(filepath, start, end).count(b'\n')
+    records, invalid, timings = check_range(
+        filepath, read_ndjson_records(filepath, start, end)
+    )
+    return records, line_count, invalid, timings
+
+
+def iter_ndjson(filepath, workers=None):
+    """Yield validated, transformed records from a newline-delimited JSON file.
+
+    Each line holds one record, and an unparsable line only rejects that
+    record. With more than one worker, large files are split on line
+    boundaries into byte ranges that are parsed in parallel processes.
+    """
+    workers = range_workers(LOADER["ndjson_workers"] if workers is None else workers)
+    if workers > 1 and os.path.isfile(filepath) and not is_compressed(filepath):
+        ranges = split_line_ranges(filepath, workers, LOADER["ndjson_range_bytes"])
+        if len(ranges) > 1:
+            return iter_parallel_records(
+                "NDJSON", filepath, ranges, workers, _parse_ndjson_range
+            )
+    return read_valid_records(filepath, '.ndjson')
 
 
 def parse_json(filepath):
     """Parse JSON file with validation."""
-    # First validate the file itself
-    if not validate_file(filepath):
-        return []
-    
-    file_name = os.path.basename(filepath)
-    logger.info(f"Parsing JSON file: {file_name}")
-    
-    valid_records = []
-    invalid_records = []
-    
+    return parse_records(filepath, '.json')
+
+
+def parse_ndjson(filepath, workers=None):
+    """Parse newline-delimited JSON file with validation."""
+    if workers is None:
+        return parse_records(filepath, '.ndjson')
     try:
-        with open(filepath, 'r', encoding='utf-8') as jsonfile:
-            data = json.load(jsonfile)
-            
-            # Handle different JSON structures
-            if isinstance(data, list):
-                records_list = data
-            elif isinstance(data, dict) and 'records' in data:
-                records_list = data['records']
-            else:
-                logger.error(f"Invalid JSON structure in {file_name}. Expected list or object with 'records' key")
-                return []
-            
-            for index, record in enumerate(records_list):
-                # Validate the raw record first
-                is_valid, validation_errors = validate_record(record)
-                
-                if is_valid:
-                    # Transform the record if validation passes
-                    transformed_record = transform_record(record, file_name)
-                    if transformed_record:
-                        valid_records.append(transformed_record)
-                    else:
-                        logger.warning(f"Record {index + 1} in {file_name}: Failed to transform record")
-                        invalid_records.append({
-                            "index": index + 1,
-                            "record": record,
-                            "errors": ["Failed to transform record"]
-                        })
-                else:
-                    # Log validation errors
-                    logger.warning(f"Record {index + 1} in {file_name}: Validation failed - {', '.join(validation_errors)}")
-                    invalid_records.append({
-                        "index": index + 1,
-                        "record": record,
-                        "errors": validation_errors
-                    })
-    
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error in {file_name}: {str(e)}")
-        return []
+        return new_records(iter_ndjson(filepath, workers))
     except Exception as e:
-        logger.error(f"Error parsing JSON file {file_name}: {str(e)}")
-        return []
-    
-    logger.info(f"Finished parsing JSON file: {file_name}. Valid: {len(valid_records)}, Invalid: {len(invalid_records)}")
-    
-    if invalid_records:
-        logger.warning(f"Invalid records in {file_name}:")
-        for invalid in invalid_records[:5]: 
-            logger.warning(f"  Record {invalid['index']}: {', '.join(invalid['errors'])}")
-        if len(invalid_records) > 5:
-            logger.warning(f"  ... and {len(invalid_records) - 5} more invalid records")
-    
-    return valid_records
\ No newline at end of file
+        file_name = os.path.basename(filepath)
+        logger.error(f"Error parsing NDJSON file {file_name}: {str(e)}")
+        return new_records()
+
+
+register_parser(
+    ['.json'],
+    ParserSpec("JSON", read_json_records, decode_errors=[json.JSONDecodeError]),
+)
+register_parser(
+    ['.ndjson', '.jsonl'],
+    ParserSpec("NDJSON", read_ndjson_records, iterate=iter_ndjson),
+)
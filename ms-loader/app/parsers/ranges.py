@@ -0,0 +1,169 @@
+import mmap
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config.logger import logger
+from app.parsers.compression import is_compressed, open_input
+from app.parsers.core import (
+    ParseStats,
+    iter_valid_records,
+    keeps_raw_records,
+    log_summary,
+    report_file_stats,
+)
+from app.parsers.dead_letter import close_dead_letter, open_dead_letter
+from app.parsers.records import RecordBatch
+from app.validation.file_validator import validate_file
+
+
+def range_workers(workers):
+    """Resolve a configured worker count: 0 means one per CPU.
+
+    Inside a worker process (e.g. one of parse_all_files) it is always 1.
+    """
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return workers or os.cpu_count() or 1
+
+
+def split_line_ranges(filepath, parts, min_size=1024 * 1024, start=0):
+    """Split a file into at most parts (start, end) byte ranges on line boundaries.
+
+    Every range except the last ends just after a newline, so each one can be
+    read independently with iter_range_lines. Files smaller than min_size
+    bytes per part come back as fewer ranges. start skips a prefix such as
+    a header line.
+    """
+    size = os.path.getsize(filepath)
+    parts = max(1, min(parts, (size - start) // max(min_size, 1)))
+    if parts == 1:
+        return [(start, size)]
+
+    step = (size - start) // parts
+    ranges = []
+    first = start
+    with open(filepath, 'rb') as f:
+        for index in range(1, parts):
+            f.seek(max(first + index * step, start))
+            f.readline()
+            end = f.tell()
+            if end >= size:
+                break
+            if end > start:
+                ranges.append((start, end))
+                start = end
+    ranges.append((start, size))
+    return ranges
+
+
+def iter_range_lines(filepath, start=0, end=None):
+    """Yield the raw lines (bytes) of filepath between the byte offsets start and end.
+
+    Compressed files can only be read from the start.
+    """
+    if is_compressed(filepath) and (start or end is not None):
+        raise ValueError(
+            f"Byte ranges are not supported for compressed file {filepath}"
+        )
+    with open_input(filepath) as f:
+        if start:
+            f.seek(start)
+        position = start
+        for line in f:
+            if end is not None and position >= end:
+                return
+            position += len(line)
+            yield line
+
+
+def read_mapped(filepath, start, end):
+    """Return bytes start:end of filepath, read through a memory map."""
+    with open(filepath, 'rb') as f:
+        if start >= end:
+            return b''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end]
+
+
+def check_range(filepath, numbered_records):
+    """Worker side: run the shared record core over one range.
+
+    Returns (records, invalid, timings): a RecordBatch, which is cheap to
+    send back to the parent, (number, errors, raw) triples numbered within
+    the range, and the (read, validate, transform) seconds spent. raw is
+    None unless rejected records are kept (keeps_raw_records).
+    """
+    stats = ParseStats(sample_limit=None, capture_raw=keeps_raw_records())
+    records = RecordBatch(iter_valid_records(
+        numbered_records, os.path.basename(filepath), stats=stats
+    ))
+    invalid = [
+        (reject["index"], reject["errors"], reject.get("record"))
+        for reject in stats.samples
+    ]
+    timings = (stats.read_seconds, stats.validate_seconds, stats.transform_seconds)
+    return records, invalid, timings
+
+
+def _iter_range_results(worker, filepath, ranges, workers, args):
+    """Yield (offset, records, invalid, timings) per range from worker processes.
+
+    worker(filepath, start, end, *args) returns (records, count, invalid,
+    timings), where count is the number of rows or lines in its range. At most two
+    ranges per worker are in flight, and results come back in file order
+    with offset the number of rows before the range.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        remaining = iter(ranges)
+        in_flight = min(len(ranges), workers * 2)
+        pending = deque(
+            executor.submit(worker, filepath, start, end, *args)
+            for start, end in (next(remaining) for _ in range(in_flight))
+        )
+        offset = 0
+        while pending:
+            records, count, invalid, timings = pending.popleft().result()
+            next_range = next(remaining, None)
+            if next_range is not None:
+                pending.append(executor.submit(worker, filepath, *next_range, *args))
+            yield offset, records, invalid, timings
+            offset += count
+
+
+def iter_parallel_records(
+    kind, filepath, ranges, workers, worker, *args, label="Record"
+):
+    """Yield the valid records of filepath parsed range by range in worker processes.
+
+    Invalid records are counted and sent to the dead-letter output with
+    their global row numbers, as the serial parser would.
+    """
+    if not validate_file(filepath):
+        return
+
+    file_name = os.path.basename(filepath)
+    logger.info(
+        f"Parsing {kind} file: {file_name} as {len(ranges)} ranges "
+        f"with {workers} worker processes"
+    )
+
+    dead_letter = open_dead_letter(file_name)
+    stats = ParseStats(dead_letter=dead_letter)
+    try:
+        results = _iter_range_results(worker, filepath, ranges, workers, args)
+        for offset, records, invalid, timings in results:
+            for number, errors, record in invalid:
+                stats.reject(number + offset, record, errors)
+            stats.valid += len(records)
+            read_seconds, validate_seconds, transform_seconds = timings
+            stats.read_seconds += read_seconds
+            stats.validate_seconds += validate_seconds
+            stats.transform_seconds += transform_seconds
+            yield from records
+    finally:
+        close_dead_letter(dead_letter)
+
+    log_summary(kind, file_name, stats, label)
+    report_file_stats(file_name, stats)
@@ -0,0 +1,270 @@
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+
+from app.config import LOADER
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+class RecordBatch:
+    """Compact, array-backed list of transformed CDR records.
+
+    A record dict costs a few hundred bytes of Python objects. Here each
+    record is stored as columns: source and destination as UTF-8 bytes in
+    one shared buffer, starttime as microseconds since 1970 in an int64
+    array, usage in a float64 array, and file name and service as small
+    indexes into per-batch lists of distinct values.
+
+    Iterating or indexing gives back the usual record dicts, built on
+    demand, so code written for lists of dicts keeps working. Writers that
+    only need values should use iter_rows.
+
+    The saving costs CPU: building a batch from dicts takes about three
+    times as long as keeping the dicts, and publishing to Kafka turns it
+    back into dicts. Parsers therefore only use it with RECORD_BATCHES=true
+    (see new_records), for loads where memory is the limit.
+    """
+
+    __slots__ = (
+        "_text", "_offsets", "_starttimes", "_usages",
+        "_file_ids", "_files", "_file_index",
+        "_service_ids", "_services", "_service_index",
+    )
+
+    def __init__(self, records=()):
+        self._text = bytearray()
+        self._offsets = array('Q', [0])
+        self._starttimes = array('q')
+        self._usages = array('d')
+        self._file_ids = array('H')
+        self._files = []
+        self._file_index = {}
+        self._service_ids = array('H')
+        self._services = []
+        self._service_index = {}
+        if records:
+            self.extend(records)
+
+    def _file_id(self, file_name):
+        file_id = self._file_index.get(file_name)
+        if file_id is None:
+            file_id = self._file_index[file_name] = len(self._files)
+            self._files.append(file_name)
+        return file_id
+
+    def _service_id(self, service):
+        service_id = self._service_index.get(service)
+        if service_id is None:
+            service_id = self._service_index[service] = len(self._services)
+            self._services.append(service)
+        return service_id
+
+    def append(self, file_name, source, destination, starttime, service, usage):
+        """Add one record from its field values."""
+        text = self._text
+        text += source.encode()
+        self._offsets.append(len(text))
+        text += destination.encode()
+        self._offsets.append(len(text))
+        self._starttimes.append((starttime - EPOCH) // ONE_MICROSECOND)
+        self._usages.append(usage)
+        self._file_ids.append(self._file_id(file_name))
+        self._service_ids.append(self._service_id(service))
+
+    def append_record(self, record):
+        """Add one record dict as produced by transform_record."""
+        self.append(
+            record.get("file_name"),
+            record["source"],
+            record["destination"],
+            record["starttime"],
+            record["service"],
+            float(record["usage"]),
+        )
+
+    def extend(self, records):
+        """Add every record of another RecordBatch or an iterable of dicts."""
+        if not isinstance(records, RecordBatch):
+            append_record = self.append_record
+            for record in records:
+                append_record(record)
+            return
+
+        base = len(self._text)
+        self._text += records._text
+        self._offsets.extend(offset + base for offset in records._offsets[1:])
+        self._starttimes.extend(records._starttimes)
+        self._usages.extend(records._usages)
+        file_ids = [self._file_id(name) for name in records._files]
+        self._file_ids.extend(file_ids[i] for i in records._file_ids)
+        service_ids = [self._service_id(name) for name in records._services]
+        self._service_ids.extend(service_ids[i] for i in records._service_ids)
+
+    def extend_columns(
+        self, file_name, sources, destinations, starttimes_us, services, usages
+    ):
+        """Add records from parallel column sequences.
+
+        starttimes_us are int64 microseconds since the epoch.
+        """
+        file_id = self._file_id(file_name)
+        text = self._text
+        offsets = self._offsets
+        service_ids = self._service_ids
+        service_id = self._service_id
+        for source, destination, service in zip(sources, destinations, services):
+            text += source.encode()
+            offsets.append(len(text))
+            text += destination.encode()
+            offsets.append(len(text))
+            service_ids.append(service_id(service))
+        self._starttimes.extend(starttimes_us)
+        self._usages.extend(usages)
+        self._file_ids.extend([file_id] * len(usages))
+
+    def __len__(self):
+        return len(self._usages)
+
+    def __bool__(self):
+        return len(self._usages) > 0
+
+    def _fields(self, index):
+        text = self._text
+        offsets = self._offsets
+        start, middle, end = offsets[2 * index:2 * index + 3]
+        return (
+            text[start:middle].decode(),
+            text[middle:end].decode(),
+            EPOCH + timedelta(microseconds=self._starttimes[index]),
+            self._services[self._service_ids[index]],
+            self._usages[index],
+            self._files[self._file_ids[index]],
+        )
+
+    def record(self, index):
+        """Return record index as a dict."""
+        source, destination, starttime, service, usage, file_name = self._fields(index)
+        return {
+            "file_name": file_name,
+            "source": source,
+            "destination": destination,
+            "starttime": starttime,
+            "service": service,
+            "usage": usage,
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RecordBatch index out of range")
+        return self.record(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def iter_rows(self):
+        """Yield (source, destination, starttime, service, usage, file_name) tuples."""
+        for index in range(len(self)):
+            yield self._fields(index)
+
+    def __eq__(self, other):
+        if isinstance(other, (RecordBatch, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"<RecordBatch {len(self)} records from {len(self._files)} files>"
+
+    def file_names(self):
+        """Return the distinct file names in the batch, in first-seen order."""
+        present = set(self._file_ids)
+        return [name for file_id, name in enumerate(self._files) if file_id in present]
+
+    def split_by_file(self):
+        """Return {file_name: RecordBatch} keeping each file's record order."""
+        batches = {}
+        for index in range(len(self)):
+            file_name = self._files[self._file_ids[index]]
+            batch = batches.get(file_name)
+            if batch is None:
+                batch = batches[file_name] = RecordBatch()
+            batch._append_from(self, index)
+        return batches
+
+    def select(self, indexes):
+        """Return a RecordBatch of the records at indexes, in that order."""
+        batch = RecordBatch()
+        for index in indexes:
+            batch._append_from(self, index)
+        return batch
+
+    def _append_from(self, other, index):
+        offsets = other._offsets
+        start, end = offsets[2 * index], offsets[2 * index + 2]
+        base = len(self._text) - start
+        self._text += other._text[start:end]
+        self._offsets.append(offsets[2 * index + 1] + base)
+        self._offsets.append(end + base)
+        self._starttimes.append(other._starttimes[index])
+        self._usages.append(other._usages[index])
+        self._file_ids.append(self._file_id(other._files[other._file_ids[index]]))
+        service = other._services[other._service_ids[index]]
+        self._service_ids.append(self._service_id(service))
+
+    def nbytes(self):
+        """Approximate memory held by the column buffers, in bytes."""
+        return (
+            len(self._text)
+            + sum(column.itemsize * len(column) for column in (
+                self._offsets, self._starttimes, self._usages,
+                self._file_ids, self._service_ids,
+            ))
+        )
+
+
+def uses_record_batches():
+    """Whether parsed records are held in RecordBatches (RECORD_BATCHES)."""
+    return LOADER["record_batches"]
+
+
+def new_records(records=()):
+    """Collect records in the configured container: a list of dicts or a RecordBatch."""
+    if uses_record_batches():
+        return RecordBatch(records)
+    return list(records)
+
+
+def record_file_names(records):
+    """Return the distinct file names of records, in first-seen order."""
+    if hasattr(records, "file_names"):
+        return records.file_names()
+    return list(dict.fromkeys(record.get("file_name") for record in records))
+
+
+def batched_records(records, size):
+    """Yield chunks of at most size records, consuming records lazily.
+
+    Chunks are RecordBatches with RECORD_BATCHES=true, lists otherwise.
+    """
+    if not uses_record_batches():
+        iterator = iter(records)
+        while chunk := list(islice(iterator, size)):
+            yield chunk
+        return
+
+    batch = RecordBatch()
+    append_record = batch.append_record
+    for record in records:
+        append_record(record)
+        if len(batch) >= size:
+            yield batch
+            batch = RecordBatch()
+            append_record = batch.append_record
+    if batch:
+        yield batch
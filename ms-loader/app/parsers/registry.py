@@ -0,0 +1,132 @@
+import os
+
+from app.config.logger import logger
+from app.parsers.compression import split_compression
+from app.parsers.core import (
+    ParseStats,
+    RecordStructureError,
+    iter_valid_records,
+    log_summary,
+    report_file_stats,
+)
+from app.parsers.dead_letter import close_dead_letter, open_dead_letter
+from app.parsers.records import new_records
+from app.validation.file_validator import ALLOWED_EXTENSIONS, validate_file
+
+_parsers = {}
+
+
+class ParserSpec:
+    """How to read one file format.
+
+    read_records(filepath) yields (number, raw_record) pairs; everything
+    after that (validation, transformation, reject reporting) is shared.
+    A format can replace the whole per-file iterator with iterate, or the
+    whole list-returning parse with parse, when it needs more than a plain
+    record reader. decode_errors are the exceptions that mean the file
+    itself is malformed; they are logged as "<kind> parse error".
+    """
+
+    def __init__(self, kind, read_records, label="Record", normalize_service=False,
+                 decode_errors=(), iterate=None, parse=None):
+        self.kind = kind
+        self.read_records = read_records
+        self.label = label
+        self.normalize_service = normalize_service
+        self.decode_errors = tuple(decode_errors)
+        self.iterate = iterate
+        self.parse = parse
+
+
+def register_parser(extensions, spec):
+    """Register spec for each extension (with the leading dot, lower case)."""
+    for ext in extensions:
+        _parsers[ext] = spec
+        ALLOWED_EXTENSIONS.add(ext)
+    return spec
+
+
+def get_parser(ext):
+    """Return the ParserSpec registered for ext, or None."""
+    return _parsers.get(ext)
+
+
+def registered_extensions():
+    """Return the registered extensions in registration order."""
+    return list(_parsers)
+
+
+def extension_of(filepath):
+    """Return the lower-cased format extension of filepath.
+
+    Any compression suffix is ignored.
+    """
+    base, _ = split_compression(filepath)
+    return os.path.splitext(base.lower())[1]
+
+
+def read_valid_records(filepath, ext=None):
+    """Yield the valid, transformed records of filepath using its registered reader."""
+    spec = _parsers[ext or extension_of(filepath)]
+    if not validate_file(filepath):
+        return
+
+    file_name = os.path.basename(filepath)
+    logger.info(f"Parsing {spec.kind} file: {file_name}")
+
+    dead_letter = open_dead_letter(file_name)
+    stats = ParseStats(dead_letter=dead_letter)
+    try:
+        yield from iter_valid_records(
+            spec.read_records(filepath), file_name,
+            normalize_service=spec.normalize_service, stats=stats,
+        )
+    except RecordStructureError:
+        logger.error(
+            f"Invalid {spec.kind} structure in {file_name}. "
+            "Expected list or object with 'records' key"
+        )
+        return
+    finally:
+        close_dead_letter(dead_letter)
+
+    log_summary(spec.kind, file_name, stats, spec.label)
+    report_file_stats(file_name, stats)
+
+
+def iter_file_records(filepath, ext=None):
+    """Return a lazy iterator over the valid records of a supported file."""
+    ext = ext or extension_of(filepath)
+    spec = _parsers[ext]
+    if spec.iterate is not None:
+        return spec.iterate(filepath)
+    return read_valid_records(filepath, ext)
+
+
+def parse_records(filepath, ext=None):
+    """Return the valid records of filepath (see new_records).
+
+    Errors are logged and give no records.
+    """
+    ext = ext or extension_of(filepath)
+    spec = _parsers[ext]
+    file_name = os.path.basename(filepath)
+    try:
+        return new_records(iter_file_records(filepath, ext))
+    except spec.decode_errors as e:
+        logger.error(f"{spec.kind} parse error in {file_name}: {str(e)}")
+        return new_records()
+    except Exception as e:
+        logger.error(f"Error parsing {spec.kind} file {file_name}: {str(e)}")
+        return new_records()
+
+
+def parse_file(filepath, ext=None):
+    """Parse a single supported file with the parser registered for its extension."""
+    ext = ext or extension_of(filepath)
+    spec = _parsers.get(ext)
+    if spec is None:
+        return new_records()
+    if spec.parse is not None:
+        return spec.parse(filepath)
+    return parse_records(filepath, ext)
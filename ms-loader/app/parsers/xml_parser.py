@@ -1,90 +1,62 @@
 import xml.etree.ElementTree as ET
-import os
-from datetime import datetime
-from app.config.logger import logger
-from app.validation.file_validator import validate_file, validate_record
+from app.parsers.compression import open_input
+from app.parsers.registry import (
+    ParserSpec,
+    parse_records,
+    read_valid_records,
+    register_parser,
+)
 
 
-def transform_record(record, file_name):
-    """Transform and validate a single record."""
-    try:
-        return {
-            "file_name": file_name,  
-            "source": record.get("source"),
-            "destination": record.get("destination"),
-            "starttime": datetime.fromisoformat(record.get("starttime")),
-            "service": record.get("service"),
-            "usage": float(record.get("usage")),
-        }
-    except (ValueError, TypeError) as e:
-        logger.error(f"Error transforming record {record}: {str(e)}")
-        return None
+def iter_record_elements(filepath, tag='record'):
+    """Yield each <record> element of an XML file as soon as it is complete.
+
+    Matches root.findall('.//record') without building the whole tree:
+    every element outside a record is cleared and detached once it ends,
+    so memory stays flat however large the file is. A yielded element is
+    only valid until the next one is requested.
+    """
+    with open_input(filepath) as xmlfile:
+        yield from _iter_record_elements(xmlfile, tag)
+
+
+def _iter_record_elements(xmlfile, tag):
+    stack = []
+    open_records = 0
+    for event, elem in ET.iterparse(xmlfile, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == tag and len(stack) > 1:
+                open_records += 1
+            continue
+
+        stack.pop()
+        if not stack:
+            break
+        if elem.tag == tag:
+            open_records -= 1
+            yield elem
+        if open_records == 0:
+            elem.clear()
+            stack[-1].remove(elem)
+
+
+def read_xml_records(filepath):
+    """Yield (index, record) with each <record>'s children mapped tag -> text."""
+    for index, record_elem in enumerate(iter_record_elements(filepath), 1):
+        yield index, {child.tag: child.text for child in record_elem}
+
+
+def iter_xml(filepath):
+    """Yield validated, transformed records from an XML file one at a time."""
+    return read_valid_records(filepath, '.xml')
 
 
 def parse_xml(filepath):
     """Parse XML file with validation."""
-    # First validate the file itself
-    if not validate_file(filepath):
-        return []
-    
-    file_name = os.path.basename(filepath)
-    logger.info(f"Parsing XML file: {file_name}")
-    
-    valid_records = []
-    invalid_records = []
-    
-    try:
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        
-        # Find all record elements (adjust based on your XML structure)
-        record_elements = root.findall('.//record')
-        
-        for index, record_elem in enumerate(record_elements):
-            # Convert XML element to dictionary
-            record = {}
-            for child in record_elem:
-                record[child.tag] = child.text
-            
-            # Validate the raw record first
-            is_valid, validation_errors = validate_record(record)
-            
-            if is_valid:
-                # Transform the record if validation passes
-                transformed_record = transform_record(record, file_name)
-                if transformed_record:
-                    valid_records.append(transformed_record)
-                else:
-                    logger.warning(f"Record {index + 1} in {file_name}: Failed to transform record")
-                    invalid_records.append({
-                        "index": index + 1,
-                        "record": record,
-                        "errors": ["Failed to transform record"]
-                    })
-            else:
-                # Log validation errors
-                logger.warning(f"Record {index + 1} in {file_name}: Validation failed - {', '.join(validation_errors)}")
-                invalid_records.append({
-                    "index": index + 1,
-                    "record": record,
-                    "errors": validation_errors
-                })
-    
-    except ET.ParseError as e:
-        logger.error(f"XML parse error in {file_name}: {str(e)}")
-        return []
-    except Exception as e:
-        logger.error(f"Error parsing XML file {file_name}: {str(e)}")
-        return []
-    
-    logger.info(f"Finished parsing XML file: {file_name}. Valid: {len(valid_records)}, Invalid: {len(invalid_records)}")
-    
+    return parse_records(filepath, '.xml')
+
 
-    if invalid_records:
-        logger.warning(f"Invalid records in {file_name}:")
-        for invalid in invalid_records[:5]:
-            logger.warning(f"  Record {invalid['index']}: {', '.join(invalid['errors'])}")
-        if len(invalid_records) > 5:
-            logger.warning(f"  ... and {len(invalid_records) - 5} more invalid records")
-    
-    return valid_records
\ No newline at end of file
+register_parser(
+    ['.xml'], ParserSpec("XML", read_xml_records, decode_errors=[ET.ParseError])
+)
@@ -0,0 +1,2 @@
+from .streaming import chunked, stream_directory
+from .async_pipeline import AsyncPipeline, run_async_pipeline
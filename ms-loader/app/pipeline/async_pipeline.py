@@ -0,0 +1,194 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from app.config import LOADER
+from app.config.logger import logger
+from app.db.database import save_file_stream
+from app.messaging.outbox_relay import get_relay
+from app.metrics.pipeline import observe_parsed_file
+from app.parsers import iter_supported_files
+from app.parsers.compression import add_input_stats, collect_input_stats
+from app.parsers.core import collect_file_stats
+from app.pipeline.streaming import (
+    file_chunks,
+    log_stream_summary,
+    new_stream_summary,
+    record_file_error,
+    record_file_outcome,
+    require_outbox,
+)
+
+# Ends a file's chunk queue
+_END = object()
+
+
+class _FileWork:
+    """One file moving through the stages: its chunk queue and progress."""
+
+    def __init__(self, filename, queue_size):
+        self.filename = filename
+        self.chunks = asyncio.Queue(maxsize=queue_size)
+        # Filled by save_file_stream
+        self.counts = {}
+        # Set by the writer once it stops taking chunks, so parsing stops early
+        self.cancelled = False
+        # Set once _END has been taken from chunks
+        self.ended = False
+
+
+def _open_file(filepath, ext, chunk_size):
+    """Start parsing a file.
+
+    Runs on the parse thread, where the stats collectors live.
+    """
+    stack = ExitStack()
+    input_stats = stack.enter_context(collect_input_stats())
+    file_stats = stack.enter_context(collect_file_stats())
+    return stack, input_stats, file_stats, file_chunks(filepath, ext, chunk_size)
+
+
+class AsyncPipeline:
+    """Parse and load files with both stages running at once.
+
+    The stages are asyncio tasks, but the I/O is not async: each task hands
+    its blocking calls to a thread of its own through run_in_executor, one
+    for parsing and one for psycopg2. Chunks move between the stages through
+    a bounded queue, so chunk N+1 of a file is parsed while chunk N is
+    written. Every file is loaded in one transaction by save_file_stream,
+    with its Kafka messages in the outbox. The outbox relay publishes them
+    with the blocking confluent_kafka producer once the transaction commits.
+    """
+
+    def __init__(
+        self, directory, chunk_size=None, files=None, manifest=None, queue_size=None
+    ):
+        self.directory = directory
+        self.chunk_size = chunk_size or LOADER["chunk_size"]
+        self.files = files
+        self.manifest = manifest
+        self.queue_size = queue_size or LOADER["async_queue_size"]
+        self.summary = new_stream_summary()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        file_queue = asyncio.Queue(maxsize=self.queue_size)
+        executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cdr-{stage}")
+            for stage in ("parse", "db")
+        ]
+        self.parse_executor, self.db_executor = executors
+        try:
+            await asyncio.gather(
+                self._parse_stage(file_queue), self._write_stage(file_queue)
+            )
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+        return self.summary
+
+    async def _parse_stage(self, file_queue):
+        files = self.files
+        if files is None:
+            files = iter_supported_files(self.directory)
+        for filename, filepath, ext in files:
+            self.summary["files_processed"] += 1
+            work = _FileWork(filename, self.queue_size)
+            await file_queue.put(work)
+            await self._parse_file(work, filepath, ext)
+        await file_queue.put(None)
+
+    async def _parse_file(self, work, filepath, ext):
+        run = self.loop.run_in_executor
+        stack = chunks = None
+        try:
+            stack, input_stats, file_stats, chunks = await run(
+                self.parse_executor, _open_file, filepath, ext, self.chunk_size,
+            )
+            while not work.cancelled:
+                chunk = await run(self.parse_executor, next, chunks, None)
+                if chunk is None:
+                    break
+                await work.chunks.put(chunk)
+        except Exception as e:
+            # The writer raises it inside the file's transaction, rolling it back
+            await work.chunks.put(e)
+        finally:
+            if chunks is not None and hasattr(chunks, "close"):
+                # Lets a file the writer gave up on close its reader
+                # and dead-letter output
+                await run(self.parse_executor, chunks.close)
+            if stack is not None:
+                await run(self.parse_executor, stack.close)
+            await work.chunks.put(_END)
+        if stack is not None:
+            for file_name, stats in file_stats:
+                observe_parsed_file(file_name, stats, filepath)
+            add_input_stats(
+                self.summary["compression"],
+                [stats.as_dict() for stats in input_stats],
+            )
+
+    def _chunks_from(self, work):
+        """Blocking iterator over work's chunk queue.
+
+        Consumed by save_file_stream on the db thread.
+        """
+        while True:
+            get = asyncio.run_coroutine_threadsafe(work.chunks.get(), self.loop)
+            item = get.result()
+            if item is _END:
+                work.ended = True
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def _write_stage(self, file_queue):
+        while (work := await file_queue.get()) is not None:
+            try:
+                written = await self.loop.run_in_executor(
+                    self.db_executor,
+                    lambda: save_file_stream(
+                        work.filename, self._chunks_from(work),
+                        outbox=True, counts=work.counts,
+                    ),
+                )
+            except Exception as e:
+                record_file_error(self.summary, work.filename, e)
+                continue
+            finally:
+                # Skipped or failed files stop parsing;
+                # drain what is left so the parser never blocks
+                work.cancelled = True
+                while not work.ended:
+                    work.ended = await work.chunks.get() is _END
+
+            if written:
+                get_relay().wake()
+            record_file_outcome(
+                self.summary, work.filename, written, self.manifest,
+                duplicates=work.counts.get("duplicates", 0),
+            )
+
+
+def run_async_pipeline(
+    directory, chunk_size=None, files=None, manifest=None, queue_size=None
+):
+    """Parse and load every supported file with the stages overlapped.
+
+    Arguments and the returned summary are those of stream_directory.
+    Requires KAFKA_PUBLISH_MODE=outbox, as streaming mode does.
+    """
+    require_outbox("async")
+    if not os.path.exists(directory):
+        logger.error(f"Directory does not exist: {directory}")
+        return {"error": "Directory not found", "files_processed": 0}
+
+    pipeline = AsyncPipeline(directory, chunk_size, files, manifest, queue_size)
+    summary = asyncio.run(pipeline.run())
+    if manifest is not None:
+        manifest.save()
+    log_stream_summary(summary, mode="Async pipeline")
+    return summary
@@ -0,0 +1,161 @@
+import os
+from itertools import islice
+
+from app.config import LOADER
+from app.config.logger import logger
+from app.db.database import save_file_stream, uses_outbox
+from app.messaging.outbox_relay import get_relay
+from app.metrics.pipeline import observe_parsed_file
+from app.parsers import iter_file_records, iter_supported_files, new_validation_summary
+from app.parsers.columnar import iter_csv_frames
+from app.parsers.compression import add_input_stats, collect_input_stats
+from app.parsers.core import collect_file_stats
+from app.parsers.records import batched_records
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items, consuming iterable lazily."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def require_outbox(mode):
+    """Refuse to run mode unless Kafka messages go through the outbox.
+
+    A file is written chunk by chunk in one transaction, so chunks published
+    directly could be sent before a rollback and sent again on the retry.
+    """
+    if not uses_outbox():
+        raise ValueError(
+            f"PIPELINE_MODE={mode} requires KAFKA_PUBLISH_MODE=outbox"
+        )
+
+
+def file_chunks(filepath, ext, chunk_size):
+    """Yield one file's records in chunks.
+
+    CSV files come as columnar frames with CSV_ENGINE=columnar.
+    """
+    if ext == '.csv' and LOADER["csv_engine"] == "columnar":
+        return iter_csv_frames(filepath, chunk_size)
+    return batched_records(iter_file_records(filepath), chunk_size)
+
+
+def record_file_error(validation_summary, filename, error):
+    validation_summary["invalid_files"] += 1
+    validation_summary["processing_errors"].append({
+        "filename": filename,
+        "error": f"Processing error: {str(error)}"
+    })
+    logger.error(f"Error processing file {filename}: {str(error)}")
+
+
+def new_stream_summary():
+    """Return an empty summary for a streaming or async run."""
+    validation_summary = new_validation_summary()
+    validation_summary["skipped_files"] = 0
+    validation_summary["duplicate_files"] = 0
+    return validation_summary
+
+
+def record_file_outcome(
+    validation_summary, filename, written, manifest=None, duplicates=0
+):
+    """Count a file loaded by save_file_stream in the summary.
+
+    written is the number of rows written, or None if the file was skipped.
+    A file with no rows written is rejected, unless its valid records were
+    all duplicates of loaded ones: it then committed and counts as processed.
+    """
+    all_duplicates = written == 0 and duplicates > 0
+    if manifest is not None:
+        rejected = written == 0 and not all_duplicates
+        manifest.mark(filename, "rejected" if rejected else "processed")
+
+    if written is None:
+        validation_summary["skipped_files"] += 1
+    elif written:
+        validation_summary["valid_files"] += 1
+        validation_summary["total_valid_records"] += written
+        logger.info(f"Successfully processed {filename}: {written} valid records")
+    elif all_duplicates:
+        validation_summary["duplicate_files"] += 1
+        logger.info(f"All {duplicates} records in {filename} were already loaded")
+    else:
+        validation_summary["invalid_files"] += 1
+        validation_summary["files_with_errors"].append({
+            "filename": filename,
+            "error": "No valid records found"
+        })
+        logger.warning(f"No valid records found in {filename}")
+
+
+def log_stream_summary(validation_summary, mode="Streaming"):
+    files_processed = validation_summary['files_processed']
+    logger.info(f"{mode} complete - Files processed: {files_processed}, "
+                f"Valid files: {validation_summary['valid_files']}, "
+                f"Skipped files: {validation_summary['skipped_files']}, "
+                f"Duplicate files: {validation_summary['duplicate_files']}, "
+                f"Invalid files: {validation_summary['invalid_files']}, "
+                f"Total valid records: {validation_summary['total_valid_records']}")
+
+
+def stream_directory(directory, chunk_size=None, files=None, manifest=None):
+    """Parse, load and publish every supported file one chunk at a time.
+
+    Only one chunk per file is held in memory. Each file is still loaded in
+    a single transaction, and its Kafka messages commit to the outbox in
+    that transaction for the relay to publish afterwards, so nothing is
+    published for a file that rolls back. Raises ValueError unless
+    KAFKA_PUBLISH_MODE=outbox.
+    files and manifest work as in scheduler.job: only the given files are
+    handled, and each outcome is recorded in the manifest.
+    Returns a validation summary shaped like the one from parse_all_files.
+    """
+    require_outbox("streaming")
+    chunk_size = chunk_size or LOADER["chunk_size"]
+    if not os.path.exists(directory):
+        logger.error(f"Directory does not exist: {directory}")
+        return {"error": "Directory not found", "files_processed": 0}
+
+    validation_summary = new_stream_summary()
+
+    if files is None:
+        files = iter_supported_files(directory)
+
+    for filename, filepath, ext in files:
+        validation_summary["files_processed"] += 1
+        chunks = file_chunks(filepath, ext, chunk_size)
+        counts = {}
+        try:
+            with collect_input_stats() as input_stats, \
+                    collect_file_stats() as file_stats:
+                written = save_file_stream(
+                    filename, chunks, outbox=True, counts=counts
+                )
+            for file_name, stats in file_stats:
+                observe_parsed_file(file_name, stats, filepath)
+            add_input_stats(
+                validation_summary["compression"],
+                [stats.as_dict() for stats in input_stats],
+            )
+            if written:
+                get_relay().wake()
+        except Exception as e:
+            record_file_error(validation_summary, filename, e)
+            continue
+
+        record_file_outcome(
+            validation_summary, filename, written, manifest,
+            duplicates=counts.get("duplicates", 0),
+        )
+
+    if manifest is not None:
+        manifest.save()
+
+    log_stream_summary(validation_summary)
+    return validation_summary
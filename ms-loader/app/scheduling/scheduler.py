@@ -1,16 +1,67 @@
 import time
 import schedule
-from app.db.database import save_to_postgres
+from app.db.database import get_pool, save_to_postgres, uses_outbox, uses_rollups
+from app.db.manifest import get_manifest
+from app.db.outbox import create_outbox_table, purge_sent
+from app.db.fingerprints import create_fingerprint_table
+from app.db.partitions import (
+    create_partitions,
+    drop_expired_partitions,
+    start_partitioning,
+)
+from app.db.rollups import create_rollup_tables, start_rollup_backfill
+from app.dedup import get_deduplicator, uses_dedup
 from app.messaging.kafka_producer import publish_to_kafka
+from app.messaging.outbox_relay import get_relay
+from app.config import KAFKA, LOADER, METRICS, POSTGRES
 from app.config.logger import logger
+from app.metrics.pipeline import CYCLE_SECONDS, QUEUE_DEPTH
+from app.metrics.server import start_metrics_server
 from app.parsers import parse_all_files
+from app.parsers.records import new_records, record_file_names
+from app.pipeline.async_pipeline import run_async_pipeline
+from app.pipeline.streaming import require_outbox, stream_directory
+from app.parsers import iter_supported_files
+from app.scheduling.watcher import DirectoryWatcher
+from app.scheduling.work_queue import WorkQueue
 
 
-def job():
+def job(files=None, checked=False):
+    """Run one ETL pass over the CDR directory, or only over the given files.
+
+    checked means the files already went through the manifest.
+    """
+    started = time.perf_counter()
+    try:
+        _run_job(files, checked)
+    finally:
+        CYCLE_SECONDS.labels(mode=LOADER["pipeline_mode"]).observe(
+            time.perf_counter() - started
+        )
+
+
+def _run_job(files, checked):
     print("Running ETL job...")
-    cdr_directory = "./cdr_files"
+    cdr_directory = LOADER["cdr_directory"]
+    manifest = get_manifest()
+    if manifest and not checked:
+        files = manifest.scan(cdr_directory) if files is None else manifest.check(files)
+
+    if LOADER["pipeline_mode"] in ("streaming", "async"):
+        if LOADER["pipeline_mode"] == "async":
+            run_pipeline = run_async_pipeline
+        else:
+            run_pipeline = stream_directory
+        validation_summary = run_pipeline(cdr_directory, files=files, manifest=manifest)
+        logger.info(f"Validation Summary: {validation_summary}")
+        logger.info(f"PostgreSQL pool stats: {get_pool().stats()}")
+        return
 
-    valid_records, validation_summary = parse_all_files(cdr_directory)
+    valid_records, validation_summary = parse_all_files(cdr_directory, files=files)
+    if manifest:
+        for file_error in validation_summary.get("files_with_errors", []):
+            manifest.mark(file_error["filename"], "rejected")
+        manifest.save()
 
     # Log validation summary
     logger.info(f"Validation Summary: {validation_summary}")
@@ -25,17 +76,165 @@ def job():
 
     logger.info(f"Processing {len(valid_records)} valid records")
 
-    if save_to_postgres(valid_records):
+    # With dedup only the records actually loaded are published
+    loaded = new_records() if uses_dedup() else None
+    on_written = loaded.extend if loaded is not None else None
+    if save_to_postgres(valid_records, on_written=on_written):
         logger.info("Records saved to PostgreSQL")
-        publish_to_kafka(valid_records)
-        logger.info("Records published to Kafka")
+        if manifest:
+            for file_name in record_file_names(valid_records):
+                manifest.mark(file_name, "processed")
+            manifest.save()
+        if uses_outbox():
+            get_relay().wake()
+            logger.info("Kafka messages committed to the outbox for relaying")
+        else:
+            published = valid_records if loaded is None else loaded
+            delivery_counts = publish_to_kafka(published)
+            logger.info(f"Records published to Kafka: {delivery_counts}")
     else:
         logger.error("Failed to save records to PostgreSQL")
 
+    logger.info(f"PostgreSQL pool stats: {get_pool().stats()}")
+
+
+def process_file(work_item):
+    """Queue handler: run the ETL job for one (filename, filepath, ext) item."""
+    job(files=[work_item], checked=True)
+
+
+def enqueue_files(work_queue, files=None):
+    """Submit pending CDR files to the work queue, skipping busy ones.
+
+    Without files, the whole directory is scanned. Files already queued or
+    being handled are left out before the manifest hashes anything.
+    """
+    manifest = get_manifest()
+    busy = work_queue.claimed_keys()
+    if files is None:
+        cdr_directory = LOADER["cdr_directory"]
+        if manifest:
+            files = manifest.scan(cdr_directory, skip=busy)
+        else:
+            files = list(iter_supported_files(cdr_directory))
+    elif manifest:
+        files = manifest.check([item for item in files if item[0] not in busy])
+
+    queued = sum(1 for item in files if work_queue.submit(item[0], item))
+    if queued < len(files):
+        logger.info(
+            f"Queued {queued} of {len(files)} files, "
+            "the rest are busy or the queue is full"
+        )
+    return queued
+
+
+def start_outbox_relay():
+    """Create cdr_outbox if needed and start relaying it to Kafka in the background."""
+    create_outbox_table()
+    relay = get_relay()
+    relay.start()
+    schedule.every(60).seconds.do(
+        lambda: logger.info(f"Outbox relay stats: {relay.stats()}")
+    )
+    schedule.every(1).hours.do(lambda: purge_sent(KAFKA["outbox_retention_hours"]))
+    return relay
+
+
+def start_dedup():
+    """Create cdr_fingerprints if needed and load the dedup filter.
+
+    The filter is saved every minute.
+    """
+    create_fingerprint_table()
+    deduplicator = get_deduplicator()
+    deduplicator.load_filter()
+    schedule.every(60).seconds.do(deduplicator.save)
+    schedule.every(60).seconds.do(
+        lambda: logger.info(f"Dedup stats: {deduplicator.stats()}")
+    )
+    return deduplicator
+
+
+def manage_partitions():
+    """Partition cdrs by POSTGRES_PARTITIONING.
+
+    Partitions are made ahead and expired daily.
+    """
+    period = POSTGRES["partitioning"]
+    if not start_partitioning(period, POSTGRES["partition_premake"]):
+        return False
+    schedule.every(1).days.do(
+        lambda: create_partitions(period, POSTGRES["partition_premake"])
+    )
+    if POSTGRES["partition_retention"] > 0:
+        def expire():
+            drop_expired_partitions(
+                period,
+                POSTGRES["partition_retention"],
+                purge_default=POSTGRES["partition_purge_default"],
+            )
+
+        expire()
+        schedule.every(1).days.do(expire)
+    return True
+
 
 def run():
-    schedule.every(30).seconds.do(job)
+    if LOADER["pipeline_mode"] in ("streaming", "async"):
+        require_outbox(LOADER["pipeline_mode"])
+    if METRICS["port"]:
+        start_metrics_server(METRICS["port"], METRICS["host"])
+    schedule.every(60).seconds.do(lambda: get_pool().health_check())
+
+    if POSTGRES["partitioning"] != "off":
+        manage_partitions()
+    if uses_rollups() and create_rollup_tables():
+        start_rollup_backfill()
+    if uses_dedup():
+        start_dedup()
+    if uses_outbox():
+        start_outbox_relay()
+
+    if LOADER["queue_workers"] > 0:
+        work_queue = WorkQueue(
+            process_file,
+            workers=LOADER["queue_workers"],
+            max_size=LOADER["queue_max_size"],
+            slow_item_seconds=LOADER["queue_slow_item_seconds"],
+            name="cdr",
+        )
+        work_queue.start()
+        QUEUE_DEPTH.set_function(lambda: work_queue.stats()["depth"])
+        schedule.every(60).seconds.do(
+            lambda: logger.info(f"Work queue stats: {work_queue.stats()}")
+        )
+
+        def on_files(files):
+            enqueue_files(work_queue, files)
+
+        def on_tick():
+            enqueue_files(work_queue)
+    else:
+        def on_files(files):
+            job(files=files)
+
+        on_tick = job
+
+    if LOADER["watch_mode"] in ("inotify", "poll"):
+        watcher = DirectoryWatcher(
+            LOADER["cdr_directory"],
+            on_files=on_files,
+            mode=LOADER["watch_mode"],
+            debounce=LOADER["watch_debounce"],
+            poll_interval=LOADER["watch_poll_interval"],
+            rescan_interval=LOADER["watch_rescan_interval"],
+        )
+        watcher.run(idle=schedule.run_pending)
+        return
+
+    schedule.every(30).seconds.do(on_tick)
     logger.info("Scheduler started - running every 30 seconds")
     while True:
         schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+        time.sleep(1)
@@ -0,0 +1,171 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from app.config.logger import logger
+from app.parsers import iter_supported_files, supported_extension
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class Inotify:
+    """Minimal inotify binding for a single directory, via libc and ctypes."""
+
+    def __init__(self, directory, mask=WATCH_MASK):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed: {os.strerror(errno)}")
+
+    def read(self, timeout):
+        """Return [(mask, filename)] for events within timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """Hand new CDR files to on_files as soon as they are complete.
+
+    In "inotify" mode files are picked up when they are closed after writing
+    or moved into the directory; "poll" mode (also the fallback when inotify
+    is unavailable) lists the directory every poll_interval seconds. A file
+    is only handed over once its size and mtime have not changed for
+    debounce seconds. Every rescan_interval seconds the whole directory is
+    offered again so that files whose processing failed are retried.
+    """
+
+    def __init__(self, directory, on_files, mode="inotify", debounce=2.0,
+                 poll_interval=1.0, rescan_interval=300.0):
+        self.directory = directory
+        self.on_files = on_files
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self._pending = {}
+        self._seen = {}
+        self._inotify = None
+        self._stopped = False
+        self._last_rescan = time.monotonic()
+
+        if mode == "inotify":
+            try:
+                self._inotify = Inotify(directory)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable ({e}), falling back to polling")
+        self.mode = "inotify" if self._inotify else "poll"
+        self.rescan()
+
+    def run(self, idle=None):
+        """Watch until stop() is called, calling idle() after every tick."""
+        logger.info(f"Watching {self.directory} for CDR files ({self.mode} mode)")
+        try:
+            while not self._stopped:
+                ready = self.poll_once()
+                if ready:
+                    self.on_files(ready)
+                if idle:
+                    idle()
+        finally:
+            if self._inotify:
+                self._inotify.close()
+
+    def stop(self):
+        self._stopped = True
+
+    def poll_once(self):
+        """Wait up to poll_interval for changes; return files ready to process."""
+        if self._inotify:
+            for mask, filename in self._inotify.read(self.poll_interval):
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning(
+                        "inotify event queue overflowed, rescanning directory"
+                    )
+                    self.rescan()
+                elif supported_extension(filename):
+                    self._touch(filename)
+        else:
+            time.sleep(self.poll_interval)
+            self._poll_directory()
+
+        if time.monotonic() - self._last_rescan >= self.rescan_interval:
+            self.rescan()
+
+        return self._collect_ready()
+
+    def rescan(self):
+        """Queue every supported file currently in the directory."""
+        self._last_rescan = time.monotonic()
+        for filename, _, _ in iter_supported_files(self.directory):
+            self._touch(filename, force=True)
+
+    def _poll_directory(self):
+        for filename, filepath, _ in iter_supported_files(self.directory):
+            signature = self._signature(filepath)
+            if signature is not None and self._seen.get(filename) != signature:
+                self._touch(filename)
+
+    def _touch(self, filename, force=False):
+        signature = self._signature(os.path.join(self.directory, filename))
+        if signature is None:
+            return
+        if not force and filename not in self._pending \
+                and self._seen.get(filename) == signature:
+            return
+        pending = self._pending.get(filename)
+        if pending is None or pending[0] != signature:
+            self._pending[filename] = (signature, time.monotonic())
+
+    def _collect_ready(self):
+        ready = []
+        now = time.monotonic()
+        for filename, (signature, changed_at) in list(self._pending.items()):
+            filepath = os.path.join(self.directory, filename)
+            current = self._signature(filepath)
+            if current is None:
+                del self._pending[filename]
+            elif current != signature:
+                self._pending[filename] = (current, now)
+            elif now - changed_at >= self.debounce:
+                del self._pending[filename]
+                self._seen[filename] = current
+                ready.append((filename, filepath, supported_extension(filename)))
+        return ready
+
+    @staticmethod
+    def _signature(filepath):
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+
+from app.config.logger import logger
+
+
+class WorkQueue:
+    """Bounded queue of work items handled by a fixed set of worker threads.
+
+    Items are submitted under a key (the filename for CDR files). A key that
+    is already queued or being handled is refused, so the same file is never
+    processed twice at the same time. When ``max_size`` items are waiting,
+    further submissions are refused and picked up again on a later scan.
+
+    Each handler runs on its worker thread, so no more than ``workers``
+    handlers ever run at once and the connection pool sized for them is never
+    exceeded. A handler still running after ``slow_item_seconds`` is only
+    reported: it is logged and counted as slow, but it cannot be interrupted
+    and keeps its worker and its key until it returns.
+    """
+
+    def __init__(
+        self, handler, workers=1, max_size=1000, slow_item_seconds=None,
+        name="work",
+    ):
+        if workers < 1:
+            raise ValueError(f"Invalid worker count: {workers}")
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.slow_item_seconds = slow_item_seconds or None
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_size)
+        self._claimed = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopped = threading.Event()
+        self._stats = {
+            "submitted": 0,
+            "duplicates": 0,
+            "dropped": 0,
+            "completed": 0,
+            "failed": 0,
+            "slow": 0,
+            "running": 0,
+            "max_depth": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "run_seconds": 0.0,
+            "max_run_seconds": 0.0,
+        }
+
+    def start(self):
+        """Start the worker threads."""
+        for index in range(self.workers - len(self._threads)):
+            thread = threading.Thread(
+                target=self._work, name=f"{self.name}-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            f"Started {self.workers} {self.name} workers "
+            f"(queue size {self.max_size})"
+        )
+
+    def submit(self, key, item):
+        """Queue an item; return False if its key is busy or the queue is full."""
+        with self._lock:
+            if key in self._claimed:
+                self._stats["duplicates"] += 1
+                return False
+            try:
+                self._queue.put_nowait((key, item, time.monotonic()))
+            except queue.Full:
+                self._stats["dropped"] += 1
+                return False
+            self._claimed.add(key)
+            self._stats["submitted"] += 1
+            stats = self._stats
+            stats["max_depth"] = max(stats["max_depth"], self._queue.qsize())
+        return True
+
+    def claimed_keys(self):
+        """Return the keys currently queued or being handled."""
+        with self._lock:
+            return set(self._claimed)
+
+    def join(self):
+        """Block until every queued item has been handled."""
+        self._queue.join()
+
+    def stop(self, wait=True):
+        """Stop the workers after the items they are currently handling."""
+        self._stopped.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def stats(self):
+        """Return a snapshot of queue depth, wait time and outcome counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["depth"] = self._queue.qsize()
+            snapshot["claimed"] = len(self._claimed)
+        handled = snapshot["completed"] + snapshot["failed"]
+        snapshot["avg_wait_seconds"] = (
+            snapshot["wait_seconds"] / handled if handled else 0.0
+        )
+        return snapshot
+
+    def _work(self):
+        while not self._stopped.is_set():
+            try:
+                key, item, queued_at = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                waited = time.monotonic() - queued_at
+                with self._lock:
+                    stats = self._stats
+                    stats["wait_seconds"] += waited
+                    stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+                    stats["running"] += 1
+                self._handle(key, item)
+            finally:
+                self._queue.task_done()
+
+    def _handle(self, key, item):
+        timer = None
+        if self.slow_item_seconds is not None:
+            timer = threading.Timer(self.slow_item_seconds, self._report_slow, (key,))
+            timer.daemon = True
+            timer.start()
+        started = time.monotonic()
+        try:
+            self.handler(item)
+            status = "completed"
+        except Exception as e:
+            logger.error(f"Error handling {self.name} item {key}: {e}")
+            status = "failed"
+        finally:
+            if timer is not None:
+                timer.cancel()
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self._stats
+            stats[status] += 1
+            stats["running"] -= 1
+            stats["run_seconds"] += elapsed
+            stats["max_run_seconds"] = max(stats["max_run_seconds"], elapsed)
+            self._claimed.discard(key)
+
+    def _report_slow(self, key):
+        with self._lock:
+            self._stats["slow"] += 1
+        logger.warning(
+            f"{self.name} item {key} still running after {self.slow_item_seconds}s"
+        )
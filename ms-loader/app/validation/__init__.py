@@ -1 +1,2 @@
 from .file_validator import *
+from .engine import RecordValidator
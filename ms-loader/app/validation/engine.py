@@ -0,0 +1,192 @@
+from datetime import datetime
+import urllib.parse
+
+from app.validation.file_validator import (
+    PHONE_PATTERN,
+    REQUIRED_FIELDS,
+    SERVICE_TYPES,
+    URL_PATTERN,
+)
+
+PHONE_SERVICES = frozenset(['VOICE', 'SMS'])
+
+
+def _is_phone(value):
+    return PHONE_PATTERN.match(value) is not None
+
+
+def _is_url(value):
+    if URL_PATTERN.match(value):
+        return True
+    try:
+        parsed_url = urllib.parse.urlparse(value)
+    except ValueError:
+        return False
+    return bool(parsed_url.scheme and parsed_url.netloc)
+
+
+# Destination check per (upper-cased) service type
+DESTINATION_CHECKS = {
+    'VOICE': _is_phone,
+    'SMS': _is_phone,
+    'DATA': _is_url,
+}
+
+
+class RecordValidator:
+    """Validate CDR records with bounds and lookups computed once per batch.
+
+    Gives the same results as validate_record, except that "now" is read
+    once when the validator is built instead of for every row. Passing rows
+    go through is_valid without building any error messages.
+    """
+
+    def __init__(self, now=None):
+        self.now = now or datetime.now()
+        try:
+            self.ten_years_ago = self.now.replace(year=self.now.year - 10)
+        except ValueError:
+            # Feb 29: validate_record fails every string starttime in this case
+            self.ten_years_ago = None
+
+    def validate(self, record):
+        """Return (is_valid, errors) exactly like validate_record."""
+        if self.is_valid(record):
+            return True, []
+        errors = self.errors(record)
+        return len(errors) == 0, errors
+
+    def is_valid(self, record):
+        """Fast pass/fail check that never formats error messages."""
+        get = record.get
+        source = get('source')
+        destination = get('destination')
+        starttime = get('starttime')
+        service = get('service')
+        usage = get('usage')
+        for value in (source, destination, starttime, service, usage):
+            if value is None or value == '':
+                return False
+
+        if PHONE_PATTERN.match(source) is None:
+            return False
+
+        service = service.upper()
+        check_destination = DESTINATION_CHECKS.get(service)
+        if check_destination is None or not check_destination(destination):
+            return False
+
+        try:
+            usage = float(usage)
+        except (ValueError, TypeError):
+            return False
+        if usage < 0:
+            return False
+        if service == 'VOICE':
+            if usage > 1440:
+                return False
+        elif service == 'DATA':
+            if usage > 100000:
+                return False
+        elif usage != 1:
+            return False
+
+        if isinstance(starttime, str):
+            if self.ten_years_ago is None:
+                return False
+            try:
+                dt = datetime.fromisoformat(starttime.replace('Z', '+00:00'))
+                if dt > self.now or dt < self.ten_years_ago:
+                    return False
+            except (ValueError, TypeError):
+                return False
+
+        if source == destination and service in PHONE_SERVICES:
+            return False
+
+        return True
+
+    def errors(self, record):
+        """Build the full list of error messages for a record."""
+        errors = []
+
+        for field in REQUIRED_FIELDS:
+            value = record.get(field)
+            if value is None or value == '':
+                errors.append(f"Missing required field: {field}")
+
+        if errors:
+            return errors
+
+        if not PHONE_PATTERN.match(record['source']):
+            errors.append(f"Invalid source format: {record['source']}")
+
+        service = record['service'].upper()
+        check_destination = DESTINATION_CHECKS.get(service)
+        if check_destination is None:
+            errors.append(
+                f"Invalid service type: {record['service']}. "
+                f"Must be one of: {', '.join(SERVICE_TYPES)}"
+            )
+        else:
+            if not check_destination(record['destination']):
+                if service in PHONE_SERVICES:
+                    errors.append(
+                        f"Invalid destination format for {service}: "
+                        f"{record['destination']}. Should be a phone number."
+                    )
+                else:
+                    errors.append(
+                        f"Invalid URL format for DATA service: {record['destination']}"
+                    )
+
+            try:
+                usage = float(record['usage'])
+
+                if usage < 0:
+                    errors.append(f"Usage must be positive: {usage}")
+
+                if service == 'VOICE':
+                    if usage > 1440:
+                        errors.append(
+                            f"Voice call duration ({usage} minutes) "
+                            "exceeds reasonable limit"
+                        )
+
+                elif service == 'DATA':
+                    if usage > 100000:
+                        errors.append(
+                            f"Data usage ({usage} MB) exceeds reasonable limit"
+                        )
+
+                elif service == 'SMS':
+                    if usage != 1:
+                        errors.append(f"SMS usage must be exactly 1, got: {usage}")
+            except (ValueError, TypeError):
+                errors.append(f"Usage must be a number: {record['usage']}")
+
+        try:
+            if isinstance(record['starttime'], str):
+                dt = datetime.fromisoformat(record['starttime'].replace('Z', '+00:00'))
+
+                if dt > self.now:
+                    errors.append(
+                        f"StartTime cannot be in the future: {record['starttime']}"
+                    )
+
+                if self.ten_years_ago is None:
+                    raise ValueError("day is out of range for month")
+                if dt < self.ten_years_ago:
+                    errors.append(
+                        f"StartTime is unreasonably old: {record['starttime']}"
+                    )
+        except (ValueError, TypeError):
+            errors.append(f"Invalid datetime format: {record['starttime']}")
+
+        if record['source'] == record['destination'] and service in PHONE_SERVICES:
+            errors.append(
+                "Source and destination cannot be identical "
+                f"for {record['service']}"
+            )
+
+        return errors
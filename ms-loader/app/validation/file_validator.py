@@ -4,7 +4,9 @@ import re
 from app.config.logger import logger
 import urllib.parse
 
-ALLOWED_EXTENSIONS = {'.csv', '.json', '.xml', '.yaml'}
+ALLOWED_EXTENSIONS = {'.csv', '.json', '.ndjson', '.jsonl', '.xml', '.yaml'}
+# Filled in by app.parsers.compression with the codecs it can decode
+COMPRESSED_EXTENSIONS = set()
 REQUIRED_FIELDS = ['source', 'destination', 'starttime', 'service', 'usage']
 SERVICE_TYPES = ['VOICE', 'SMS', 'DATA']
 PHONE_PATTERN = re.compile(r'^\+?[1-9]\d{1,14}$')  
@@ -16,7 +18,10 @@ def validate_file(filepath):
         logger.error(f"File does not exist: {filepath}")
         return False
     
-    _, ext = os.path.splitext(filepath)
+    base, ext = os.path.splitext(filepath)
+    if ext.lower() in COMPRESSED_EXTENSIONS:
+        # e.g. calls.csv.gz: the format comes from the inner extension
+        _, ext = os.path.splitext(base)
     if ext.lower() not in ALLOWED_EXTENSIONS:
         logger.error(f"Unsupported file type: {ext}")
         return False
@@ -0,0 +1,7 @@
+"""Performance benchmarks for the CDR Loader Service.
+
+Run individual benchmarks as modules from the ms-loader directory, e.g.
+``python -m benchmarks.bench_validation --rows 1000000``. bench_micro and
+bench_pipeline generate their input with ``benchmarks.generator`` and write
+JSON results that ``python -m benchmarks.results`` compares.
+"""
@@ -0,0 +1,66 @@
+"""Compare memory held by record dicts with the array-backed RecordBatch."""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app.parsers.core import transform_record
+from app.parsers.records import RecordBatch
+from app.validation.engine import RecordValidator
+from benchmarks.bench_validation import synthetic_rows
+
+
+def valid_rows(count):
+    validator = RecordValidator()
+    rows = synthetic_rows(count, invalid_ratio=0)
+    return [row for row in rows if validator.is_valid(row)]
+
+
+def measure(build, rows):
+    """Return (retained bytes, seconds) for the structure build(rows) returns."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return retained, elapsed
+
+
+def as_dicts(rows):
+    return [transform_record(row, "cdr_20240115.csv") for row in rows]
+
+
+def as_batch(rows):
+    return RecordBatch(transform_record(row, "cdr_20240115.csv") for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = valid_rows(args.rows)
+    scale = 1_000_000 / len(rows)
+
+    dict_bytes, dict_seconds = measure(as_dicts, rows)
+    batch_bytes, batch_seconds = measure(as_batch, rows)
+
+    print(f"records: {len(rows)}")
+    print(
+        f"list of dicts: {dict_bytes * scale / 2**20:,.1f} MiB per million records "
+        f"({dict_seconds:.2f}s)"
+    )
+    print(
+        f"RecordBatch:   {batch_bytes * scale / 2**20:,.1f} MiB per million records "
+        f"({batch_seconds:.2f}s)"
+    )
+    print(f"reduction: {dict_bytes / batch_bytes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Micro-benchmarks: record validation and each parser's read and transform steps.
+
+    python -m benchmarks.bench_micro --rows 200000 --json results/micro.json
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from app.config.logger import logger
+from app.parsers import registry
+from app.parsers.core import transform_record
+from app.validation.engine import RecordValidator
+from app.validation.file_validator import validate_record
+from benchmarks.generator import FORMATS, generate_rows, write_file
+from benchmarks.results import measurement, write_results
+
+
+def best_of(repeat, function, *args):
+    """Return the fastest of repeat timed calls of function(*args)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_validation(rows, repeat):
+    validator = RecordValidator()
+
+    def check(validate):
+        def loop(rows):
+            for row in rows:
+                validate(row)
+        return loop
+
+    return {
+        "validate/validate_record": measurement(
+            best_of(repeat, check(validate_record), rows), len(rows)
+        ),
+        "validate/RecordValidator.validate": measurement(
+            best_of(repeat, check(validator.validate), rows), len(rows)
+        ),
+        "validate/RecordValidator.is_valid": measurement(
+            best_of(repeat, check(validator.is_valid), rows), len(rows)
+        ),
+    }
+
+
+def run_format(fmt, rows, directory, repeat):
+    """Time reading a generated file's raw records, then transforming them.
+
+    The records are transformed as the file's parser does.
+    """
+    path = write_file(directory, fmt, rows)
+    spec = registry.get_parser(f".{fmt}")
+    file_name = os.path.basename(path)
+
+    def read():
+        for _ in spec.read_records(path):
+            pass
+
+    raw_records = [record for _, record in spec.read_records(path)]
+
+    def transform(records):
+        for record in records:
+            transform_record(record, file_name, spec.normalize_service)
+
+    return {
+        f"read/{fmt}": measurement(
+            best_of(repeat, read), len(raw_records), bytes=os.path.getsize(path)
+        ),
+        f"transform/{fmt}": measurement(
+            best_of(repeat, transform, raw_records), len(raw_records)
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    rows, _ = generate_rows(args.rows, dirty_ratio=0.0, seed=args.seed)
+    results = run_validation(rows, args.repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in args.formats.split(","):
+            results.update(run_format(fmt, rows, directory, args.repeat))
+
+    for name, result in results.items():
+        print(f"{name:<40} {result['seconds']:>8.3f}s {result['rate']:>14,.0f} rows/s")
+    if args.json:
+        parameters = {k: v for k, v in vars(args).items() if k != "json"}
+        write_results(args.json, "micro", parameters, results)
+
+
+if __name__ == "__main__":
+    main()
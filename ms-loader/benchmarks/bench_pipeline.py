@@ -0,0 +1,174 @@
+"""End-to-end benchmark: parse_all_files, then the PostgreSQL load and Kafka publish.
+
+PostgreSQL and Kafka are replaced by local stand-ins that consume what the
+loader sends (COPY buffers, INSERT parameters, messages) without a server,
+so the numbers cover the loader's own work. In outbox mode (the default)
+the outbox rows are written inside save_to_postgres and the relay is not run;
+--publish-mode direct times publish_to_kafka as well.
+
+    python -m benchmarks.bench_pipeline --rows 100000 --dirty-ratio 0.05 \
+        --json results/pipeline.json
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from app.config import KAFKA
+from app.config.logger import logger
+from app.db import database
+from app.db.pool import ConnectionPool
+from app.messaging.kafka_producer import publish_to_kafka
+from app.parsers import parse_all_files
+from benchmarks.generator import FORMATS, generate_rows, parse_service_mix, write_file
+from benchmarks.results import measurement, write_results
+
+
+class LocalCursor:
+    """Accepts the loader's statements and reads COPY input to the end."""
+
+    def __init__(self):
+        self.copied_bytes = 0
+        self.statements = 0
+
+    def execute(self, sql, params=None):
+        self.statements += 1
+
+    def copy_expert(self, sql, file):
+        self.copied_bytes += len(file.read())
+
+    def fetchone(self):
+        # is_file_processed: never processed
+        return (False,)
+
+    def close(self):
+        pass
+
+
+class LocalConnection:
+    closed = 0
+
+    def __init__(self):
+        self.cur = LocalCursor()
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class LocalProducer:
+    """Producer stand-in that acknowledges every message on poll or flush."""
+
+    def __init__(self):
+        self.pending = []
+        self.produced_bytes = 0
+
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        self.produced_bytes += len(value)
+        if on_delivery is not None:
+            self.pending.append(on_delivery)
+
+    def poll(self, timeout=None):
+        pending, self.pending = self.pending, []
+        for on_delivery in pending:
+            on_delivery(None, None)
+        return len(pending)
+
+    def flush(self, timeout=None):
+        self.poll()
+        return 0
+
+
+def use_local_database():
+    """Point the loader's connection pool at LocalConnection; returns the connection."""
+    conn = LocalConnection()
+    database._pool = ConnectionPool(lambda: conn, min_size=0, max_size=1)
+    return conn
+
+
+def run_format(directory, fmt, args):
+    """Run one format through parse, load and publish; returns its measurements."""
+    conn = use_local_database()
+    producer = LocalProducer()
+
+    started = time.perf_counter()
+    records, summary = parse_all_files(directory, workers=args.workers)
+    parsed = time.perf_counter()
+    database.save_to_postgres(records, mode=args.load_mode)
+    loaded = time.perf_counter()
+    if KAFKA["publish_mode"] == "direct":
+        publish_to_kafka(records, producer=producer)
+    published = time.perf_counter()
+
+    rows = summary["total_valid_records"]
+    results = {
+        f"parse_all_files/{fmt}": measurement(parsed - started, rows),
+        f"save_to_postgres/{fmt}": measurement(
+            loaded - parsed, rows, copied_bytes=conn.cur.copied_bytes
+        ),
+        f"end_to_end/{fmt}": measurement(published - started, rows),
+    }
+    if KAFKA["publish_mode"] == "direct":
+        results[f"publish_to_kafka/{fmt}"] = measurement(
+            published - loaded, rows, produced_bytes=producer.produced_bytes
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="rows per file")
+    parser.add_argument("--files", type=int, default=1, help="files per format")
+    parser.add_argument("--dirty-ratio", type=float, default=0.05)
+    parser.add_argument(
+        "--service-mix",
+        type=parse_service_mix,
+        default=None,
+        help="e.g. VOICE=0.5,SMS=0.3,DATA=0.2",
+    )
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument(
+        "--workers", type=int, default=1, help="PARSE_WORKERS for parse_all_files"
+    )
+    parser.add_argument("--load-mode", choices=database.LOAD_MODES, default="copy")
+    parser.add_argument(
+        "--publish-mode", choices=("outbox", "direct"), default=KAFKA["publish_mode"]
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+    KAFKA["publish_mode"] = args.publish_mode
+
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for fmt in args.formats.split(","):
+            directory = os.path.join(root, fmt)
+            for index in range(args.files):
+                rows, _ = generate_rows(
+                    args.rows, args.dirty_ratio, args.service_mix, args.seed + index
+                )
+                write_file(directory, fmt, rows, name=f"cdr_bench_{index}")
+            results.update(run_format(directory, fmt, args))
+
+    for name, result in results.items():
+        print(f"{name:<32} {result['seconds']:>8.3f}s {result['rate']:>12,.0f} rows/s")
+    if args.json:
+        parameters = {k: v for k, v in vars(args).items() if k != "json"}
+        write_results(args.json, "pipeline", parameters, results)
+
+
+if __name__ == "__main__":
+    main()
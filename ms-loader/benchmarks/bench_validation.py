@@ -0,0 +1,79 @@
+"""Compare validate_record with the compiled RecordValidator."""
+
+import argparse
+import random
+import time
+
+from app.validation.engine import RecordValidator
+from app.validation.file_validator import validate_record
+
+
+def synthetic_rows(count, invalid_ratio=0.1, seed=42):
+    """Build count raw CSV-style rows with roughly invalid_ratio bad rows."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        service = rng.choice(("VOICE", "SMS", "DATA"))
+        row = {
+            "source": f"+1{rng.randrange(10**9, 10**10)}",
+            "destination": (
+                f"https://host{i % 100}.example.com/path"
+                if service == "DATA"
+                else f"+2{rng.randrange(10**9, 10**10)}"
+            ),
+            "starttime": (
+                f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:30:00"
+            ),
+            "service": service,
+            "usage": "1" if service == "SMS" else f"{rng.uniform(0, 1000):.2f}",
+        }
+        if rng.random() < invalid_ratio:
+            row[rng.choice(("source", "usage", "starttime"))] = "bad"
+        rows.append(row)
+    return rows
+
+
+def check_equivalent(rows, validator=None):
+    """Raise unless validator accepts and rejects rows like validate_record.
+
+    Each row must give the same (is_valid, errors), so accepted rows match
+    one for one and rejected rows carry the same reasons.
+    """
+    validator = validator or RecordValidator()
+    for index, row in enumerate(rows):
+        expected = validate_record(row)
+        actual = validator.validate(row)
+        if actual != expected:
+            raise AssertionError(
+                f"Row {index} {row}: validate_record gave {expected}, "
+                f"RecordValidator gave {actual}"
+            )
+
+
+def time_validator(validate, rows):
+    started = time.perf_counter()
+    valid = sum(1 for row in rows if validate(row)[0])
+    return time.perf_counter() - started, valid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, args.invalid_ratio)
+
+    baseline, baseline_valid = time_validator(validate_record, rows)
+    validator = RecordValidator()
+    compiled, compiled_valid = time_validator(validator.validate, rows)
+    check_equivalent(rows, validator)
+
+    print(f"rows: {args.rows} (valid: {baseline_valid})")
+    print(f"validate_record:  {baseline:.2f}s ({args.rows / baseline:,.0f} rows/s)")
+    print(f"RecordValidator:  {compiled:.2f}s ({args.rows / compiled:,.0f} rows/s)")
+    print(f"speedup: {baseline / compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Generate synthetic CDR files in every supported format.
+
+    python -m benchmarks.generator --rows 100000 --dirty-ratio 0.05 --out ./cdr_files
+"""
+
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+FIELDS = ("source", "destination", "starttime", "service", "usage")
+FORMATS = ("csv", "json", "ndjson", "xml", "yaml")
+DEFAULT_SERVICE_MIX = {"VOICE": 0.5, "SMS": 0.3, "DATA": 0.2}
+
+
+def _bad_source(row, rng):
+    row["source"] = "not-a-number"
+
+
+def _negative_usage(row, rng):
+    row["usage"] = f"-{rng.randint(1, 100)}"
+
+
+def _bad_starttime(row, rng):
+    row["starttime"] = "yesterday"
+
+
+def _future_starttime(row, rng):
+    starttime = datetime.now() + timedelta(days=rng.randint(30, 365))
+    row["starttime"] = starttime.isoformat(timespec="seconds")
+
+
+def _missing_field(row, rng):
+    row[rng.choice(FIELDS)] = ""
+
+
+def _unknown_service(row, rng):
+    row["service"] = "FAX"
+
+
+# Each of these makes a row fail validation
+CORRUPTIONS = (
+    _bad_source,
+    _negative_usage,
+    _bad_starttime,
+    _future_starttime,
+    _missing_field,
+    _unknown_service,
+)
+
+
+def parse_service_mix(text):
+    """Parse "VOICE=0.5,SMS=0.3,DATA=0.2" into a dict of weights."""
+    mix = {}
+    for part in text.split(","):
+        service, _, weight = part.partition("=")
+        mix[service.strip().upper()] = float(weight)
+    return mix
+
+
+def generate_rows(count, dirty_ratio=0.0, service_mix=None, seed=42):
+    """Return (rows, dirty_count): count raw rows of string values, as read from a CSV.
+
+    A dirty_ratio share of the rows is corrupted so that it fails
+    validation; the rest are valid with starttimes in the last year.
+    """
+    rng = random.Random(seed)
+    mix = service_mix or DEFAULT_SERVICE_MIX
+    services, weights = list(mix), list(mix.values())
+    now = datetime.now().replace(microsecond=0)
+    rows = []
+    dirty = 0
+    for i in range(count):
+        service = rng.choices(services, weights)[0]
+        row = {
+            "source": f"+1{rng.randrange(10**9, 10**10)}",
+            "destination": (
+                f"https://host{i % 100}.example.com/path/{i % 7}"
+                if service == "DATA"
+                else f"+2{rng.randrange(10**9, 10**10)}"
+            ),
+            "starttime": (
+                now - timedelta(seconds=rng.randrange(60, 365 * 86400))
+            ).isoformat(),
+            "service": service,
+            "usage": (
+                "1"
+                if service == "SMS"
+                else f"{rng.uniform(0, 1000 if service == 'VOICE' else 5000):.2f}"
+            ),
+        }
+        if rng.random() < dirty_ratio:
+            rng.choice(CORRUPTIONS)(row, rng)
+            dirty += 1
+        rows.append(row)
+    return rows, dirty
+
+
+def _typed(row):
+    """Row with usage as a number where it is one, as JSON and YAML exports have it."""
+    try:
+        return dict(row, usage=float(row["usage"]))
+    except ValueError:
+        return row
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(FIELDS) + "\n")
+        f.writelines(",".join(row[field] for field in FIELDS) + "\n" for row in rows)
+
+
+def write_json(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        f.write(",\n".join(json.dumps(_typed(row)) for row in rows))
+        f.write("\n]\n")
+
+
+def write_ndjson(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(_typed(row)) + "\n" for row in rows)
+
+
+def write_xml(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<records>\n')
+        for row in rows:
+            fields = (f"<{field}>{escape(row[field])}</{field}>" for field in FIELDS)
+            f.write("  <record>" + "".join(fields) + "</record>\n")
+        f.write("</records>\n")
+
+
+def _yaml_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def write_yaml(path, rows):
+    # Written by hand: yaml.safe_dump takes minutes for a million rows
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            row = _typed(row)
+            fields = (f"{field}: {_yaml_value(row[field])}" for field in FIELDS)
+            f.write("- " + "\n  ".join(fields) + "\n")
+
+
+WRITERS = {
+    "csv": write_csv,
+    "json": write_json,
+    "ndjson": write_ndjson,
+    "xml": write_xml,
+    "yaml": write_yaml,
+}
+
+
+def write_file(directory, fmt, rows, name="cdr_bench"):
+    """Write rows to directory/<name>.<fmt> and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.{fmt}")
+    WRITERS[fmt](path, rows)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dirty-ratio", type=float, default=0.05)
+    parser.add_argument(
+        "--service-mix",
+        type=parse_service_mix,
+        default=DEFAULT_SERVICE_MIX,
+        help="e.g. VOICE=0.5,SMS=0.3,DATA=0.2",
+    )
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--files", type=int, default=1, help="files per format")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="./bench_cdr_files")
+    args = parser.parse_args()
+
+    for fmt in args.formats.split(","):
+        for index in range(args.files):
+            rows, dirty = generate_rows(
+                args.rows, args.dirty_ratio, args.service_mix, args.seed + index
+            )
+            path = write_file(args.out, fmt, rows, name=f"cdr_bench_{index}")
+            size = os.path.getsize(path)
+            print(f"{path}: {len(rows)} rows, {dirty} dirty, {size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
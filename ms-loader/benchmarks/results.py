@@ -0,0 +1,112 @@
+"""Write benchmark results as JSON and compare two result files.
+
+    python -m benchmarks.results baseline.json current.json --threshold 0.10
+
+Every result file holds the environment it was measured in and a flat
+{"name": {"seconds": ..., "rate": ...}} map of measurements. Compare
+exits with status 1 when any measurement is slower than the baseline by
+more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+
+def environment():
+    """Describe the machine and code version a run was measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def measurement(seconds, count=None, **extra):
+    """One result: seconds taken, plus items per second when count is given."""
+    result = {"seconds": round(seconds, 6)}
+    if count is not None:
+        result["count"] = count
+        result["rate"] = round(count / seconds, 1) if seconds > 0 else None
+    result.update(extra)
+    return result
+
+
+def write_results(path, benchmark, parameters, results):
+    """Write one run to path as JSON and return the document."""
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "parameters": parameters,
+        "results": results,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return document
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline, current):
+    """Return (name, baseline seconds, current seconds, change) per shared measurement.
+
+    change is the relative increase in time.
+    """
+    rows = []
+    for name, result in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if not before or not before.get("seconds") or "seconds" not in result:
+            continue
+        change = result["seconds"] / before["seconds"] - 1
+        rows.append((name, before["seconds"], result["seconds"], change))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    if baseline.get("parameters") != current.get("parameters"):
+        print("warning: the runs used different parameters", file=sys.stderr)
+
+    regressions = 0
+    for name, before, after, change in compare(baseline, current):
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<48} {before:>10.4f}s -> {after:>10.4f}s {change:+8.1%}{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import pytest
+
+from app.parsers import registry
+from app.validation.engine import RecordValidator
+from benchmarks.bench_validation import check_equivalent, synthetic_rows
+from benchmarks.generator import FORMATS, generate_rows, write_file
+from benchmarks.results import compare, measurement
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_generated_files_parse_to_their_clean_rows(tmp_path, fmt):
+    """Test every generated format parses with exactly the dirty rows rejected"""
+    rows, dirty = generate_rows(200, dirty_ratio=0.1, seed=7)
+    path = write_file(str(tmp_path), fmt, rows)
+
+    records = list(registry.read_valid_records(path))
+
+    assert dirty > 0
+    assert len(records) == len(rows) - dirty
+
+
+def test_generator_is_reproducible():
+    """Test the same seed gives the same rows"""
+    assert generate_rows(50, 0.2, seed=3)[0] == generate_rows(50, 0.2, seed=3)[0]
+
+
+def test_compare_reports_relative_change():
+    """Test compare matches measurements by name and skips new ones"""
+    baseline = {"results": {"parse/csv": measurement(2.0, 1000)}}
+    current = {"results": {
+        "parse/csv": measurement(2.5, 1000),
+        "parse/xml": measurement(1.0),
+    }}
+
+    assert compare(baseline, current) == [("parse/csv", 2.0, 2.5, 0.25)]
+
+
+def test_validation_benchmark_checks_records_and_reasons():
+    """Test the validation benchmark compares verdicts and messages, not counts"""
+    rows = synthetic_rows(300, invalid_ratio=0.3, seed=3)
+    check_equivalent(rows)
+
+    class ExtraReason(RecordValidator):
+        def validate(self, record):
+            valid, errors = super().validate(record)
+            return valid, errors[:1] + ["extra"] if errors else errors
+
+    with pytest.raises(AssertionError, match="RecordValidator gave"):
+        check_equivalent(rows, ExtraReason())
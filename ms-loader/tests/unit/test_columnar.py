@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pandas as pd
+from app.parsers.columnar import iter_csv_batches, parse_csv_columnar, validate_frame
+from app.parsers.csv_parser import iter_csv
+from app.validation.engine import RecordValidator
+from app.validation.file_validator import REQUIRED_FIELDS, validate_record
+from tests.unit import TEST_DATA, create_test_file
+from tests.unit.test_validation_engine import CASES
+
+
+def as_csv_row(record):
+    return {field: '' if record.get(field) is None else str(record[field])
+            for field in REQUIRED_FIELDS}
+
+
+def test_validate_frame_matches_validate_record():
+    """Test vectorized checks accept and reject the same rows"""
+    rows = [as_csv_row(record) for record in CASES]
+    valid, rejected = validate_frame(pd.DataFrame(rows), 'test.csv')
+
+    expected = [validate_record(row)[0] for row in rows]
+    assert len(valid) == sum(expected)
+    assert list(rejected['row']) == [i + 1 for i, ok in enumerate(expected) if not ok]
+    assert rejected['errors'].str.len().gt(0).all()
+
+
+def test_validate_frame_rejects_with_record_validator_messages():
+    """Test vectorized rejections carry RecordValidator's messages"""
+    now = datetime(2025, 6, 1)
+    rows = [as_csv_row(record) for record in CASES]
+    _, rejected = validate_frame(pd.DataFrame(rows), 'test.csv', now=now)
+
+    validator = RecordValidator(now)
+    for row, errors in zip(rejected['row'], rejected['errors']):
+        assert errors.split("; ") == validator.errors(rows[row - 1])
+
+
+def test_parse_csv_columnar_matches_row_parser(tmp_path):
+    """Test columnar CSV parsing produces the row parser's records"""
+    file_path = create_test_file(tmp_path, TEST_DATA['csv_content'], 'test.csv')
+
+    assert parse_csv_columnar(str(file_path)) == list(iter_csv(str(file_path)))
+
+
+def test_iter_csv_batches_keeps_global_row_numbers(tmp_path):
+    """Test rejected rows keep file row numbers across chunks"""
+    file_path = create_test_file(
+        tmp_path, TEST_DATA['invalid_csv_content'], 'invalid.csv'
+    )
+
+    batches = list(iter_csv_batches(str(file_path), chunk_size=2))
+
+    assert len(batches) == 2
+    assert sum(len(valid) for valid, _ in batches) == 0
+    rows = [row for _, rejected in batches for row in rejected['row']]
+    assert rows == [1, 2, 3]
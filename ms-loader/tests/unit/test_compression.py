@@ -0,0 +1,70 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+from app.parsers import parse_all_files, supported_extension
+from app.parsers.compression import CODECS, open_input, split_compression
+from app.validation.file_validator import validate_file
+from tests.unit import TEST_DATA
+
+COMPRESSORS = {
+    '.gz': gzip.compress,
+    '.bz2': bz2.compress,
+    '.xz': lzma.compress,
+}
+if '.zst' in CODECS:
+    import zstandard
+    COMPRESSORS['.zst'] = lambda data: zstandard.ZstdCompressor().compress(data)
+
+
+def write_compressed(directory, name, content):
+    path = directory / name
+    path.write_bytes(COMPRESSORS[split_compression(name)[1]](content.encode()))
+    return path
+
+
+def test_compound_extensions_are_recognised(tmp_path):
+    """Test the inner format is used for compressed names"""
+    path = write_compressed(tmp_path, 'calls.CSV.gz', TEST_DATA['csv_content'])
+
+    assert split_compression('calls.csv.gz') == ('calls.csv', '.gz')
+    assert supported_extension('calls.CSV.gz') == '.csv'
+    assert supported_extension('calls.txt.gz') is None
+    assert validate_file(str(path))
+
+
+@pytest.mark.parametrize("codec", sorted(COMPRESSORS))
+def test_open_input_decompresses_as_a_stream(tmp_path, codec):
+    """Test every codec yields the original text line by line"""
+    path = write_compressed(tmp_path, f'calls.csv{codec}', TEST_DATA['csv_content'])
+
+    with open_input(str(path), 'r', newline='') as f:
+        assert f.readline().startswith('source,destination')
+        assert f.read() == TEST_DATA['csv_content'].split('\n', 1)[1]
+
+
+def test_parse_all_files_reports_compression(tmp_path):
+    """Test compressed files of each format parse like plain ones and are reported"""
+    write_compressed(tmp_path, 'calls.csv.gz', TEST_DATA['csv_content'])
+    write_compressed(tmp_path, 'calls.json.bz2', TEST_DATA['json_content'])
+    write_compressed(tmp_path, 'calls.xml.xz', TEST_DATA['xml_content'])
+    write_compressed(tmp_path, 'calls.yaml.gz', TEST_DATA['yaml_content'])
+    (tmp_path / 'plain.csv').write_text(TEST_DATA['csv_content'])
+
+    records, summary = parse_all_files(str(tmp_path), workers=1)
+
+    assert summary['valid_files'] == 5
+    assert len(records) == 11
+    compression = summary['compression']
+    assert compression['compressed_files'] == 4
+    assert {f['filename'] for f in compression['files']} == {
+        'calls.csv.gz', 'calls.json.bz2', 'calls.xml.xz', 'calls.yaml.gz'
+    }
+    csv_stats = next(f for f in compression['files'] if f['filename'] == 'calls.csv.gz')
+    assert csv_stats['codec'] == 'gz'
+    assert csv_stats['uncompressed_bytes'] == len(TEST_DATA['csv_content'])
+    assert csv_stats['compressed_bytes'] == (tmp_path / 'calls.csv.gz').stat().st_size
+    assert compression['uncompressed_bytes'] == sum(
+        f['uncompressed_bytes'] for f in compression['files']
+    )
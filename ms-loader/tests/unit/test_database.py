@@ -0,0 +1,161 @@
+import csv
+import io
+
+import threading
+
+import pytest
+from psycopg2.pool import PoolError
+
+from app.db import database
+from app.db.database import copy_records, save_to_postgres
+from app.db.pool import ConnectionPool
+from tests.unit import TEST_RECORD
+
+
+class FakeCursor:
+    def __init__(self):
+        self.copied = []
+        self.executed = []
+
+    def copy_expert(self, sql, file):
+        self.copied.append((sql, file.read()))
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_obj = FakeCursor()
+        self.committed = False
+        self.closed = 0
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def test_copy_records_flushes_in_batches():
+    """Test COPY buffer is flushed every batch_size rows"""
+    cur = FakeCursor()
+    records = [dict(TEST_RECORD, source=f"+12345678{i:02d}") for i in range(5)]
+
+    copy_records(cur, records, batch_size=2)
+
+    assert len(cur.copied) == 3
+    assert all(sql.startswith("COPY cdrs (") for sql, _ in cur.copied)
+    rows = [row for _, data in cur.copied for row in csv.reader(io.StringIO(data))]
+    assert [row[0] for row in rows] == [r["source"] for r in records]
+    assert rows[0][2] == "2024-01-15 10:30:00"
+    assert rows[0][5] == TEST_RECORD["file_name"]
+
+
+def test_save_to_postgres_copy_mode(monkeypatch):
+    """Test save_to_postgres loads through COPY when mode is copy"""
+    conn = FakeConnection()
+    marked = []
+    pool = ConnectionPool(lambda: conn, min_size=0, max_size=1)
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    monkeypatch.setattr(database, "is_file_processed", lambda name, conn: False)
+    monkeypatch.setattr(
+        database, "mark_file_as_processed", lambda name, conn: marked.append(name)
+    )
+
+    assert save_to_postgres(
+        [TEST_RECORD, TEST_RECORD], mode="copy", outbox=False, rollups=False
+    ) is True
+    assert len(conn.cursor_obj.copied) == 1
+    assert conn.cursor_obj.executed == []
+    assert conn.committed
+    assert marked == [TEST_RECORD["file_name"]]
+    assert pool.stats()["idle"] == 1
+
+
+def test_save_to_postgres_unknown_mode():
+    """Test save_to_postgres rejects unknown load modes"""
+    assert save_to_postgres([TEST_RECORD], mode="bogus") is False
+
+
+def test_pool_reuses_connections():
+    """Test pooled connections are reused instead of reopened"""
+    opened = []
+    pool = ConnectionPool(lambda: opened.append(FakeConnection()) or opened[-1],
+                          min_size=1, max_size=2)
+    pool.fill()
+
+    for _ in range(5):
+        with pool.connection():
+            pass
+
+    stats = pool.stats()
+    assert len(opened) == 1
+    assert stats["checkouts"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["waits"] == 0
+
+
+def test_pool_waits_and_times_out_when_exhausted():
+    """Test checkout blocks at max_size and records waits"""
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1, timeout=0.05)
+    conn = pool.getconn()
+
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+    threading.Timer(0.01, pool.putconn, args=(conn,)).start()
+    pool.timeout = 1.0
+    assert pool.getconn() is conn
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 2
+
+
+def test_pool_replaces_closed_connections():
+    """Test broken idle connections are discarded on checkout"""
+    pool = ConnectionPool(FakeConnection, min_size=1, max_size=1)
+    pool.fill()
+    with pool.connection() as conn:
+        conn.close()
+
+    with pool.connection() as fresh:
+        assert not fresh.closed
+
+    assert pool.stats()["connections_opened"] == 2
+
+
+def test_save_file_stream_commits_once_per_file(monkeypatch):
+    """Test streamed chunks share one transaction and marker"""
+    conn = FakeConnection()
+    pool = ConnectionPool(lambda: conn, min_size=0, max_size=1)
+    marked = []
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    monkeypatch.setattr(database, "is_file_processed", lambda name, conn: False)
+    monkeypatch.setattr(
+        database, "mark_file_as_processed", lambda name, conn: marked.append(name)
+    )
+    seen = []
+    counts = {}
+
+    written = database.save_file_stream(
+        "test_file", iter([[TEST_RECORD] * 2, [TEST_RECORD]]),
+        mode="copy", on_chunk=seen.append, outbox=False, rollups=False,
+        counts=counts,
+    )
+
+    assert written == 3
+    assert counts == {"received": 3, "duplicates": 0}
+    assert len(conn.cursor_obj.copied) == 2
+    assert [len(chunk) for chunk in seen] == [2, 1]
+    assert marked == ["test_file"]
+    assert conn.committed
@@ -0,0 +1,87 @@
+import json
+
+from app.parsers import csv_parser, parse_csv, parse_ndjson
+from app.parsers.core import ParseStats, reason_of
+from app.parsers.dead_letter import FileDeadLetterWriter
+from tests.unit import TEST_DATA, create_test_file
+
+
+def read_entries(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_file_writer_appends_in_buffered_batches(tmp_path):
+    """Test entries reach the file only once the buffer fills or on close"""
+    writer = FileDeadLetterWriter("calls.csv", directory=str(tmp_path), buffer_size=2)
+
+    writer.add(1, ["Invalid source format: x"], {"source": "x"})
+    assert not (tmp_path / "calls.csv.rejected.jsonl").exists()
+    writer.add(2, ["Missing required field: usage"], {"source": "+1234567890"})
+    writer.add(3, ["Invalid JSON: Expecting value"], "{bad")
+    assert len(read_entries(writer.path)) == 2
+    writer.close()
+
+    entries = read_entries(writer.path)
+    assert [entry["row"] for entry in entries] == [1, 2, 3]
+    assert entries[2] == {
+        "file_name": "calls.csv",
+        "row": 3,
+        "errors": ["Invalid JSON: Expecting value"],
+        "raw": "{bad",
+    }
+
+
+def test_rejects_are_counted_by_reason():
+    """Test reason counters ignore the offending values"""
+    stats = ParseStats()
+    stats.reject(1, None, [
+        "Invalid source format: abc",
+        "Voice call duration (2000.0 minutes) exceeds reasonable limit",
+    ])
+    stats.reject(2, None, ["Invalid source format: def"])
+
+    message = "Invalid destination format for SMS: x. Should be a phone number."
+    assert reason_of(message) == "Invalid destination format for SMS"
+    assert stats.reasons == {
+        "Invalid source format": 2,
+        "Voice call duration exceeds reasonable limit": 1,
+    }
+
+
+def test_parsers_write_rejected_rows_with_raw_payload(tmp_path, monkeypatch):
+    """Test row and columnar CSV and NDJSON send every reject to the dead-letter file"""
+    monkeypatch.setitem(csv_parser.LOADER, "dead_letter_mode", "file")
+    monkeypatch.setitem(
+        csv_parser.LOADER, "dead_letter_directory", str(tmp_path / "dlq")
+    )
+    csv_path = create_test_file(
+        tmp_path, TEST_DATA['invalid_csv_content'], 'invalid.csv'
+    )
+    ndjson_path = create_test_file(
+        tmp_path, '{"source": "+1234567890"\n[1, 2]\n', 'calls.ndjson'
+    )
+
+    assert len(parse_csv(str(csv_path))) == 0
+    row_entries = read_entries(tmp_path / "dlq" / "invalid.csv.rejected.jsonl")
+    (tmp_path / "dlq" / "invalid.csv.rejected.jsonl").unlink()
+    monkeypatch.setitem(csv_parser.LOADER, "csv_engine", "columnar")
+    assert len(parse_csv(str(csv_path))) == 0
+    columnar_entries = read_entries(tmp_path / "dlq" / "invalid.csv.rejected.jsonl")
+    assert len(parse_ndjson(str(ndjson_path))) == 0
+    ndjson_entries = read_entries(tmp_path / "dlq" / "calls.ndjson.rejected.jsonl")
+
+    assert [entry["row"] for entry in row_entries] == [1, 2, 3]
+    assert [entry["row"] for entry in columnar_entries] == [1, 2, 3]
+    assert [entry["raw"] for entry in columnar_entries] == [
+        entry["raw"] for entry in row_entries
+    ]
+    first_row = TEST_DATA['invalid_csv_content'].splitlines()[1]
+    assert row_entries[0]["raw"]["source"] == first_row.split(',')[0]
+    assert ndjson_entries[0]["raw"] == '{"source": "+1234567890"'
+    assert ndjson_entries[1] == {
+        "file_name": "calls.ndjson",
+        "row": 2,
+        "errors": ["Record is not a JSON object"],
+        "raw": [1, 2],
+    }
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+from psycopg2 import errors
+
+from app.db import database
+from app.db.pool import ConnectionPool
+from app.dedup import BloomFilter, Deduplicator, fingerprint
+from app.dedup.deduplicator import select_records
+from app.parsers.records import RecordBatch
+from tests.unit import TEST_RECORD
+from tests.unit.test_database import FakeConnection, FakeCursor
+
+
+class FingerprintCursor(FakeCursor):
+    """FakeCursor returning queued fetchall results and optionally failing COPY."""
+
+    def __init__(self, results=(), copy_error=None):
+        super().__init__()
+        self.results = list(results)
+        self.copy_error = copy_error
+
+    def copy_expert(self, sql, file):
+        if self.copy_error:
+            raise self.copy_error
+        super().copy_expert(sql, file)
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+
+def record_fingerprint(record):
+    return fingerprint(record["source"], record["destination"], record["starttime"],
+                       record["service"], record["usage"])
+
+
+def test_bloom_filter_has_no_false_negatives_and_survives_save(tmp_path):
+    """Test added fingerprints always hit, before and after a save and load"""
+    bloom = BloomFilter(1000, 0.01)
+    added = [
+        fingerprint("+1", f"+{i}", datetime(2024, 1, 1), "SMS", 1) for i in range(1000)
+    ]
+    for fp in added:
+        bloom.add(fp)
+    path = tmp_path / "filter.bloom"
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+
+    assert all(fp in loaded for fp in added)
+    others = [
+        fingerprint("+2", f"+{i}", datetime(2024, 1, 1), "SMS", 1) for i in range(1000)
+    ]
+    assert sum(fp in loaded for fp in others) < 50
+    assert len(loaded) == 1000
+
+
+def test_fingerprint_ignores_file_name_and_usage_type():
+    """Test the same values from different files or as int/float match"""
+    record = dict(TEST_RECORD, usage=15)
+    assert record_fingerprint(record) == record_fingerprint(
+        dict(record, usage=15.0, file_name="other")
+    )
+    assert record_fingerprint(record) != record_fingerprint(dict(record, usage=16))
+    assert record_fingerprint(record) == record_fingerprint(
+        dict(
+            record,
+            service=f" {record['service'].lower()} ",
+            source=f"{record['source']} ",
+        )
+    )
+
+
+def test_filter_new_checks_only_filter_hits(tmp_path):
+    """Test new records skip the lookup and a re-delivery is dropped after one query"""
+    deduplicator = Deduplicator(filter_path=str(tmp_path / "f.bloom"), capacity=100)
+    second = dict(TEST_RECORD, source="+1111111111")
+    records = [TEST_RECORD, second, dict(TEST_RECORD)]
+
+    cur = FingerprintCursor()
+    assert deduplicator.filter_new(cur, records) == [TEST_RECORD, second]
+    assert not any(sql.startswith("SELECT") for sql, _ in cur.executed)
+    assert len(cur.copied[0][1].splitlines()) == 2
+
+    redelivered = [
+        dict(TEST_RECORD, file_name="retry.csv"),
+        dict(second, file_name="retry.csv"),
+    ]
+    stored = [(record_fingerprint(TEST_RECORD),), (record_fingerprint(second),)]
+    cur = FingerprintCursor(results=[stored])
+    assert deduplicator.filter_new(cur, redelivered) == []
+    assert cur.copied == []
+    assert deduplicator.stats()["duplicates"] == 3
+
+
+def test_filter_new_falls_back_to_unique_key(tmp_path):
+    """Test a stale filter is corrected by ON CONFLICT DO NOTHING"""
+    deduplicator = Deduplicator(filter_path=str(tmp_path / "f.bloom"), capacity=100)
+    second = dict(TEST_RECORD, source="+1111111111")
+    batch = RecordBatch([TEST_RECORD, second])
+    cur = FingerprintCursor(
+        results=[[(record_fingerprint(second),)]],
+        copy_error=errors.UniqueViolation("duplicate key"),
+    )
+
+    kept = deduplicator.filter_new(cur, batch)
+
+    assert isinstance(kept, RecordBatch)
+    assert list(kept) == [second]
+    statements = [sql.strip().split()[0] for sql, _ in cur.executed]
+    assert statements == ["SAVEPOINT", "ROLLBACK", "INSERT"]
+
+
+def test_select_records_keeps_container_type():
+    batch = RecordBatch([TEST_RECORD, dict(TEST_RECORD, source="+1111111111")])
+    assert list(select_records(batch, [1])) == [batch[1]]
+    assert select_records([1, 2, 3], [0, 2]) == [1, 3]
+
+
+def test_save_to_postgres_passes_on_only_written_records(monkeypatch):
+    """Test records dropped as duplicates are neither loaded nor handed to on_written"""
+    class DropFirst:
+        def filter_new(self, cur, records):
+            return select_records(records, range(1, len(records)))
+
+    conn = FakeConnection()
+    pool = ConnectionPool(lambda: conn, min_size=0, max_size=1)
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    monkeypatch.setattr(database, "is_file_processed", lambda name, conn: False)
+    monkeypatch.setattr(database, "mark_file_as_processed", lambda name, conn: None)
+    monkeypatch.setattr(database, "load_deduplicator", lambda dedup=None: DropFirst())
+    second = dict(TEST_RECORD, source="+1111111111")
+    written = []
+
+    assert database.save_to_postgres(
+        [TEST_RECORD, second], mode="copy", outbox=False, rollups=False,
+        on_written=written.append,
+    ) is True
+
+    assert written == [[second]]
+    assert len(conn.cursor_obj.copied[0][1].splitlines()) == 1
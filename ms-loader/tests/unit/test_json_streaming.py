@@ -0,0 +1,109 @@
+import io
+import json
+
+import pytest
+from app.parsers import json_parser
+from app.parsers.json_parser import (
+    JsonStructureError,
+    iter_json_records,
+    parse_json,
+    parse_ndjson,
+)
+from app.parsers.ranges import iter_range_lines, split_line_ranges
+from tests.unit import create_test_file
+
+RECORD = {
+    "source": "+1234567890",
+    "destination": "+9876543210",
+    "starttime": "2024-01-15T10:30:00",
+    "service": "VOICE",
+    "usage": 15.5,
+}
+
+
+@pytest.mark.parametrize("document", [
+    [RECORD, {"usage": 123456789}, RECORD],
+    {"meta": {"records": [1]}, "records": [RECORD, {"usage": 123456789}], "count": 2},
+])
+def test_iter_json_records_across_buffer_boundaries(monkeypatch, document):
+    """Test incremental decoding matches json.load with tiny reads"""
+    monkeypatch.setattr(json_parser, "READ_SIZE", 3)
+    text = json.dumps(document, indent=2)
+    expected = document if isinstance(document, list) else document["records"]
+
+    assert list(iter_json_records(io.StringIO(text))) == expected
+
+
+@pytest.mark.parametrize("text, error", [
+    ('{"count": 1}', JsonStructureError),
+    ('"records"', JsonStructureError),
+    ('[{"a": 1}] []', json.JSONDecodeError),
+    ('[{"a": 1},', json.JSONDecodeError),
+])
+def test_iter_json_records_rejects_bad_documents(text, error):
+    """Test structure and syntax errors surface like json.load"""
+    with pytest.raises(error):
+        list(iter_json_records(io.StringIO(text)))
+
+
+def test_parse_json_records_object(tmp_path):
+    """Test the {"records": [...]} shape is parsed"""
+    content = json.dumps({"records": [RECORD, RECORD]})
+    file_path = create_test_file(tmp_path, content, 'wrapped.json')
+
+    assert len(parse_json(str(file_path))) == 2
+
+
+def ndjson_lines(count):
+    lines = []
+    for i in range(count):
+        if i % 10 == 3:
+            lines.append('{"source": "bad"')
+        elif i % 10 == 7:
+            lines.append('')
+        else:
+            lines.append(json.dumps(dict(RECORD, usage=i % 100)))
+    return lines
+
+
+@pytest.mark.parametrize("extension", ['.ndjson', '.jsonl'])
+def test_parse_ndjson_skips_bad_lines(tmp_path, extension):
+    """Test one record per line, with malformed lines rejected individually"""
+    file_path = create_test_file(
+        tmp_path, "\n".join(ndjson_lines(20)), 'calls' + extension
+    )
+
+    records = parse_ndjson(str(file_path), workers=1)
+
+    assert len(records) == 16
+    assert records[0]['file_name'] == 'calls' + extension
+    assert [r['usage'] for r in records[:3]] == [0.0, 1.0, 2.0]
+
+
+def test_parse_ndjson_parallel_ranges_match_serial(tmp_path, monkeypatch, caplog):
+    """Test parallel byte ranges give the same records and global line numbers"""
+    monkeypatch.setitem(json_parser.LOADER, "ndjson_range_bytes", 1)
+    file_path = create_test_file(tmp_path, "\n".join(ndjson_lines(200)), 'big.ndjson')
+
+    ranges = split_line_ranges(str(file_path), 4, min_size=1)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] == file_path.stat().st_size
+    lines = [
+        line
+        for start, end in ranges
+        for line in iter_range_lines(str(file_path), start, end)
+    ]
+    assert b"".join(lines) == file_path.read_bytes()
+
+    monkeypatch.setitem(json_parser.LOADER, "dead_letter_mode", "file")
+    monkeypatch.setitem(json_parser.LOADER, "dead_letter_directory", str(tmp_path))
+    serial = parse_ndjson(str(file_path), workers=1)
+    serial_rejects = (tmp_path / "big.ndjson.rejected.jsonl").read_text()
+    (tmp_path / "big.ndjson.rejected.jsonl").unlink()
+    caplog.clear()
+    parallel = parse_ndjson(str(file_path), workers=4)
+
+    assert "as 4 ranges" in caplog.text
+    assert parallel == serial
+    assert (tmp_path / "big.ndjson.rejected.jsonl").read_text() == serial_rejects
+    assert json.loads(serial_rejects.splitlines()[-1])["row"] == 194
@@ -0,0 +1,60 @@
+from app.messaging.kafka_producer import DeliveryTracker, publish_to_kafka
+from tests.unit import TEST_RECORD
+
+
+class FakeProducer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.queued = []
+        self.produced = []
+        self.buffer_errors = 0
+
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        if len(self.queued) >= self.capacity:
+            self.buffer_errors += 1
+            raise BufferError("Local: Queue full")
+        self.queued.append((key, value, on_delivery))
+
+    def poll(self, timeout=None):
+        if timeout == 0:
+            return 0
+        delivered, self.queued = self.queued, []
+        for key, value, on_delivery in delivered:
+            err = "broker down" if key == "fail" else None
+            on_delivery(err, None)
+            self.produced.append(value)
+        return len(delivered)
+
+    def flush(self, timeout=None):
+        self.poll()
+        return 0
+
+
+def test_publish_blocks_on_full_queue_instead_of_dropping():
+    """Test BufferError makes the producer poll and retry"""
+    producer = FakeProducer(capacity=1)
+    records = [TEST_RECORD] * 5
+
+    counts = publish_to_kafka(records, producer=producer)
+
+    assert counts == {"test_file": {"acked": 5, "failed": 0}}
+    assert len(producer.produced) == 5
+    assert producer.buffer_errors == 4
+    assert '"starttime": "2024-01-15T10:30:00"' in producer.produced[0]
+
+
+def test_delivery_tracker_counts_failures_per_file():
+    """Test delivery callbacks count acks and failures per file"""
+    producer = FakeProducer(capacity=100)
+    tracker = DeliveryTracker()
+    failing = dict(TEST_RECORD, file_name="other_file", source="fail")
+
+    publish_to_kafka([TEST_RECORD, failing], flush=False, tracker=tracker,
+                     producer=producer)
+    publish_to_kafka([failing], tracker=tracker, producer=producer)
+
+    assert tracker.counts == {
+        "test_file": {"acked": 1, "failed": 0},
+        "other_file": {"acked": 0, "failed": 2},
+    }
+    assert tracker.failed == 2
@@ -0,0 +1,73 @@
+import os
+
+from app.db import manifest as manifest_module
+from app.db.manifest import FileManifest
+from tests.unit import TEST_DATA, create_test_file
+
+
+def test_manifest_skips_unchanged_files(tmp_path, monkeypatch):
+    """Test handled files are skipped with a stat and no re-hash"""
+    data_dir = tmp_path / "cdr_files"
+    data_dir.mkdir()
+    create_test_file(data_dir, TEST_DATA['csv_content'], 'a.csv')
+    create_test_file(data_dir, TEST_DATA['json_content'], 'b.json')
+    queried = []
+    hashed = []
+    digest = manifest_module.file_digest
+    monkeypatch.setattr(manifest_module, "processed_filenames",
+                        lambda names: queried.append(sorted(names)) or set())
+    monkeypatch.setattr(manifest_module, "file_digest",
+                        lambda path: hashed.append(path) or digest(path))
+    manifest = FileManifest(str(tmp_path / "manifest.json"))
+
+    pending = manifest.scan(str(data_dir))
+    assert sorted(name for name, _, _ in pending) == ['a.csv', 'b.json']
+    assert queried == [['a.csv', 'b.json']]
+    manifest.mark('a.csv', 'processed')
+    manifest.mark('b.json', 'rejected')
+    manifest.save()
+
+    reloaded = FileManifest(str(tmp_path / "manifest.json"))
+    hashed.clear()
+    assert reloaded.scan(str(data_dir)) == []
+    assert hashed == []
+    assert len(queried) == 1
+
+    os.utime(data_dir / 'a.csv', ns=(0, 0))
+    assert reloaded.scan(str(data_dir)) == []
+    assert len(hashed) == 1
+
+    create_test_file(data_dir, TEST_DATA['invalid_csv_content'], 'a.csv')
+    assert [name for name, _, _ in reloaded.scan(str(data_dir))] == ['a.csv']
+
+
+def test_manifest_syncs_with_processed_files(tmp_path, monkeypatch):
+    """Test files already in processed_files are recorded and skipped"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'a.csv')
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'b.csv')
+    monkeypatch.setattr(manifest_module, "processed_filenames", lambda names: {'a.csv'})
+    manifest = FileManifest(None)
+
+    assert [name for name, _, _ in manifest.scan(str(tmp_path))] == ['b.csv']
+    assert manifest.entries['a.csv']['status'] == 'processed'
+
+
+def test_manifest_does_not_rehash_pending_or_busy_files(tmp_path, monkeypatch):
+    """Test files still pending or named in skip are not hashed again"""
+    data_dir = tmp_path / "cdr_files"
+    data_dir.mkdir()
+    create_test_file(data_dir, TEST_DATA['csv_content'], 'a.csv')
+    create_test_file(data_dir, TEST_DATA['json_content'], 'b.json')
+    hashed = []
+    digest = manifest_module.file_digest
+    monkeypatch.setattr(manifest_module, "processed_filenames", lambda names: set())
+    monkeypatch.setattr(manifest_module, "file_digest",
+                        lambda path: hashed.append(path) or digest(path))
+    manifest = FileManifest(str(tmp_path / "manifest.json"))
+
+    assert len(manifest.scan(str(data_dir))) == 2
+    assert len(hashed) == 2
+
+    pending = manifest.scan(str(data_dir), skip={'a.csv'})
+    assert [name for name, _, _ in pending] == ['b.json']
+    assert len(hashed) == 2
@@ -0,0 +1,67 @@
+from urllib.request import urlopen
+
+from prometheus_client import REGISTRY
+
+from app.metrics import start_metrics_server
+from app.metrics.pipeline import file_format
+from app.parsers import parse_all_files
+from tests.unit import TEST_DATA, create_test_file
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_file_format_ignores_compression():
+    """Test format labels come from the inner extension"""
+    assert file_format("calls.CSV") == "csv"
+    assert file_format("calls.ndjson.zst") == "ndjson"
+    assert file_format("README") == "unknown"
+
+
+def test_parse_all_files_records_parse_metrics(tmp_path):
+    """Test parsed files feed record, reject, byte and stage metrics"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'valid.csv')
+    invalid = create_test_file(
+        tmp_path, TEST_DATA['invalid_csv_content'], 'invalid.csv'
+    )
+    series = {
+        "valid": ("cdr_records_total", {"format": "csv", "outcome": "valid"}),
+        "invalid": ("cdr_records_total", {"format": "csv", "outcome": "invalid"}),
+        "source": (
+            "cdr_rejects_total",
+            {"format": "csv", "reason": "Invalid source format"},
+        ),
+        "bytes": ("cdr_input_bytes_total", {"format": "csv"}),
+        "validations": (
+            "cdr_stage_seconds_count",
+            {"stage": "validate", "format": "csv"},
+        ),
+    }
+    before = {key: sample(name, **labels) for key, (name, labels) in series.items()}
+
+    parse_all_files(str(tmp_path), workers=1)
+
+    after = {key: sample(name, **labels) for key, (name, labels) in series.items()}
+    assert after["valid"] - before["valid"] == 3
+    assert after["invalid"] - before["invalid"] == 3
+    assert after["source"] > before["source"]
+    assert after["bytes"] - before["bytes"] >= invalid.stat().st_size
+    assert after["validations"] - before["validations"] == 2
+
+
+def test_metrics_server_serves_registry():
+    """Test the HTTP endpoint serves the pipeline metrics"""
+    server = start_metrics_server(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urlopen(url) as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert content_type.startswith("text/plain")
+    assert "# TYPE cdr_stage_seconds histogram" in body
+    assert "# TYPE cdr_records_total counter" in body
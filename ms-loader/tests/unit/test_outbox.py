@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+from app.db import database
+from app.db.database import OUTBOX_COPY_SQL, save_to_postgres
+from app.db.pool import ConnectionPool
+from app.messaging.outbox_relay import OutboxRelay
+from app.parsers.records import RecordBatch
+from tests.unit import TEST_RECORD
+from tests.unit.test_database import FakeConnection, FakeCursor
+from tests.unit.test_kafka_producer import FakeProducer
+
+
+def test_save_to_postgres_writes_outbox_in_same_transaction(monkeypatch):
+    """Test rows, marker and Kafka messages are committed together"""
+    conn = FakeConnection()
+    marked = []
+    pool = ConnectionPool(lambda: conn, min_size=0, max_size=1)
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    monkeypatch.setattr(database, "is_file_processed", lambda name, conn: False)
+    monkeypatch.setattr(
+        database, "mark_file_as_processed", lambda name, conn: marked.append(name)
+    )
+    records = RecordBatch([TEST_RECORD, dict(TEST_RECORD, source="+1234567899")])
+
+    assert save_to_postgres(records, mode="copy", outbox=True) is True
+
+    (cdr_sql, _), (outbox_sql, outbox_data) = conn.cursor_obj.copied
+    assert cdr_sql.startswith("COPY cdrs (")
+    assert outbox_sql == OUTBOX_COPY_SQL
+    rows = list(csv.reader(io.StringIO(outbox_data)))
+    assert [row[:2] for row in rows] == [
+        ["test_file", "+1234567890"], ["test_file", "+1234567899"]
+    ]
+    assert json.loads(rows[0][2]) == dict(TEST_RECORD, starttime="2024-01-15T10:30:00")
+    assert marked == ["test_file"]
+    assert conn.committed
+
+
+class OutboxCursor(FakeCursor):
+    def __init__(self, pending):
+        super().__init__()
+        self.pending = pending
+
+    def fetchall(self):
+        return self.pending
+
+
+def test_relay_marks_only_delivered_messages_as_sent():
+    """Test failed deliveries stay pending for the next pass"""
+    conn = FakeConnection()
+    conn.cursor_obj = OutboxCursor([
+        (1, "a.csv", "+1", '{"a": 1}'),
+        (2, "a.csv", "fail", '{"a": 2}'),
+        (3, "b.csv", "+3", '{"a": 3}'),
+    ])
+    producer = FakeProducer(capacity=10)
+    relay = OutboxRelay(batch_size=100, producer=producer, topic="cdr-records")
+
+    assert relay.relay_once(conn) == 2
+
+    claim, mark = conn.cursor_obj.executed
+    assert "FOR UPDATE SKIP LOCKED" in claim[0] and claim[1] == (100,)
+    assert mark[1] == ([1, 3],)
+    assert producer.produced == ['{"a": 1}', '{"a": 2}', '{"a": 3}']
+    assert conn.committed
+    assert relay.stats() == {"passes": 1, "sent": 2, "failed": 1, "errors": 0}
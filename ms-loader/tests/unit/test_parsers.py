@@ -1,10 +1,11 @@
 import os
 import pytest
 from app.parsers import parse_all_files
+from app.parsers import csv_parser
 from app.parsers.csv_parser import parse_csv
 from app.parsers.json_parser import parse_json
-from app.parsers.xml_parser import parse_xml
-from app.parsers.yaml_parser import parse_yaml
+from app.parsers.xml_parser import iter_record_elements, parse_xml
+from app.parsers.yaml_parser import parse_yaml, iter_yaml_documents
 from tests.unit import TEST_DATA, TEST_RECORD, create_test_file
 
 
@@ -21,6 +22,39 @@ def test_parse_csv_valid(tmp_path):
     assert records[2]['service'] == 'DATA'
 
 
+def test_parse_csv_parallel_ranges_match_serial(tmp_path, monkeypatch, caplog):
+    """Test memory-mapped range parsing keeps records and global row numbers"""
+    monkeypatch.setitem(csv_parser.LOADER, "csv_range_bytes", 1)
+    monkeypatch.setitem(csv_parser.LOADER, "dead_letter_mode", "file")
+    monkeypatch.setitem(
+        csv_parser.LOADER, "dead_letter_directory", str(tmp_path / "serial")
+    )
+    header, *rows = TEST_DATA['csv_content'].split('\n')
+    lines = [header]
+    for i in range(60):
+        invalid = 'invalid-phone,+9876543210,2024-01-15T10:30:00,VOICE,1'
+        lines.append(rows[i % 3] if i % 7 else invalid)
+        if i == 20:
+            lines.append('')
+    file_path = create_test_file(tmp_path, '\r\n'.join(lines), 'big.csv')
+
+    serial = parse_csv(str(file_path), workers=1)
+    monkeypatch.setitem(
+        csv_parser.LOADER, "dead_letter_directory", str(tmp_path / "parallel")
+    )
+    caplog.clear()
+    parallel = parse_csv(str(file_path), workers=4)
+
+    assert "as 4 ranges" in caplog.text
+    assert parallel == serial
+    assert len(serial) == 51
+    rejects_name = "big.csv.rejected.jsonl"
+    serial_rejects = (tmp_path / "serial" / rejects_name).read_text().splitlines()
+    parallel_rejects = (tmp_path / "parallel" / rejects_name).read_text().splitlines()
+    assert len(serial_rejects) == 9
+    assert parallel_rejects == serial_rejects
+
+
 def test_parse_csv_invalid(tmp_path):
     """Test parsing CSV file with invalid records"""
     file_path = create_test_file(tmp_path, TEST_DATA['invalid_csv_content'], 'invalid.csv')
@@ -58,6 +92,24 @@ def test_parse_xml_valid(tmp_path):
     assert records[0]['service'] == 'VOICE'
 
 
+def test_iter_record_elements_streams_nested_records(tmp_path):
+    """Test streamed records match findall and completed elements are detached"""
+    record = "<record><source>+1{0:09d}</source><service>VOICE</service></record>"
+    content = (
+        "<export><header><vendor>acme</vendor></header><batch>"
+        + "".join(record.format(i) for i in range(3))
+        + "</batch>" + record.format(3) + "</export>"
+    )
+    file_path = create_test_file(tmp_path, content, 'nested.xml')
+
+    sources = []
+    for elem in iter_record_elements(str(file_path)):
+        sources.append(elem.findtext('source'))
+
+    assert sources == [f"+1{i:09d}" for i in range(4)]
+    assert elem.findtext('source') is None
+
+
 def test_parse_yaml_valid(tmp_path):
     """Test parsing valid YAML file"""
     file_path = create_test_file(tmp_path, TEST_DATA['yaml_content'], 'test.yaml')
@@ -69,6 +121,35 @@ def test_parse_yaml_valid(tmp_path):
     assert records[1]['service'] == 'DATA'
 
 
+def test_parse_yaml_multi_document(tmp_path):
+    """Test '---' separated batches are parsed one document at a time"""
+    content = TEST_DATA['yaml_content'] + """---
+records:
+  - source: "+1234567890"
+    destination: "+9876543210"
+    starttime: "2024-01-15T10:30:00"
+    service: "voice"
+    usage: 15.5
+  - source: "+1234567891"
+    destination: "https://api.example.com"
+    starttime: "2024-01-15T12:15:45"
+    service: "DATA"
+    usage: 125.0
+---
+---
+count: 2
+"""
+    file_path = create_test_file(tmp_path, content, 'batches.yaml')
+
+    with open(file_path) as f:
+        documents = iter_yaml_documents(f)
+        assert isinstance(next(documents), list)
+
+    records = parse_yaml(str(file_path))
+    assert len(records) == 4
+    assert [r['service'] for r in records] == ['VOICE', 'DATA', 'VOICE', 'DATA']
+
+
 def test_parse_all_files_valid(tmp_path):
     """Test parsing all valid files in directory"""
     create_test_file(tmp_path, TEST_DATA['csv_content'], 'test.csv')
@@ -130,4 +211,28 @@ def test_parse_nonexistent_directory():
     
     assert len(records) == 0
     assert 'error' in validation_summary
-    assert validation_summary['error'] == 'Directory not found'
\ No newline at end of file
+    assert validation_summary['error'] == 'Directory not found'
+
+
+def test_parse_all_files_parallel_matches_serial(tmp_path):
+    """Test parsing files in worker processes gives the serial result"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'test.csv')
+    create_test_file(tmp_path, TEST_DATA['json_content'], 'test.json')
+    create_test_file(tmp_path, TEST_DATA['xml_content'], 'test.xml')
+    create_test_file(tmp_path, TEST_DATA['invalid_csv_content'], 'invalid.csv')
+
+    serial_records, serial_summary = parse_all_files(str(tmp_path), workers=1)
+    parallel_records, parallel_summary = parse_all_files(
+        str(tmp_path), workers=2, preserve_order=True
+    )
+    unordered_records, unordered_summary = parse_all_files(
+        str(tmp_path), workers=2, preserve_order=False
+    )
+
+    assert parallel_records == serial_records
+    assert parallel_summary == serial_summary
+    assert len(unordered_records) == 6
+    assert unordered_summary['valid_files'] == 3
+    assert unordered_summary['files_with_errors'] == [
+        {"filename": "invalid.csv", "error": "No valid records found"}
+    ]
@@ -0,0 +1,115 @@
+import csv
+import io
+from datetime import date, datetime
+
+from app.db import partitions
+from app.db.database import write_records
+from app.db.partitions import (
+    DEFAULT_PARTITION_DDL,
+    create_partitions,
+    drop_expired_partitions,
+    next_period,
+    partition_name,
+    partition_start,
+)
+from tests.unit import TEST_RECORD
+from tests.unit.test_database import FakeConnection, FakeCursor
+
+
+class CatalogCursor(FakeCursor):
+    """FakeCursor answering catalog queries with fixed rows."""
+
+    def __init__(self, rows, one=(False,)):
+        super().__init__()
+        self.rows = rows
+        self.one = one
+        self.rowcount = 0
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.one
+
+
+def test_partition_names_round_trip():
+    """Test partition names encode their period start and parse back"""
+    assert partition_name(date(2024, 1, 15), "daily") == "cdrs_p20240115"
+    assert partition_name(date(2024, 1, 1), "monthly") == "cdrs_p202401"
+    assert partition_start("cdrs_p20240115") == (date(2024, 1, 15), "daily")
+    assert partition_start("cdrs_p202401") == (date(2024, 1, 1), "monthly")
+    assert partition_start("cdrs_legacy") is None
+    assert next_period(date(2024, 12, 1), "monthly") == date(2025, 1, 1)
+
+
+def test_write_records_copies_into_known_partitions(monkeypatch):
+    """Test rows are COPYed into known partitions and the rest through cdrs"""
+    monkeypatch.setattr(partitions, "_active_period", "daily")
+    monkeypatch.setattr(partitions, "_known", {"cdrs_p20240115"})
+    cur = CatalogCursor([])
+    records = [TEST_RECORD, dict(TEST_RECORD, starttime=datetime(2023, 1, 16, 8))]
+
+    write_records(cur, records, "copy")
+
+    assert not any(sql.startswith("CREATE") for sql, _ in cur.executed)
+    copied = [sql.split(" (")[0] for sql, _ in cur.copied]
+    assert copied == ["COPY cdrs_p20240115", "COPY cdrs"]
+    rows = list(csv.reader(io.StringIO(cur.copied[1][1])))
+    assert rows[0][2] == "2023-01-16 08:00:00"
+
+
+def test_create_partitions_locks_and_moves_default_rows(monkeypatch):
+    """Test partition DDL runs under the advisory lock and empties the default range"""
+    monkeypatch.setattr(partitions, "_known", set())
+    conn = FakeConnection()
+    conn.cursor_obj = cur = CatalogCursor(
+        [("cdrs_p20240115",), ("cdrs_default",)], one=(True,)
+    )
+
+    create_partitions("daily", 1, today=date(2024, 1, 15), conn=conn)
+
+    statements = [sql.strip() for sql, _ in cur.executed]
+    assert statements[0] == "SELECT pg_advisory_xact_lock(%s)"
+    assert DEFAULT_PARTITION_DDL in statements
+    assert not any("cdrs_p20240115" in sql for sql in statements)
+    assert (
+        "CREATE TABLE cdrs_p20240116 "
+        "(LIKE cdrs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ) in statements
+    assert any(sql.startswith("WITH moved AS") for sql in statements)
+    assert statements[-1] == (
+        "ALTER TABLE cdrs ATTACH PARTITION cdrs_p20240116 "
+        "FOR VALUES FROM ('2024-01-16') TO ('2024-01-17')"
+    )
+    assert partitions._known == {"cdrs_p20240115", "cdrs_p20240116"}
+    assert conn.committed
+
+
+def test_drop_expired_partitions_keeps_retention_periods():
+    """Test only partitions ending before the retained months are dropped"""
+    conn = FakeConnection()
+    conn.cursor_obj = CatalogCursor([
+        ("cdrs_p202401",), ("cdrs_p202402",), ("cdrs_p202403",), ("cdrs_legacy",)
+    ])
+
+    dropped = drop_expired_partitions("monthly", 2, today=date(2024, 3, 10), conn=conn)
+
+    assert dropped == ["cdrs_p202401"]
+    assert ("DROP TABLE cdrs_p202401", None) in conn.cursor_obj.executed
+    assert not any("DELETE" in sql for sql, _ in conn.cursor_obj.executed)
+    assert conn.committed
+
+
+def test_drop_expired_partitions_purges_default_on_request():
+    """Test expired default partition rows are deleted only when asked"""
+    conn = FakeConnection()
+    conn.cursor_obj = CatalogCursor([("cdrs_p202403",)])
+
+    drop_expired_partitions(
+        "monthly", 2, today=date(2024, 3, 10), conn=conn, purge_default=True
+    )
+
+    assert (
+        "DELETE FROM cdrs_default WHERE starttime < %s",
+        (date(2024, 2, 1),),
+    ) in conn.cursor_obj.executed
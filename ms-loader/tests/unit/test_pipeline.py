@@ -0,0 +1,146 @@
+import pytest
+
+from app.config import KAFKA
+from app.pipeline import async_pipeline, streaming
+from app.pipeline.async_pipeline import run_async_pipeline
+from app.pipeline.streaming import (
+    chunked,
+    new_stream_summary,
+    record_file_outcome,
+    stream_directory,
+)
+from tests.unit import TEST_DATA, create_test_file
+
+
+def test_chunked_is_lazy_and_bounded():
+    """Test chunked yields bounded lists without consuming ahead"""
+    consumed = []
+
+    def source():
+        for i in range(5):
+            consumed.append(i)
+            yield i
+
+    chunks = chunked(source(), 2)
+    assert next(chunks) == [0, 1]
+    assert consumed == [0, 1]
+    assert list(chunks) == [[2, 3], [4]]
+
+
+class FakeRelay:
+    def __init__(self):
+        self.wakes = 0
+
+    def wake(self):
+        self.wakes += 1
+
+
+def test_stream_directory_loads_files_in_chunks(tmp_path, monkeypatch):
+    """Test streaming mode writes each file chunk by chunk through the outbox"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'valid.csv')
+    create_test_file(tmp_path, TEST_DATA['empty_csv_content'], 'empty.csv')
+    create_test_file(tmp_path, TEST_DATA['yaml_content'], 'done.yaml')
+    written_chunks = []
+    relay = FakeRelay()
+
+    def fake_save(file_name, chunks, on_chunk=None, outbox=None, counts=None):
+        assert outbox is True and on_chunk is None
+        if file_name == 'done.yaml':
+            return None
+        written = 0
+        for chunk in chunks:
+            assert len(chunk) <= 2
+            written += len(chunk)
+            written_chunks.append(chunk)
+        return written
+
+    monkeypatch.setitem(KAFKA, "publish_mode", "outbox")
+    monkeypatch.setattr(streaming, "save_file_stream", fake_save)
+    monkeypatch.setattr(streaming, "get_relay", lambda: relay)
+
+    summary = stream_directory(str(tmp_path), chunk_size=2)
+
+    assert summary['files_processed'] == 3
+    assert summary['valid_files'] == 1
+    assert summary['invalid_files'] == 1
+    assert summary['skipped_files'] == 1
+    assert summary['total_valid_records'] == 3
+    assert [len(chunk) for chunk in written_chunks] == [2, 1]
+    assert relay.wakes == 1
+
+
+class FakeManifest:
+    def __init__(self):
+        self.marked = {}
+
+    def mark(self, filename, status):
+        self.marked[filename] = status
+
+
+def test_record_file_outcome_tells_duplicates_from_invalid():
+    """Test a file of already loaded records is processed, not rejected"""
+    summary = new_stream_summary()
+    manifest = FakeManifest()
+
+    record_file_outcome(summary, 'again.csv', 0, manifest, duplicates=3)
+    record_file_outcome(summary, 'empty.csv', 0, manifest)
+
+    assert manifest.marked == {'again.csv': 'processed', 'empty.csv': 'rejected'}
+    assert summary['duplicate_files'] == 1
+    assert summary['invalid_files'] == 1
+    assert [error['filename'] for error in summary['files_with_errors']] == [
+        'empty.csv'
+    ]
+
+
+def test_stream_directory_requires_outbox(tmp_path, monkeypatch):
+    """Test streaming mode refuses to publish chunks before the commit"""
+    monkeypatch.setitem(KAFKA, "publish_mode", "direct")
+
+    with pytest.raises(ValueError, match="KAFKA_PUBLISH_MODE=outbox"):
+        stream_directory(str(tmp_path))
+
+
+def test_async_pipeline_overlaps_stages_per_chunk(tmp_path, monkeypatch):
+    """Test async mode loads each file in one stream through the outbox"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'valid.csv')
+    create_test_file(tmp_path, TEST_DATA['empty_csv_content'], 'empty.csv')
+    create_test_file(tmp_path, TEST_DATA['yaml_content'], 'done.yaml')
+    create_test_file(tmp_path, TEST_DATA['json_content'], 'broken.json')
+    written_chunks = []
+    relay = FakeRelay()
+
+    def fake_save(file_name, chunks, on_chunk=None, outbox=None, counts=None):
+        assert outbox is True and on_chunk is None
+        if file_name == 'done.yaml':
+            return None
+        written = 0
+        for chunk in chunks:
+            if file_name == 'broken.json':
+                raise RuntimeError("database went away")
+            written += len(chunk)
+            written_chunks.append(chunk)
+        return written
+
+    monkeypatch.setitem(KAFKA, "publish_mode", "outbox")
+    monkeypatch.setattr(async_pipeline, "save_file_stream", fake_save)
+    monkeypatch.setattr(async_pipeline, "get_relay", lambda: relay)
+
+    summary = run_async_pipeline(str(tmp_path), chunk_size=2, queue_size=1)
+
+    assert summary['files_processed'] == 4
+    assert summary['valid_files'] == 1
+    assert summary['skipped_files'] == 1
+    assert summary['invalid_files'] == 2
+    assert summary['processing_errors'][0]['filename'] == 'broken.json'
+    assert summary['total_valid_records'] == 3
+    assert [len(chunk) for chunk in written_chunks] == [2, 1]
+    assert relay.wakes == 1
+
+
+def test_async_pipeline_requires_outbox(tmp_path, monkeypatch):
+    """Test async mode refuses to publish chunks before the commit"""
+    monkeypatch.setitem(KAFKA, "publish_mode", "direct")
+
+    with pytest.raises(ValueError, match="KAFKA_PUBLISH_MODE=outbox"):
+        run_async_pipeline(str(tmp_path))
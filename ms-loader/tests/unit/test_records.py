@@ -0,0 +1,85 @@
+import pickle
+from datetime import datetime
+
+from app.db.database import CDR_COLUMNS, record_rows
+from app.parsers.core import ParseStats
+from app.config import LOADER
+from app.parsers.records import (
+    RecordBatch,
+    batched_records,
+    new_records,
+    record_file_names,
+)
+from tests.unit import TEST_RECORD
+
+
+def make_records(count, file_name="a.csv"):
+    return [
+        dict(TEST_RECORD, file_name=file_name, source=f"+1{i:09d}", usage=float(i),
+             starttime=datetime(2024, 1, 15, 10, 30, i % 60, i))
+        for i in range(count)
+    ]
+
+
+def test_record_batch_round_trips_record_dicts():
+    """Test records come back unchanged through indexing, slicing and iteration"""
+    records = make_records(5) + [
+        dict(TEST_RECORD, destination="https://ünïcode.example.com", service="data")
+    ]
+    batch = RecordBatch(records)
+
+    assert len(batch) == 6
+    assert batch == records
+    assert batch[0] == records[0]
+    assert batch[-1] == records[-1]
+    assert batch[1:3] == records[1:3]
+    assert list(batch.iter_rows())[2] == tuple(
+        records[2][column] for column in CDR_COLUMNS
+    )
+    assert list(record_rows(records)) == list(record_rows(batch))
+    assert pickle.loads(pickle.dumps(batch)) == records
+
+
+def test_record_batch_merges_and_splits_files():
+    """Test batches from several files merge and split back per file"""
+    merged = RecordBatch(make_records(3, "a.csv"))
+    merged.extend(RecordBatch(make_records(2, "b.json")))
+    merged.extend(make_records(1, "a.csv"))
+
+    assert merged.file_names() == ["a.csv", "b.json"]
+    by_file = merged.split_by_file()
+    assert by_file["a.csv"] == make_records(3, "a.csv") + make_records(1, "a.csv")
+    assert by_file["b.json"] == make_records(2, "b.json")
+
+
+def test_record_batch_is_smaller_than_dicts():
+    """Test the column buffers use far less than the dicts they replace"""
+    batch = RecordBatch(make_records(1000))
+
+    assert batch.nbytes() < 60 * len(batch)
+    assert [len(chunk) for chunk in batched_records(make_records(7), 3)] == [3, 3, 1]
+
+
+def test_records_are_dicts_unless_record_batches_are_on(monkeypatch):
+    """Test parsed records stay dicts by default and use RecordBatch on request"""
+    records = make_records(2, "a.csv") + make_records(1, "b.json")
+    monkeypatch.setitem(LOADER, "record_batches", False)
+    assert type(new_records(records)) is list
+    assert all(type(chunk) is list for chunk in batched_records(records, 2))
+    assert record_file_names(new_records(records)) == ["a.csv", "b.json"]
+
+    monkeypatch.setitem(LOADER, "record_batches", True)
+    assert isinstance(new_records(records), RecordBatch)
+    assert all(isinstance(chunk, RecordBatch) for chunk in batched_records(records, 2))
+    assert record_file_names(new_records(records)) == ["a.csv", "b.json"]
+
+
+def test_parse_stats_keeps_raw_rows_only_on_request():
+    """Test rejects are kept as numbers and reasons unless raw capture is on"""
+    default = ParseStats(capture_raw=False)
+    capturing = ParseStats(capture_raw=True)
+    for stats in (default, capturing):
+        stats.reject(7, {"source": "bad"}, ["Invalid source format: bad"])
+
+    assert default.samples == [{"index": 7, "errors": ["Invalid source format: bad"]}]
+    assert capturing.samples[0]["record"] == {"source": "bad"}
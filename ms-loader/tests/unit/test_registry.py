@@ -0,0 +1,54 @@
+import csv
+
+import pytest
+from app.parsers import parse_all_files, registry
+from app.parsers.core import ParseStats, Rejected, iter_valid_records
+from app.parsers.registry import ParserSpec, get_parser, register_parser
+from tests.unit import TEST_DATA, TEST_RECORD, create_test_file
+
+RAW_RECORD = dict(TEST_RECORD, starttime="2024-01-15T10:30:00")
+
+
+@pytest.fixture
+def tsv_parser():
+    def read_tsv_rows(filepath):
+        with open(filepath, newline="", encoding='utf-8') as f:
+            yield from enumerate(csv.DictReader(f, delimiter='\t'), 1)
+
+    spec = register_parser(['.tsv'], ParserSpec("TSV", read_tsv_rows, label="Row"))
+    yield spec
+    del registry._parsers['.tsv']
+
+
+def test_registered_format_is_parsed_with_shared_core(tmp_path, tsv_parser):
+    """Test a format only supplying a record reader goes through the full pipeline"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'].replace(',', '\t'), 'calls.tsv')
+
+    records, summary = parse_all_files(str(tmp_path))
+
+    assert get_parser('.tsv') is tsv_parser
+    assert summary['valid_files'] == 1
+    assert len(records) == 3
+    assert records[0]['file_name'] == 'calls.tsv'
+    assert records[2]['usage'] == 250.75
+
+
+def test_iter_valid_records_counts_rejects():
+    """Test invalid, undecodable and valid records are counted separately"""
+    stats = ParseStats(sample_limit=2)
+    numbered = [
+        (1, dict(RAW_RECORD)),
+        (2, dict(RAW_RECORD, source="invalid")),
+        (3, Rejected(["Invalid JSON: Expecting value"])),
+        (4, dict(RAW_RECORD, service="voice")),
+    ]
+
+    records = list(iter_valid_records(
+        numbered, "f.json", normalize_service=True, stats=stats
+    ))
+
+    assert [r['service'] for r in records] == ['VOICE', 'VOICE']
+    assert stats.valid == 2
+    assert stats.invalid == 2
+    assert [s['index'] for s in stats.samples] == [2, 3]
+    assert stats.samples[1]['errors'] == ["Invalid JSON: Expecting value"]
@@ -0,0 +1,104 @@
+from datetime import date, datetime
+
+from app.db import database
+from app.db.database import save_to_postgres
+from app.db.pool import ConnectionPool
+from app.db.rollups import (
+    BACKFILL_SQL,
+    UPSERT_SERVICE_SQL,
+    UPSERT_SOURCE_SQL,
+    aggregate,
+    backfill_rollups,
+    write_rollups,
+)
+from app.parsers.records import RecordBatch
+from tests.unit import TEST_RECORD
+from tests.unit.test_database import FakeConnection, FakeCursor
+
+
+def test_aggregate_sums_usage_per_day():
+    """Test rows are totalled by day and key, ignoring the time of day"""
+    rows = [
+        ("+1", "+2", datetime(2024, 1, 15, 9), "VOICE", 10.0, "a.csv"),
+        ("+1", "+3", datetime(2024, 1, 15, 23), "VOICE", 5.5, "a.csv"),
+        ("+1", "+2", datetime(2024, 1, 16, 0), "SMS", 1, "a.csv"),
+    ]
+
+    by_source, by_destination, by_service = aggregate(rows)
+
+    assert by_source == {
+        (date(2024, 1, 15), "+1", "VOICE"): [15.5, 2],
+        (date(2024, 1, 16), "+1", "SMS"): [1.0, 1],
+    }
+    assert by_destination[(date(2024, 1, 15), "+2", "VOICE")] == [10.0, 1]
+    assert by_service[(date(2024, 1, 15), "VOICE")] == [15.5, 2]
+
+
+def test_write_rollups_upserts_sorted_arrays():
+    """Test each rollup is one upsert with its keys as sorted parallel arrays"""
+    cur = FakeCursor()
+    rows = [
+        ("+2", "+9", datetime(2024, 1, 15), "SMS", 1, "a.csv"),
+        ("+1", "+9", datetime(2024, 1, 15), "SMS", 1, "a.csv"),
+    ]
+
+    write_rollups(cur, rows)
+
+    assert len(cur.executed) == 3
+    sql, params = cur.executed[0]
+    assert sql == UPSERT_SOURCE_SQL
+    assert params == [
+        [date(2024, 1, 15)] * 2, ["+1", "+2"], ["SMS", "SMS"], [1.0, 1.0], [1, 1]
+    ]
+    assert cur.executed[2] == (
+        UPSERT_SERVICE_SQL, [[date(2024, 1, 15)], ["SMS"], [2.0], [2]]
+    )
+
+
+def test_save_to_postgres_updates_rollups_in_same_transaction(monkeypatch):
+    """Test the rollup upserts run on the load's cursor before its commit"""
+    conn = FakeConnection()
+    pool = ConnectionPool(lambda: conn, min_size=0, max_size=1)
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    monkeypatch.setattr(database, "is_file_processed", lambda name, conn: False)
+    monkeypatch.setattr(database, "mark_file_as_processed", lambda name, conn: None)
+    batch = RecordBatch([TEST_RECORD, TEST_RECORD])
+
+    assert save_to_postgres(batch, mode="copy", outbox=False, rollups=True) is True
+
+    assert conn.committed
+    service_upsert = conn.cursor_obj.executed[2]
+    assert service_upsert == (
+        UPSERT_SERVICE_SQL, [[date(2024, 1, 15)], ["VOICE"], [31.0], [2]]
+    )
+
+
+class BackfillCursor(FakeCursor):
+    """Keeps the single progress row of cdr_rollup_backfill."""
+
+    def __init__(self, next_id, last_id):
+        super().__init__()
+        self.progress = (next_id, last_id)
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if sql.startswith("UPDATE cdr_rollup_backfill"):
+            self.progress = (params[0], self.progress[1])
+        elif sql.startswith("DELETE FROM cdr_rollup_backfill"):
+            self.progress = None
+
+    def fetchone(self):
+        return self.progress
+
+
+def test_backfill_rollups_commits_one_id_range_at_a_time():
+    """Test the backfill sums cdrs in id batches and clears its progress at the end"""
+    conn = FakeConnection()
+    conn.cursor_obj = cur = BackfillCursor(1, 250)
+
+    assert backfill_rollups(batch_size=100, conn=conn) == 3
+
+    ranges = [params for sql, params in cur.executed if sql == BACKFILL_SQL[0]]
+    assert ranges == [(1, 100), (101, 200), (201, 250)]
+    assert cur.progress is None
+    assert backfill_rollups(batch_size=100, conn=conn) == 0
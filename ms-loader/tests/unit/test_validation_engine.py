@@ -0,0 +1,46 @@
+import pytest
+from app.validation.engine import RecordValidator
+from app.validation.file_validator import validate_record
+
+BASE = {
+    "source": "+1234567890",
+    "destination": "+9876543210",
+    "starttime": "2024-01-15T10:30:00",
+    "service": "VOICE",
+    "usage": "15.5"
+}
+
+CASES = [
+    {},
+    {"source": "+1234567890"},
+    BASE,
+    dict(BASE, service="voice"),
+    dict(BASE, service="SMS", usage="1"),
+    dict(BASE, service="sms", usage="2"),
+    dict(BASE, service="DATA", destination="https://www.example.com", usage="250.75"),
+    dict(BASE, service="DATA", destination="ftp://files.example.com", usage="5"),
+    dict(BASE, service="DATA", destination="not a url", usage="100001"),
+    dict(BASE, service="FAX"),
+    dict(BASE, source="invalid-phone"),
+    dict(BASE, destination="abc"),
+    dict(BASE, destination=BASE["source"]),
+    dict(BASE, usage="-1"),
+    dict(BASE, usage="1441"),
+    dict(BASE, usage="lots"),
+    dict(BASE, usage=""),
+    dict(BASE, usage=None),
+    dict(BASE, usage=15.5),
+    dict(BASE, starttime="invalid-date"),
+    dict(BASE, starttime="2024-01-15T10:30:00Z"),
+    dict(BASE, starttime="2999-01-01T00:00:00"),
+    dict(BASE, starttime="1990-01-01T00:00:00"),
+    dict(BASE, source="invalid", service="FAX", usage="x", starttime="bad"),
+]
+
+
+@pytest.mark.parametrize("record", CASES)
+def test_record_validator_matches_validate_record(record):
+    """Test the compiled validator gives validate_record's exact result"""
+    validator = RecordValidator()
+    assert validator.validate(record) == validate_record(record)
+    assert validator.is_valid(record) == validate_record(record)[0]
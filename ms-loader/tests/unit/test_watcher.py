@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from app.scheduling.watcher import DirectoryWatcher
+from tests.unit import TEST_DATA, create_test_file
+
+
+def wait_for_files(watcher, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ready = watcher.poll_once()
+        if ready:
+            return ready
+    return []
+
+
+@pytest.mark.parametrize("mode", ["poll", "inotify"])
+def test_watcher_hands_over_new_files(tmp_path, mode):
+    """Test new supported files are handed over once and unsupported ignored"""
+    create_test_file(tmp_path, TEST_DATA['csv_content'], 'existing.csv')
+    watcher = DirectoryWatcher(str(tmp_path), on_files=None, mode=mode,
+                               debounce=0.05, poll_interval=0.02)
+
+    assert [name for name, _, _ in wait_for_files(watcher)] == ['existing.csv']
+
+    create_test_file(tmp_path, "ignored", 'notes.txt')
+    staged = create_test_file(tmp_path, TEST_DATA['json_content'], 'new.json.part')
+    staged.rename(tmp_path / 'new.json')
+
+    ready = wait_for_files(watcher)
+    assert ready == [('new.json', str(tmp_path / 'new.json'), '.json')]
+    assert wait_for_files(watcher, timeout=0.2) == []
+
+
+def test_watcher_debounces_files_still_being_written(tmp_path):
+    """Test a file is held back while its size keeps changing"""
+    watcher = DirectoryWatcher(str(tmp_path), on_files=None, mode="poll",
+                               debounce=0.15, poll_interval=0.02)
+    path = tmp_path / 'growing.csv'
+
+    for i in range(5):
+        with open(path, 'a') as f:
+            f.write(f"row {i}\n")
+        assert watcher.poll_once() == []
+        time.sleep(0.05)
+
+    assert [name for name, _, _ in wait_for_files(watcher)] == ['growing.csv']
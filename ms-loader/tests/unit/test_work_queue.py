@@ -0,0 +1,89 @@
+import threading
+import time
+
+from app.scheduling.work_queue import WorkQueue
+
+
+def test_work_queue_handles_items_once_per_key():
+    """Test busy keys are refused and every item is handled"""
+    release = threading.Event()
+    handled = []
+
+    def handler(item):
+        release.wait(2)
+        handled.append(item)
+
+    work_queue = WorkQueue(handler, workers=2, max_size=10)
+    work_queue.start()
+    try:
+        assert work_queue.submit("a.csv", "a")
+        assert work_queue.submit("b.csv", "b")
+        assert not work_queue.submit("a.csv", "a again")
+        release.set()
+        work_queue.join()
+        assert work_queue.submit("a.csv", "a later")
+        work_queue.join()
+    finally:
+        work_queue.stop()
+
+    stats = work_queue.stats()
+    assert sorted(handled) == ["a", "a later", "b"]
+    assert stats["submitted"] == 3
+    assert stats["duplicates"] == 1
+    assert stats["completed"] == 3
+    assert stats["depth"] == 0
+    assert stats["claimed"] == 0
+
+
+def test_work_queue_is_bounded():
+    """Test submissions beyond max_size are dropped"""
+    work_queue = WorkQueue(lambda item: None, workers=1, max_size=2)
+
+    assert work_queue.submit("a", 1)
+    assert work_queue.submit("b", 2)
+    assert not work_queue.submit("c", 3)
+
+    stats = work_queue.stats()
+    assert stats["depth"] == 2
+    assert stats["max_depth"] == 2
+    assert stats["dropped"] == 1
+
+
+def test_work_queue_reports_slow_items_without_freeing_their_worker():
+    """Test a slow item is counted as slow but keeps its key and worker until done"""
+    release = threading.Event()
+    handled = []
+
+    def handler(item):
+        if item == "slow":
+            release.wait(2)
+        handled.append(item)
+
+    work_queue = WorkQueue(handler, workers=1, max_size=10, slow_item_seconds=0.05)
+    work_queue.start()
+    try:
+        work_queue.submit("slow.csv", "slow")
+        work_queue.submit("fast.csv", "fast")
+        deadline = time.monotonic() + 2
+        while not work_queue.stats()["slow"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        stats = work_queue.stats()
+        assert stats["slow"] == 1
+        assert stats["running"] == 1
+        assert handled == []
+        assert not work_queue.submit("slow.csv", "slow")
+
+        release.set()
+        work_queue.join()
+        assert handled == ["slow", "fast"]
+        assert work_queue.submit("slow.csv", "slow")
+        work_queue.join()
+    finally:
+        work_queue.stop()
+
+    stats = work_queue.stats()
+    assert stats["slow"] == 1
+    assert stats["completed"] == 3
+    assert stats["running"] == 0
+    assert stats["claimed"] == 0